@@ -0,0 +1,246 @@
+"""
+Acknowledgement journal for MIZU Ground Station.
+
+This module decouples sending a frame from committing its transmitted
+flag to the database. Successful sends are appended to a local journal
+immediately, and a background committer flushes them to the database
+in batches. Journal entries that have not been committed yet survive a
+restart and are replayed, so their records are never sent twice.
+"""
+
+import logging
+import os
+import struct
+import threading
+import zlib
+from collections import OrderedDict
+from typing import Callable, List, Optional, Set
+
+# Record layout: kind, record id, crc32 of kind + id
+JOURNAL_RECORD = struct.Struct("<BqI")
+JOURNAL_BODY = struct.Struct("<Bq")
+
+# Record kinds
+RECORD_ACK = 1
+RECORD_COMMIT = 2
+
+logger = logging.getLogger(__name__)
+
+
+class AckJournal:
+    """
+    Durable, append-only log of sent-but-uncommitted record IDs.
+
+    The transmitter appends an ACK record for every frame that went out
+    on the link. The committer thread takes batches of uncommitted IDs,
+    hands them to the commit function and appends COMMIT records once the
+    database has accepted them. The journal is truncated whenever every
+    acknowledgement has been committed, and compacted when it outgrows
+    its size limit.
+    """
+
+    def __init__(self, path: str, commit_function: Callable[[List[int]], bool],
+                 batch_size: int = 100, commit_interval: float = 1.0,
+                 fsync_batch: int = 1, max_size: int = 1024 * 1024) -> None:
+        """
+        Initialize the journal and recover uncommitted acknowledgements.
+
+        Args:
+            path: Path of the journal file
+            commit_function: Marks a batch of IDs as transmitted, returns True on success
+            batch_size: Maximum number of IDs per database commit
+            commit_interval: Seconds the committer waits between flushes
+            fsync_batch: Number of appends between flushes to disk
+            max_size: Journal size in bytes that triggers compaction
+        """
+        self.path = path
+        self.commit_function = commit_function
+        self.batch_size = max(1, batch_size)
+        self.commit_interval = commit_interval
+        self.fsync_batch = max(1, fsync_batch)
+        self.max_size = max_size
+
+        self._uncommitted: "OrderedDict[int, None]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._wakeup = threading.Event()
+        self._should_commit = False
+        self._committer_thread: Optional[threading.Thread] = None
+        self._unsynced_appends = 0
+
+        directory = os.path.dirname(self.path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self._recover()
+        self._fd = os.open(self.path, os.O_WRONLY | os.O_CREAT | os.O_APPEND, 0o644)
+
+    def __len__(self) -> int:
+        """Return the number of acknowledgements awaiting a database commit."""
+        with self._lock:
+            return len(self._uncommitted)
+
+    def __contains__(self, record_id: int) -> bool:
+        """Check whether a record has been sent but not yet committed."""
+        with self._lock:
+            return record_id in self._uncommitted
+
+    def start(self) -> None:
+        """Start the background committer thread."""
+        if self._committer_thread is not None and self._committer_thread.is_alive():
+            return
+
+        self._should_commit = True
+        self._committer_thread = threading.Thread(target=self._commit_loop, daemon=True)
+        self._committer_thread.start()
+
+    def stop(self, timeout: float = 5.0) -> None:
+        """
+        Stop the committer thread after a final flush attempt.
+
+        Args:
+            timeout: Seconds to wait for the committer thread to finish
+        """
+        self._should_commit = False
+        self._wakeup.set()
+        if self._committer_thread is not None:
+            self._committer_thread.join(timeout)
+            self._committer_thread = None
+
+    def close(self) -> None:
+        """Stop the committer and release the journal file."""
+        self.stop()
+        with self._lock:
+            if self._fd is not None:
+                os.fsync(self._fd)
+                os.close(self._fd)
+                self._fd = None
+
+    def append(self, record_id: int) -> None:
+        """
+        Record that a frame has been sent over the link.
+
+        Args:
+            record_id: Database ID of the sent sensor data entry
+        """
+        with self._lock:
+            if record_id in self._uncommitted:
+                return
+            self._write(RECORD_ACK, record_id)
+            self._uncommitted[record_id] = None
+            batch_ready = len(self._uncommitted) >= self.batch_size
+
+        if batch_ready:
+            self._wakeup.set()
+
+    def pending_ids(self) -> Set[int]:
+        """
+        Get the IDs sent over the link but not yet committed to the database.
+
+        Returns:
+            Set of record IDs
+        """
+        with self._lock:
+            return set(self._uncommitted)
+
+    def flush(self) -> bool:
+        """
+        Commit all journaled acknowledgements to the database now.
+
+        Returns:
+            True if nothing remains uncommitted, False otherwise
+        """
+        while True:
+            with self._lock:
+                batch = list(self._uncommitted)[:self.batch_size]
+            if not batch:
+                return True
+
+            if not self.commit_function(batch):
+                return False
+
+            with self._lock:
+                for record_id in batch:
+                    if record_id in self._uncommitted:
+                        self._write(RECORD_COMMIT, record_id)
+                        del self._uncommitted[record_id]
+                self._sync()
+                self._truncate_or_compact()
+
+    def _commit_loop(self) -> None:
+        """Flush journaled acknowledgements to the database until stopped."""
+        while self._should_commit:
+            self._wakeup.wait(self.commit_interval)
+            self._wakeup.clear()
+            try:
+                self.flush()
+            except Exception as e:
+                logger.error("Error committing acknowledgements: %s", e)
+
+        # Final attempt so a clean shutdown leaves nothing behind
+        try:
+            self.flush()
+        except Exception as e:
+            logger.error("Error committing acknowledgements: %s", e)
+
+    def _write(self, kind: int, record_id: int) -> None:
+        """Append a single record to the journal file. Caller holds the lock."""
+        body = JOURNAL_BODY.pack(kind, record_id)
+        os.write(self._fd, JOURNAL_RECORD.pack(kind, record_id, zlib.crc32(body)))
+        self._unsynced_appends += 1
+        if self._unsynced_appends >= self.fsync_batch:
+            self._sync()
+
+    def _sync(self) -> None:
+        """Flush appended records to disk. Caller holds the lock."""
+        if self._unsynced_appends:
+            os.fsync(self._fd)
+            self._unsynced_appends = 0
+
+    def _truncate_or_compact(self) -> None:
+        """Shrink the journal once records have been committed. Caller holds the lock."""
+        if not self._uncommitted:
+            os.ftruncate(self._fd, 0)
+            return
+
+        if os.fstat(self._fd).st_size < self.max_size:
+            return
+
+        # Rewrite only the uncommitted acknowledgements
+        compact_path = self.path + ".compact"
+        with open(compact_path, "wb") as compact_file:
+            for record_id in self._uncommitted:
+                body = JOURNAL_BODY.pack(RECORD_ACK, record_id)
+                compact_file.write(JOURNAL_RECORD.pack(RECORD_ACK, record_id, zlib.crc32(body)))
+            compact_file.flush()
+            os.fsync(compact_file.fileno())
+        os.replace(compact_path, self.path)
+
+        os.close(self._fd)
+        self._fd = os.open(self.path, os.O_WRONLY | os.O_CREAT | os.O_APPEND, 0o644)
+
+    def _recover(self) -> None:
+        """Rebuild the uncommitted set from the journal file on disk."""
+        if not os.path.exists(self.path):
+            return
+
+        with open(self.path, "rb") as journal_file:
+            data = journal_file.read()
+
+        valid_length = 0
+        for offset in range(0, len(data) - JOURNAL_RECORD.size + 1, JOURNAL_RECORD.size):
+            kind, record_id, stored_crc = JOURNAL_RECORD.unpack_from(data, offset)
+            if zlib.crc32(JOURNAL_BODY.pack(kind, record_id)) != stored_crc:
+                # Torn write at the tail: everything after it is discarded
+                break
+
+            if kind == RECORD_ACK:
+                self._uncommitted[record_id] = None
+            elif kind == RECORD_COMMIT:
+                self._uncommitted.pop(record_id, None)
+            valid_length = offset + JOURNAL_RECORD.size
+
+        if valid_length != len(data):
+            with open(self.path, "r+b") as journal_file:
+                journal_file.truncate(valid_length)
+
+        if self._uncommitted:
+            logger.info("Recovered %d uncommitted acknowledgements from journal", len(self._uncommitted))
@@ -0,0 +1,156 @@
+"""
+Backlog aggregation for MIZU Ground Station.
+
+While the backlog is deeper than the link can drain, the oldest raw
+readings are summarized per device and fixed time window (minimum, mean
+and maximum of every measurement) and the summaries are uplinked instead.
+The raw readings stay in the database, linked to their summary, and can
+be queued for transmission again on request.
+
+Summary frame format:
+    #S,device_id=SENSOR001,window_start=2024-01-15T10:30:00,window=300,count=10,
+    ambient_temp=24.1/25.03/25.9,...,uv_light=0.7/0.8/0.9~
+"""
+
+import logging
+from datetime import datetime, timedelta
+from typing import Dict, Iterable, List, Optional, Sequence, Tuple
+
+from sensor_record import FRAME_VALUE_KEYS, SENSOR_VALUE_FIELDS
+
+logger = logging.getLogger(__name__)
+
+SUMMARY_FRAME_PREFIX = "#S,"
+
+# Decimal places of the mean in summary frames
+MEAN_DECIMALS = 3
+
+_EPOCH = datetime(1970, 1, 1)
+
+
+def window_start(timestamp: datetime, window_seconds: int) -> datetime:
+    """
+    Get the start of the fixed window a timestamp falls in.
+
+    Windows are aligned to the Unix epoch, so a 300-second window starts
+    at :00, :05, :10 ... past the hour.
+    """
+    seconds = int((timestamp - _EPOCH).total_seconds())
+    return _EPOCH + timedelta(seconds=seconds - seconds % window_seconds)
+
+
+def summarize(records: Iterable, window_seconds: int) -> List[dict]:
+    """
+    Summarize readings per device and window.
+
+    Args:
+        records: SensorRecord objects, or anything with the same attributes
+        window_seconds: Window length in seconds
+
+    Returns:
+        One dictionary per (device, window), ordered by window start then
+        device, with the mizu_sensor_summary column values and the IDs of
+        the summarized readings under "record_ids"
+    """
+    groups: Dict[Tuple[str, datetime], list] = {}
+    for record in records:
+        groups.setdefault((record.device_id, window_start(record.timestamp, window_seconds)), []).append(record)
+
+    summaries = []
+    for (device_id, start), group in sorted(groups.items(), key=lambda item: (item[0][1], item[0][0])):
+        summary = {
+            "device_id": device_id,
+            "window_start": start,
+            "window_seconds": window_seconds,
+            "reading_count": len(group),
+            "record_ids": [record.id for record in group],
+        }
+        for field in SENSOR_VALUE_FIELDS:
+            values = [value for value in (getattr(record, field) for record in group) if value is not None]
+            summary[f"{field}_min"] = min(values) if values else None
+            summary[f"{field}_mean"] = round(sum(values) / len(values), MEAN_DECIMALS) if values else None
+            summary[f"{field}_max"] = max(values) if values else None
+        summaries.append(summary)
+    return summaries
+
+
+def format_summary_frame(summary) -> str:
+    """
+    Format a summary into the uplink frame.
+
+    Args:
+        summary: Dictionary from summarize(), or a mizu_sensor_summary row
+
+    Returns:
+        Formatted string starting with #S, and ending with ~
+    """
+    get = summary.get if isinstance(summary, dict) else lambda name: getattr(summary, name)
+
+    formatted_parts = [
+        f"device_id={get('device_id')}",
+        f"window_start={get('window_start').isoformat()}",
+        f"window={get('window_seconds')}",
+        f"count={get('reading_count')}",
+    ]
+    for key, field in zip(FRAME_VALUE_KEYS, SENSOR_VALUE_FIELDS):
+        statistics = (get(f"{field}_min"), get(f"{field}_mean"), get(f"{field}_max"))
+        formatted_parts.append(f"{key}={'/'.join(str(value or 0.0) for value in statistics)}")
+
+    return f"{SUMMARY_FRAME_PREFIX}{','.join(formatted_parts)}~"
+
+
+class AggregationPolicy:
+    """
+    Decides from the backlog depth whether, and how coarsely, to summarize.
+
+    Summaries are switched on when the backlog reaches the smallest
+    threshold and stay on until it falls below the exit level, so the
+    mode does not flap around a single threshold. While on, the window
+    of the largest threshold reached applies.
+    """
+
+    def __init__(self, windows: Sequence[Tuple[int, int]], exit_backlog: int) -> None:
+        """
+        Initialize the policy.
+
+        Args:
+            windows: (backlog size, window seconds) pairs
+            exit_backlog: Backlog size below which raw readings are sent again
+        """
+        self.windows = sorted(windows)
+        self.exit_backlog = exit_backlog
+        self.active = False
+
+    def window_for(self, backlog_size: int) -> Optional[int]:
+        """
+        Get the summary window for the current backlog.
+
+        Args:
+            backlog_size: Number of untransmitted entries
+
+        Returns:
+            Window length in seconds, or None to send raw readings
+        """
+        if not self.windows:
+            return None
+
+        was_active = self.active
+        if backlog_size >= self.windows[0][0]:
+            self.active = True
+        elif backlog_size < self.exit_backlog:
+            self.active = False
+
+        if self.active != was_active:
+            if self.active:
+                logger.info("Backlog of %d entries, uplinking summaries instead of raw readings", backlog_size)
+            else:
+                logger.info("Backlog down to %d entries, uplinking raw readings", backlog_size)
+
+        if not self.active:
+            return None
+
+        window_seconds = self.windows[0][1]
+        for threshold, seconds in self.windows:
+            if backlog_size >= threshold:
+                window_seconds = seconds
+        return window_seconds
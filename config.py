@@ -13,6 +13,7 @@ WINDOW_TITLE = "MIZU Satellite Uplink"
 # Serial communication configuration
 DEFAULT_BAUD_RATE = "9600"
 SERIAL_TIMEOUT = 0.1
+SERIAL_WRITE_TIMEOUT = 2.0  # seconds before a blocked write is abandoned
 MAX_COM_PORTS = 256
 
 # UI Configuration
@@ -75,5 +76,173 @@ DATABASE_CONFIG = {
 # Database URL template
 DATABASE_URL_TEMPLATE = "postgresql://{username}:{password}@{host}:{port}/{database}"
 
+# Database backend: "postgresql" (server in DATABASE_CONFIG) or "sqlite"
+# (embedded database file, for small field ground stations)
+DATABASE_BACKEND = "postgresql"
+DATABASE_BACKENDS = ["postgresql", "sqlite"]
+
+# SQLite configuration
+SQLITE_DATABASE_PATH = "mizu_sensor_hub.db"
+SQLITE_URL_TEMPLATE = "sqlite:///{path}"
+SQLITE_BUSY_TIMEOUT = 5.0  # seconds a connection waits for another writer
+SQLITE_BULK_CHUNK_SIZE = 500  # IDs per statement, below SQLite's bound parameter limit
+SQLITE_PRAGMAS = {
+    "journal_mode": "WAL",  # readers and the writer do not block each other
+    "synchronous": "NORMAL",  # safe with WAL; fsync at checkpoints only
+    "cache_size": -16000,  # page cache in KiB (negative) per connection
+    "temp_store": "MEMORY",
+    "wal_autocheckpoint": 1000,  # pages
+}
+
+# URL of the configured database backend
+if DATABASE_BACKEND == "sqlite":
+    DATABASE_URL = SQLITE_URL_TEMPLATE.format(path=SQLITE_DATABASE_PATH)
+else:
+    DATABASE_URL = DATABASE_URL_TEMPLATE.format(**DATABASE_CONFIG)
+
+# Seconds between attempts to reconnect to an unavailable database
+DATABASE_RETRY_INTERVAL = 30
+
+# Seconds between recounts of the trigger-maintained backlog counter
+BACKLOG_RECONCILE_INTERVAL = 3600
+
+# Rows fetched per round trip by DatabaseManager.iter_device_readings()
+# (a server-side cursor on PostgreSQL)
+DEVICE_READINGS_FETCH_SIZE = 1000
+
+# Outbox configuration (local write-ahead queue between database and link)
+OUTBOX_DIRECTORY = "outbox"
+OUTBOX_SEGMENT_SIZE = 4 * 1024 * 1024  # bytes
+OUTBOX_PREFETCH_LIMIT = 256  # frames held ahead of the link
+OUTBOX_FSYNC_BATCH = 16  # appends between flushes to disk
+OUTBOX_FSYNC_INTERVAL = 1.0  # maximum seconds between flushes to disk
+
+# Acknowledgement journal configuration (sent frames awaiting a database commit)
+ACK_JOURNAL_PATH = "ack_journal/acks.log"
+ACK_JOURNAL_COMMIT_BATCH = 100  # IDs per database commit
+ACK_JOURNAL_COMMIT_INTERVAL = 1.0  # seconds between background commits
+ACK_JOURNAL_FSYNC_BATCH = 1  # appends between flushes to disk
+ACK_JOURNAL_MAX_SIZE = 1024 * 1024  # bytes before the journal is compacted
+
+# Reliable link configuration (sequence-numbered frames acknowledged by the far end)
+RELIABLE_LINK_ENABLED = False
+RELIABLE_LINK_WINDOW_SIZE = 8  # unacknowledged frames in flight
+RELIABLE_LINK_ACK_TIMEOUT = 5.0  # seconds before a frame is retransmitted
+RELIABLE_LINK_MAX_RETRIES = 5  # retransmissions before a frame is deferred to the next cycle
+
+# Link-rate configuration (AIMD pacing of outgoing characters)
+LINK_RATE_ADAPTIVE = False  # when False, characters are paced at the initial rate
+LINK_RATE_INITIAL = 20.0  # characters per second (a 0.05s delay per character)
+LINK_RATE_MIN = 5.0  # characters per second
+LINK_RATE_INCREASE_STEP = 2.0  # characters per second added after each good frame
+LINK_RATE_DECREASE_FACTOR = 0.5  # rate multiplier on write timeouts, NAKs or a full buffer
+LINK_RATE_STALL_FACTOR = 4.0  # character times a write may take before the buffer counts as full
+
+# Delay between transmitted entries in seconds; with adaptive pacing the
+# link rate is controlled per character and entries are sent back to back,
+# and in reliable link mode they are sent while the window has room
+TRANSMISSION_ENTRY_INTERVAL = 5
+# On disconnect or exit the UI polls for the transmission thread to exit
+# before the outbox and journal are closed, and warns if it takes longer
+# than TRANSMISSION_STOP_TIMEOUT seconds
+TRANSMISSION_STOP_POLL_INTERVAL = 50  # milliseconds between checks
+TRANSMISSION_STOP_TIMEOUT = 10.0
+
+# Transmit scheduling configuration
+TRANSMIT_SCHEDULING_POLICY = "fifo"  # "fifo", "newest_first", "fair" or "priority"
+TRANSMISSION_BATCH_SIZE = 32  # frames sent before the backlog is re-planned
+# Planned batches fetched and encoded ahead of the link by a background
+# stage; 0 fetches from the database in the transmission loop instead
+TRANSMISSION_PREFETCH_DEPTH = 2
+# Send the frames stored at insert time by DatabaseManager.ingest_readings()
+# (migration 0005) instead of formatting every row; rows without a stored
+# frame are still formatted
+TRANSMISSION_PRECOMPUTED_FRAMES = False
+
+# Uplink compression configuration (batches of frames deflated against a
+# pre-shared dictionary, see train_dictionary.py); the receiver must hold
+# the same dictionary file
+COMPRESSION_ENABLED = False
+COMPRESSION_DICTIONARY_DIRECTORY = "dictionaries"
+COMPRESSION_DICTIONARY_ID = None  # None uses the newest stored dictionary
+COMPRESSION_BATCH_SIZE = 8  # frames per compressed frame (at most 255)
+COMPRESSION_LEVEL = 9  # zlib compression level
+
+# Delta encoding configuration (per-device keyframes and quantized deltas,
+# see delta_encoding.py); the receiver must use the same precisions
+DELTA_ENCODING_ENABLED = False
+DELTA_KEYFRAME_INTERVAL = 16  # frames of a device from one keyframe to the next
+DELTA_FIELD_PRECISION = {  # quantization step per field; timestamps are sent in whole seconds
+    "ambient_temperature": 0.1,  # °C
+    "humidity": 0.1,  # %RH
+    "soil_moisture": 0.1,  # %
+    "soil_temperature": 0.1,  # °C
+    "wind_speed": 0.1,  # m/s
+    "ambient_light": 1.0,  # lux
+    "uv_light": 0.1,  # UV index
+}
+
+# Backlog aggregation configuration (per-device min/mean/max summaries of
+# the oldest readings uplinked in their place while the backlog is deep)
+AGGREGATION_ENABLED = False
+AGGREGATION_WINDOWS = [(5000, 300), (20000, 900)]  # (backlog size, window seconds); the largest size reached applies
+AGGREGATION_EXIT_BACKLOG = 1000  # backlog size below which raw readings are sent again
+AGGREGATION_BATCH_ROWS = 5000  # readings summarized per prefetch
+
+# Rollup configuration (hourly and daily per-device rollups for history
+# queries, maintained by refresh_rollups.py)
+ROLLUP_BATCH_ROWS = 10000  # readings folded in per transaction
+ROLLUP_REFRESH_INTERVAL = 300  # seconds between runs with refresh_rollups.py --loop
+# Seconds a reading ID must have been visible before it is folded in, so
+# inserts still committing with lower IDs are not skipped
+ROLLUP_SETTLE_SECONDS = 60
+ROLLUP_MIN_POINTS = 24  # periods a range must span for a rollup to be used instead of finer data
+
+# Process pipeline configuration (database reader, encoder and serial writer
+# in separate processes connected by shared-memory rings, see
+# process_pipeline.py); backlog aggregation and the reliable link are not
+# available in this mode
+PIPELINE_PROCESSES = False
+PIPELINE_RING_SLOTS = 256  # slots per ring
+PIPELINE_SLOT_SIZE = 4096  # bytes per slot; compressed units larger than this are sent frame by frame
+PIPELINE_POLL_INTERVAL = 1.0  # seconds the reader waits when there is nothing new to read, unless readings are ingested
+PIPELINE_ACK_JOURNAL_PATH = "ack_journal/pipeline_acks.log"  # journal of the writer process
+PIPELINE_STOP_TIMEOUT = 5.0  # seconds the processes get to finish before they are terminated
+
+# Ingest endpoint configuration (readings POSTed by local collectors to
+# http://<host>:<port>/readings as JSON lines or uplink frames)
+INGEST_ENABLED = False
+INGEST_HOST = "127.0.0.1"  # local only
+INGEST_PORT = 9465
+INGEST_BATCH_SIZE = 500  # readings written per database insert
+INGEST_FLUSH_INTERVAL = 0.05  # seconds a batch waits for the readings of further requests
+INGEST_QUEUE_SIZE = 64  # requests waiting for the writer before new ones get 503
+INGEST_MAX_BODY_BYTES = 1024 * 1024
+INGEST_ENQUEUE_TIMEOUT = 1.0  # seconds a request waits for room in the queue
+INGEST_WRITE_TIMEOUT = 10.0  # seconds a request waits for its readings to be committed
+
+# Metrics configuration (Prometheus text format at http://<host>:<port>/metrics)
+METRICS_ENABLED = True
+METRICS_HOST = "127.0.0.1"  # local only
+METRICS_PORT = 9464
+
+# Logging configuration (records are written by a background thread)
+LOG_LEVEL = "INFO"
+LOG_FILE = "logs/ground_station.log"  # rotating JSON lines; None disables the file
+LOG_MAX_BYTES = 5 * 1024 * 1024  # size at which the log file is rotated
+LOG_BACKUP_COUNT = 5  # rotated log files kept
+LOG_FRAME_SAMPLE_RATE = 10  # keep one per-frame message out of this many
+
+# Tracing configuration (timed spans of the transmission phases)
+TRACING_SINK = None  # None (disabled), "ring", "json" or "otlp"
+TRACING_FILE = "traces/spans.jsonl"  # json sink output
+TRACING_RING_SIZE = 4096  # spans kept by the ring sink
+TRACING_OTLP_ENDPOINT = "http://127.0.0.1:4318/v1/traces"  # local OpenTelemetry collector
+TRACING_SERVICE_NAME = "mizu-ground-station"
+
+# Dashboard configuration (live performance panel in the GUI)
+DASHBOARD_REFRESH_INTERVAL = 1000  # milliseconds between refreshes
+DASHBOARD_HISTORY_LENGTH = 60  # refreshes shown in the frames/s sparkline
+
 # Exit confirmation message
 EXIT_CONFIRMATION_MESSAGE = "Are you sure you want to exit the MIZU Ground Station?"
@@ -2,14 +2,20 @@
 Database models for MIZU Sensor Hub.
 
 This module defines the SQLAlchemy models for storing sensor data
-in the PostgreSQL database.
+in the PostgreSQL database, or in an embedded SQLite database.
 """
 
+import os
 from datetime import datetime
-from sqlalchemy import Column, Integer, Float, String, Boolean, DateTime, create_engine
+from sqlalchemy import (
+    Column, Integer, Float, String, Text, Boolean, DateTime, Index, UniqueConstraint, create_engine, event, text
+)
 from sqlalchemy.ext.declarative import declarative_base
+from sqlalchemy.engine import make_url
 from sqlalchemy.orm import sessionmaker
 
+from config import SQLITE_BUSY_TIMEOUT, SQLITE_PRAGMAS
+
 Base = declarative_base()
 
 
@@ -21,9 +27,17 @@ class SensorData(Base):
     environmental measurements, and transmission status.
     """
     __tablename__ = 'mizu_sensor_hub'
+    # A device takes one reading per timestamp, so retried deliveries are
+    # skipped on insert. Per-device range queries read one contiguous,
+    # time-ordered index range; the index also serves lookups by device_id alone.
+    # The priority scheduling policy reads the backlog by (transmitted, priority)
+    __table_args__ = (
+        Index('uq_mizu_sensor_hub_device_id_timestamp', 'device_id', 'timestamp', unique=True),
+        Index('ix_mizu_sensor_hub_transmitted_priority', 'transmitted', 'priority'),
+    )
 
     id = Column(Integer, primary_key=True, autoincrement=True)
-    device_id = Column(String(100), nullable=False, index=True)
+    device_id = Column(String(100), nullable=False)
     ambient_temperature = Column(Float, nullable=True)
     humidity = Column(Float, nullable=True)
     soil_moisture = Column(Float, nullable=True)
@@ -32,12 +46,267 @@ class SensorData(Base):
     ambient_light = Column(Float, nullable=True)
     uv_light = Column(Float, nullable=True)
     transmitted = Column(Boolean, default=False, nullable=False)
+    priority = Column(Integer, default=0, server_default='0', nullable=False)
     timestamp = Column(DateTime, default=datetime.utcnow, nullable=False, index=True)
+    # Uplink frame stored at insert time by DatabaseManager.ingest_readings(), if any
+    frame = Column(Text, nullable=True)
+    # Summary uplinked in place of this reading, if any (mizu_sensor_summary.id)
+    summary_id = Column(Integer, nullable=True, index=True)
 
     def __repr__(self):
         return f"<SensorData(device_id='{self.device_id}', timestamp='{self.timestamp}')>"
 
 
+class SensorSummary(Base):
+    """
+    Model for per-device summaries of sensor readings over a time window.
+
+    While the transmit backlog is deep, summaries are uplinked instead of
+    the raw readings they cover; those readings point back to their
+    summary through SensorData.summary_id.
+    """
+    __tablename__ = 'mizu_sensor_summary'
+
+    id = Column(Integer, primary_key=True, autoincrement=True)
+    device_id = Column(String(100), nullable=False, index=True)
+    window_start = Column(DateTime, nullable=False)
+    window_seconds = Column(Integer, nullable=False)
+    reading_count = Column(Integer, nullable=False)
+    ambient_temperature_min = Column(Float, nullable=True)
+    ambient_temperature_mean = Column(Float, nullable=True)
+    ambient_temperature_max = Column(Float, nullable=True)
+    humidity_min = Column(Float, nullable=True)
+    humidity_mean = Column(Float, nullable=True)
+    humidity_max = Column(Float, nullable=True)
+    soil_moisture_min = Column(Float, nullable=True)
+    soil_moisture_mean = Column(Float, nullable=True)
+    soil_moisture_max = Column(Float, nullable=True)
+    soil_temperature_min = Column(Float, nullable=True)
+    soil_temperature_mean = Column(Float, nullable=True)
+    soil_temperature_max = Column(Float, nullable=True)
+    wind_speed_min = Column(Float, nullable=True)
+    wind_speed_mean = Column(Float, nullable=True)
+    wind_speed_max = Column(Float, nullable=True)
+    ambient_light_min = Column(Float, nullable=True)
+    ambient_light_mean = Column(Float, nullable=True)
+    ambient_light_max = Column(Float, nullable=True)
+    uv_light_min = Column(Float, nullable=True)
+    uv_light_mean = Column(Float, nullable=True)
+    uv_light_max = Column(Float, nullable=True)
+    frame = Column(Text, nullable=False)
+    transmitted = Column(Boolean, default=False, nullable=False, index=True)
+    created_at = Column(DateTime, default=datetime.utcnow, nullable=False)
+
+    def __repr__(self):
+        return f"<SensorSummary(device_id='{self.device_id}', window_start='{self.window_start}', count={self.reading_count})>"
+
+
+class RollupColumns:
+    """
+    Columns shared by the rollup tables.
+
+    One row per device and period holds the number of readings and, for
+    every measurement, the count of non-null values, their sum, minimum
+    and maximum; the mean is sum / count.
+    """
+    id = Column(Integer, primary_key=True, autoincrement=True)
+    device_id = Column(String(100), nullable=False)
+    period_start = Column(DateTime, nullable=False)
+    reading_count = Column(Integer, nullable=False, default=0)
+    ambient_temperature_count = Column(Integer, nullable=False, default=0)
+    ambient_temperature_sum = Column(Float, nullable=False, default=0.0)
+    ambient_temperature_min = Column(Float, nullable=True)
+    ambient_temperature_max = Column(Float, nullable=True)
+    humidity_count = Column(Integer, nullable=False, default=0)
+    humidity_sum = Column(Float, nullable=False, default=0.0)
+    humidity_min = Column(Float, nullable=True)
+    humidity_max = Column(Float, nullable=True)
+    soil_moisture_count = Column(Integer, nullable=False, default=0)
+    soil_moisture_sum = Column(Float, nullable=False, default=0.0)
+    soil_moisture_min = Column(Float, nullable=True)
+    soil_moisture_max = Column(Float, nullable=True)
+    soil_temperature_count = Column(Integer, nullable=False, default=0)
+    soil_temperature_sum = Column(Float, nullable=False, default=0.0)
+    soil_temperature_min = Column(Float, nullable=True)
+    soil_temperature_max = Column(Float, nullable=True)
+    wind_speed_count = Column(Integer, nullable=False, default=0)
+    wind_speed_sum = Column(Float, nullable=False, default=0.0)
+    wind_speed_min = Column(Float, nullable=True)
+    wind_speed_max = Column(Float, nullable=True)
+    ambient_light_count = Column(Integer, nullable=False, default=0)
+    ambient_light_sum = Column(Float, nullable=False, default=0.0)
+    ambient_light_min = Column(Float, nullable=True)
+    ambient_light_max = Column(Float, nullable=True)
+    uv_light_count = Column(Integer, nullable=False, default=0)
+    uv_light_sum = Column(Float, nullable=False, default=0.0)
+    uv_light_min = Column(Float, nullable=True)
+    uv_light_max = Column(Float, nullable=True)
+
+    def __repr__(self):
+        return f"<{type(self).__name__}(device_id='{self.device_id}', period_start='{self.period_start}', count={self.reading_count})>"
+
+
+class HourlyRollup(RollupColumns, Base):
+    """Model for hourly rollups of sensor readings per device."""
+    __tablename__ = 'mizu_sensor_rollup_hourly'
+    __table_args__ = (UniqueConstraint('device_id', 'period_start', name='uq_mizu_sensor_rollup_hourly_device_period'),)
+
+
+class DailyRollup(RollupColumns, Base):
+    """Model for daily rollups of sensor readings per device."""
+    __tablename__ = 'mizu_sensor_rollup_daily'
+    __table_args__ = (UniqueConstraint('device_id', 'period_start', name='uq_mizu_sensor_rollup_daily_device_period'),)
+
+
+class RollupState(Base):
+    """
+    High-water marks of the rollup maintenance job.
+
+    Each row records the highest mizu_sensor_hub ID already folded into
+    the named rollups; the next run continues after it. The row named
+    "<rollups>.horizon" records the highest ID seen when it was updated,
+    which readings are folded in up to once it has settled.
+    """
+    __tablename__ = 'mizu_rollup_state'
+
+    name = Column(String(50), primary_key=True)
+    last_id = Column(Integer, nullable=False, default=0)
+    updated_at = Column(DateTime, nullable=True)
+
+    def __repr__(self):
+        return f"<RollupState(name='{self.name}', last_id={self.last_id})>"
+
+
+class BacklogCounter(Base):
+    """
+    Single-row table holding the number of untransmitted sensor data entries.
+
+    The count is maintained by database triggers on mizu_sensor_hub, so it
+    can be read in O(1) regardless of the table size.
+    """
+    __tablename__ = 'mizu_backlog_counter'
+
+    id = Column(Integer, primary_key=True)
+    untransmitted = Column(Integer, nullable=False, default=0)
+
+    def __repr__(self):
+        return f"<BacklogCounter(untransmitted={self.untransmitted})>"
+
+
+# ID of the only row in mizu_backlog_counter
+BACKLOG_COUNTER_ID = 1
+
+# Statement-level triggers keep the counter in step with inserts, updates
+# and deletes on PostgreSQL (10+); one counter update per statement
+POSTGRESQL_BACKLOG_COUNTER_DDL = [
+    """
+    CREATE OR REPLACE FUNCTION mizu_backlog_counter_update() RETURNS trigger AS $$
+    DECLARE
+        delta bigint := 0;
+    BEGIN
+        IF TG_OP IN ('INSERT', 'UPDATE') THEN
+            SELECT delta + count(*) INTO delta FROM new_rows WHERE NOT transmitted;
+        END IF;
+        IF TG_OP IN ('UPDATE', 'DELETE') THEN
+            SELECT delta - count(*) INTO delta FROM old_rows WHERE NOT transmitted;
+        END IF;
+        IF delta <> 0 THEN
+            UPDATE mizu_backlog_counter SET untransmitted = untransmitted + delta WHERE id = 1;
+        END IF;
+        RETURN NULL;
+    END;
+    $$ LANGUAGE plpgsql
+    """,
+    """
+    CREATE TRIGGER mizu_backlog_counter_insert AFTER INSERT ON mizu_sensor_hub
+    REFERENCING NEW TABLE AS new_rows
+    FOR EACH STATEMENT EXECUTE PROCEDURE mizu_backlog_counter_update()
+    """,
+    """
+    CREATE TRIGGER mizu_backlog_counter_update AFTER UPDATE ON mizu_sensor_hub
+    REFERENCING OLD TABLE AS old_rows NEW TABLE AS new_rows
+    FOR EACH STATEMENT EXECUTE PROCEDURE mizu_backlog_counter_update()
+    """,
+    """
+    CREATE TRIGGER mizu_backlog_counter_delete AFTER DELETE ON mizu_sensor_hub
+    REFERENCING OLD TABLE AS old_rows
+    FOR EACH STATEMENT EXECUTE PROCEDURE mizu_backlog_counter_update()
+    """,
+]
+
+# Row-level triggers for SQLite, which has no statement-level triggers
+SQLITE_BACKLOG_COUNTER_DDL = [
+    """
+    CREATE TRIGGER IF NOT EXISTS mizu_backlog_counter_insert AFTER INSERT ON mizu_sensor_hub
+    WHEN NOT NEW.transmitted
+    BEGIN
+        UPDATE mizu_backlog_counter SET untransmitted = untransmitted + 1 WHERE id = 1;
+    END
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS mizu_backlog_counter_update AFTER UPDATE OF transmitted ON mizu_sensor_hub
+    WHEN NEW.transmitted != OLD.transmitted
+    BEGIN
+        UPDATE mizu_backlog_counter
+        SET untransmitted = untransmitted + (CASE WHEN NEW.transmitted THEN -1 ELSE 1 END)
+        WHERE id = 1;
+    END
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS mizu_backlog_counter_delete AFTER DELETE ON mizu_sensor_hub
+    WHEN NOT OLD.transmitted
+    BEGIN
+        UPDATE mizu_backlog_counter SET untransmitted = untransmitted - 1 WHERE id = 1;
+    END
+    """,
+]
+
+BACKLOG_COUNTER_DDL = {
+    "postgresql": POSTGRESQL_BACKLOG_COUNTER_DDL,
+    "sqlite": SQLITE_BACKLOG_COUNTER_DDL,
+}
+
+
+def install_backlog_counter(connection) -> None:
+    """
+    Install the backlog counter triggers and seed the counter row.
+
+    Used both after create_all() and by migration 0004, so the trigger
+    DDL has one definition. Does nothing once the counter row exists, or
+    on databases without trigger support here; DatabaseManager then
+    falls back to counting.
+
+    Args:
+        connection: Connection to run the DDL on, inside a transaction
+    """
+    statements = BACKLOG_COUNTER_DDL.get(connection.dialect.name)
+    if statements is None:
+        return
+
+    seeded = connection.execute(
+        text("SELECT 1 FROM mizu_backlog_counter WHERE id = :id"), {"id": BACKLOG_COUNTER_ID}
+    ).first()
+    if seeded is not None:
+        return
+
+    # Triggers first, then the seed count, so no change falls in between
+    if connection.dialect.name == "postgresql":
+        for trigger in ("insert", "update", "delete"):
+            connection.exec_driver_sql(f"DROP TRIGGER IF EXISTS mizu_backlog_counter_{trigger} ON mizu_sensor_hub")
+    for statement in statements:
+        connection.exec_driver_sql(statement)
+    connection.execute(text(
+        "INSERT INTO mizu_backlog_counter (id, untransmitted) "
+        "SELECT :id, count(*) FROM mizu_sensor_hub WHERE NOT transmitted"
+    ), {"id": BACKLOG_COUNTER_ID})
+
+
+@event.listens_for(Base.metadata, "after_create")
+def _install_backlog_counter(target, connection, **kwargs) -> None:
+    """Set up the backlog counter whenever create_all() has run."""
+    install_backlog_counter(connection)
+
+
 # Database engine and session factory
 engine = None
 SessionLocal = None
@@ -52,13 +321,55 @@ def init_database(database_url: str):
     """
     global engine, SessionLocal
 
-    engine = create_engine(database_url)
+    if make_url(database_url).get_backend_name() == "sqlite":
+        engine = create_sqlite_engine(database_url)
+    else:
+        engine = create_engine(database_url)
     SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 
     # Create all tables
     Base.metadata.create_all(bind=engine)
 
 
+def create_sqlite_engine(database_url: str, pragmas: dict = SQLITE_PRAGMAS):
+    """
+    Create an engine for an embedded SQLite database.
+
+    Every new connection is tuned with the given pragmas (WAL journal,
+    relaxed synchronous mode, larger cache) and waits for a busy writer
+    instead of failing immediately.
+
+    Args:
+        database_url: SQLite database URL (e.g., sqlite:///mizu_sensor_hub.db)
+        pragmas: PRAGMA names and values applied to every connection
+
+    Returns:
+        SQLAlchemy engine
+    """
+    database_path = make_url(database_url).database
+    if database_path and database_path != ":memory:":
+        directory = os.path.dirname(database_path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+
+    sqlite_engine = create_engine(
+        database_url,
+        # Sessions are used from the transmission and committer threads
+        connect_args={"check_same_thread": False, "timeout": SQLITE_BUSY_TIMEOUT},
+    )
+
+    @event.listens_for(sqlite_engine, "connect")
+    def _apply_pragmas(dbapi_connection, connection_record) -> None:
+        cursor = dbapi_connection.cursor()
+        try:
+            for name, value in pragmas.items():
+                cursor.execute(f"PRAGMA {name}={value}")
+        finally:
+            cursor.close()
+
+    return sqlite_engine
+
+
 def get_db_session():
     """
     Get a database session.
@@ -75,3 +386,18 @@ def get_db_session():
     except Exception:
         db.close()
         raise
+
+
+def get_db_connection():
+    """
+    Get a Core database connection, bypassing the ORM session.
+
+    Used by the hot transmission queries, which work on plain rows.
+
+    Returns:
+        Database connection instance, to be used as a context manager
+    """
+    if engine is None:
+        raise RuntimeError("Database not initialized. Call init_database() first.")
+
+    return engine.connect()
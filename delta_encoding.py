@@ -0,0 +1,358 @@
+"""
+Per-device delta encoding for MIZU Ground Station.
+
+Consecutive readings of one device change very little, so instead of a
+full frame for every reading the encoder sends a keyframe with the
+absolute values every few readings and quantized differences in between.
+Every measurement is quantized to a configured precision (e.g. 0.1 °C)
+and timestamps to whole seconds.
+
+Frame formats (values are integer multiples of the field's precision):
+    #K<seq>,<device_id>,<unix time>,<v1>,...,<v7>~     keyframe
+    #D<seq>,<device_id>,<seconds since previous>,<d1>,...,<d7>~  delta
+
+<seq> is a per-device sequence number of three hex digits. Zero values
+are left empty and trailing empty fields are dropped, so a delta frame
+for a steady sensor is little more than its device ID.
+
+Delta frames only decode on top of the frame before them. The decoder
+keeps the recent states of every device and holds back deltas that
+arrive ahead of their predecessor, so retransmitted or reordered frames
+still decode; a delta whose predecessor is lost is dropped, and the
+device resynchronizes at its next keyframe. The encoder sends a keyframe
+after every KEYFRAME_INTERVAL frames of a device, and immediately after
+force_keyframe() is called because a frame did not reach the far end.
+
+Over an acknowledged link, a delta frame can be acknowledged while the
+frame it builds on is still being retransmitted, and is useless at the
+far end if that frame is given up. DeltaDeliveryTracker holds back such
+acknowledgements until the frame before is delivered, and reports them
+as undelivered when it is not.
+"""
+
+import logging
+from collections import OrderedDict
+from datetime import datetime, timedelta
+from typing import Dict, List, Optional, Set, Tuple
+
+from sensor_record import SENSOR_VALUE_FIELDS, SensorRecord, parse_frame
+
+logger = logging.getLogger(__name__)
+
+SEQUENCE_MODULUS = 0x1000
+
+# Start of the Unix time scale; timestamps are naive UTC like SensorData's
+_EPOCH = datetime(1970, 1, 1)
+
+
+def _decimals(precision: float) -> int:
+    """Get the number of decimal places of a precision such as 0.1."""
+    text = repr(precision)
+    return len(text.split(".")[1].rstrip("0")) if "." in text and "e" not in text else 0
+
+
+def _join_fields(fields: list) -> str:
+    """Join integer fields, leaving zeros empty and dropping trailing empty fields."""
+    parts = ["" if value == 0 else str(value) for value in fields]
+    while parts and not parts[-1]:
+        parts.pop()
+    return ",".join(parts)
+
+
+def _split_fields(text: str, count: int) -> List[int]:
+    """Split integer fields joined by _join_fields()."""
+    parts = text.split(",") if text else []
+    if len(parts) > count:
+        raise ValueError("Too many fields")
+    return [int(part) if part else 0 for part in parts] + [0] * (count - len(parts))
+
+
+class DeltaEncoder:
+    """Encodes frames as keyframes and quantized deltas, per device."""
+
+    def __init__(self, precision: Dict[str, float], keyframe_interval: int = 16) -> None:
+        """
+        Initialize the encoder.
+
+        Args:
+            precision: Quantization step of every field in SENSOR_VALUE_FIELDS
+            keyframe_interval: Frames of a device from one keyframe to the next
+        """
+        self.steps = [precision[field] for field in SENSOR_VALUE_FIELDS]
+        self.keyframe_interval = max(1, keyframe_interval)
+
+        # Per device: (next sequence number, frames since the keyframe, last quantized state)
+        self._devices: Dict[str, Tuple[int, int, Tuple[int, ...]]] = {}
+
+    def quantize(self, record: SensorRecord) -> Tuple[int, ...]:
+        """
+        Quantize a reading.
+
+        Returns:
+            Unix time in seconds followed by every measurement in units of its precision
+        """
+        seconds = int((record.timestamp - _EPOCH).total_seconds()) if record.timestamp else 0
+        values = (getattr(record, field) or 0.0 for field in SENSOR_VALUE_FIELDS)
+        return (seconds, *(round(value / step) for value, step in zip(values, self.steps)))
+
+    def encode(self, frame: str) -> str:
+        """
+        Encode a frame produced by format_frame().
+
+        Args:
+            frame: Full uplink frame
+
+        Returns:
+            Keyframe or delta frame
+        """
+        return self.encode_record(parse_frame(frame))
+
+    def encode_record(self, record: SensorRecord) -> str:
+        """
+        Encode a reading.
+
+        Args:
+            record: Reading to encode
+
+        Returns:
+            Keyframe or delta frame
+        """
+        state = self.quantize(record)
+        sequence, since_keyframe, previous = self._devices.get(record.device_id, (0, None, None))
+
+        if previous is None or since_keyframe >= self.keyframe_interval - 1:
+            frame = f"#K{sequence:03X},{record.device_id},{state[0]},{_join_fields(state[1:])}~"
+            since_keyframe = 0
+        else:
+            deltas = [current - last for current, last in zip(state, previous)]
+            frame = f"#D{sequence:03X},{record.device_id},{deltas[0]},{_join_fields(deltas[1:])}~"
+            since_keyframe += 1
+
+        self._devices[record.device_id] = ((sequence + 1) % SEQUENCE_MODULUS, since_keyframe, state)
+        return frame
+
+    def force_keyframe(self, device_id: Optional[str] = None) -> None:
+        """
+        Send a keyframe next, e.g. after a frame failed to reach the far end.
+
+        Args:
+            device_id: Device to resynchronize, or None for every device
+        """
+        devices = self._devices if device_id is None else [device_id]
+        for device in list(devices):
+            if device in self._devices:
+                sequence, _, _ = self._devices[device]
+                self._devices[device] = (sequence, None, None)
+
+
+class DeltaDeliveryTracker:
+    """Tracks which acknowledged delta frames the far end can actually decode."""
+
+    def __init__(self) -> None:
+        # Record ID of the last frame sent for every device
+        self._last_frames: Dict[str, int] = {}
+        # Undelivered frames, with the undelivered frame they build on (or None)
+        self._predecessors: Dict[int, Optional[int]] = {}
+        self._dependents: Dict[int, List[int]] = {}
+        # Acknowledged frames waiting for their predecessor to be delivered
+        self._held: Set[int] = set()
+        # Frames still in flight whose predecessor was given up
+        self._abandoned: Set[int] = set()
+
+    def __contains__(self, record_id: int) -> bool:
+        """Check whether a record's delivery is still undecided."""
+        return record_id in self._predecessors or record_id in self._abandoned
+
+    def sent(self, record_id: int, frame: str) -> None:
+        """
+        Register a frame put on the link, in send order.
+
+        Args:
+            record_id: Database ID of the reading in the frame
+            frame: Keyframe or delta frame as produced by DeltaEncoder; other frames are ignored
+        """
+        if not frame.startswith(("#K", "#D")):
+            return
+
+        device_id = frame[2:-1].split(",", 2)[1]
+        predecessor = self._last_frames.get(device_id) if frame[1] == "D" else None
+        self._last_frames[device_id] = record_id
+        if predecessor in self._abandoned:
+            self._abandoned.add(record_id)
+            return
+        if predecessor not in self._predecessors:
+            predecessor = None
+        self._predecessors[record_id] = predecessor
+        if predecessor is not None:
+            self._dependents.setdefault(predecessor, []).append(record_id)
+
+    def delivered(self, record_id: int) -> List[int]:
+        """
+        Handle the acknowledgement of a frame.
+
+        Args:
+            record_id: Database ID of the acknowledged reading
+
+        Returns:
+            Record IDs now delivered, in dependency order: none while the
+            frame waits for its predecessor or when that was given up,
+            several when the frame completes held-back acknowledgements
+        """
+        if record_id in self._abandoned:
+            self._abandoned.discard(record_id)
+            return []
+        if record_id not in self._predecessors:
+            return [record_id]
+        if self._predecessors[record_id] is not None:
+            self._held.add(record_id)
+            return []
+
+        delivered = []
+        ready = [record_id]
+        while ready:
+            delivered_id = ready.pop(0)
+            del self._predecessors[delivered_id]
+            self._held.discard(delivered_id)
+            delivered.append(delivered_id)
+            for dependent_id in self._dependents.pop(delivered_id, []):
+                if dependent_id in self._predecessors:
+                    self._predecessors[dependent_id] = None
+                    if dependent_id in self._held:
+                        ready.append(dependent_id)
+        return delivered
+
+    def failed(self, record_id: int) -> List[int]:
+        """
+        Handle a frame that was given up, and every frame building on it.
+
+        Args:
+            record_id: Database ID of the undelivered reading
+
+        Returns:
+            Record IDs that were acknowledged but can no longer be decoded;
+            like the failed frame they have to be sent again
+        """
+        if record_id in self._abandoned:
+            self._abandoned.discard(record_id)
+            return []
+        if record_id not in self._predecessors:
+            return []
+
+        undelivered = []
+        lost = [record_id]
+        while lost:
+            lost_id = lost.pop()
+            del self._predecessors[lost_id]
+            if lost_id in self._held:
+                self._held.discard(lost_id)
+                undelivered.append(lost_id)
+            elif lost_id != record_id:
+                self._abandoned.add(lost_id)
+            lost.extend(dependent_id for dependent_id in self._dependents.pop(lost_id, [])
+                        if dependent_id in self._predecessors)
+        return sorted(undelivered)
+
+    def reset(self) -> None:
+        """Forget all frames, e.g. after the connection was closed."""
+        self._last_frames.clear()
+        self._predecessors.clear()
+        self._dependents.clear()
+        self._held.clear()
+        self._abandoned.clear()
+
+
+class DeltaDecoder:
+    """Decodes keyframes and delta frames back into readings."""
+
+    def __init__(self, precision: Dict[str, float], history_size: int = 64, pending_limit: int = 32) -> None:
+        """
+        Initialize the decoder.
+
+        Args:
+            precision: Quantization step of every field, as configured on the encoder
+            history_size: Decoded states kept per device for late deltas
+            pending_limit: Deltas per device held back while their predecessor is missing
+        """
+        self.steps = [precision[field] for field in SENSOR_VALUE_FIELDS]
+        self.decimals = [_decimals(step) for step in self.steps]
+        self.history_size = history_size
+        self.pending_limit = pending_limit
+
+        # Number of delta frames dropped because their predecessor never arrived
+        self.lost = 0
+
+        self._history: Dict[str, "OrderedDict[int, Tuple[int, ...]]"] = {}
+        self._pending: Dict[str, "OrderedDict[int, Tuple[int, ...]]"] = {}
+
+    def decode(self, frame: str) -> List[SensorRecord]:
+        """
+        Decode one received frame.
+
+        Args:
+            frame: Keyframe or delta frame
+
+        Returns:
+            Readings decoded thanks to this frame, oldest first: none while
+            a delta waits for its predecessor or for a duplicate, several
+            when the frame completes held-back deltas
+
+        Raises:
+            ValueError: When the frame is malformed
+        """
+        if not (frame.startswith(("#K", "#D")) and frame.endswith("~")):
+            raise ValueError("Not a delta-encoded frame")
+
+        header, device_id, fields = (frame[2:-1].split(",", 2) + [""])[:3]
+        sequence = int(header, 16)
+        values = tuple(_split_fields(fields, len(self.steps) + 1))
+        history = self._history.setdefault(device_id, OrderedDict())
+        pending = self._pending.setdefault(device_id, OrderedDict())
+
+        if frame[1] == "K":
+            if history.get(sequence) == values:
+                return []
+            if sequence in history:
+                # Same sequence number, different reading: the encoder restarted
+                history.clear()
+                self.lost += len(pending)
+                pending.clear()
+            # Held-back deltas older than the keyframe can no longer be decoded
+            for stale in [held for held in pending if (sequence - held) % SEQUENCE_MODULUS < SEQUENCE_MODULUS // 2]:
+                del pending[stale]
+                self.lost += 1
+            decoded = [self._store(device_id, sequence, values)]
+        else:
+            previous = history.get((sequence - 1) % SEQUENCE_MODULUS)
+            if sequence in history:
+                return []
+            if previous is None:
+                pending[sequence] = values
+                if len(pending) > self.pending_limit:
+                    pending.popitem(last=False)
+                    self.lost += 1
+                return []
+            decoded = [self._store(device_id, sequence, self._apply(previous, values))]
+
+        # Decode held-back deltas that follow on from this frame
+        sequence = (sequence + 1) % SEQUENCE_MODULUS
+        while sequence in pending:
+            decoded.append(self._store(device_id, sequence, self._apply(history[(sequence - 1) % SEQUENCE_MODULUS],
+                                                                        pending.pop(sequence))))
+            sequence = (sequence + 1) % SEQUENCE_MODULUS
+        return decoded
+
+    @staticmethod
+    def _apply(state: Tuple[int, ...], deltas: Tuple[int, ...]) -> Tuple[int, ...]:
+        """Add deltas to a quantized state."""
+        return tuple(value + delta for value, delta in zip(state, deltas))
+
+    def _store(self, device_id: str, sequence: int, state: Tuple[int, ...]) -> SensorRecord:
+        """Remember a decoded state and convert it into a reading."""
+        history = self._history[device_id]
+        history[sequence] = state
+        if len(history) > self.history_size:
+            history.popitem(last=False)
+
+        values = [round(quantized * step, decimals)
+                  for quantized, step, decimals in zip(state[1:], self.steps, self.decimals)]
+        return SensorRecord(None, device_id, *values, 0, _EPOCH + timedelta(seconds=state[0]))
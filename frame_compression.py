@@ -0,0 +1,242 @@
+"""
+Uplink compression for MIZU Ground Station.
+
+Consecutive frames are joined into one batch and compressed with raw
+DEFLATE (zlib) against a pre-shared dictionary trained from historical
+mizu_sensor_hub data. The far end must hold the same dictionary; it is
+identified by a 16-bit ID carried in the frame header, so dictionaries
+can be retrained and rolled out without ambiguity.
+
+Wire format:
+    $<dictionary id: 4 hex digits><frame count: 2 hex digits>:<base64 payload>~
+
+The payload is the concatenation of the batch's frames ("#...~#...~"),
+compressed without zlib header or checksum. Base64 keeps the frame
+printable and free of the "#", "~", "@", ":" and "*" delimiters.
+"""
+
+import base64
+import os
+import re
+import zlib
+from collections import Counter
+from typing import Dict, Iterable, List, Optional, Tuple
+
+COMPRESSED_FRAME_PREFIX = "$"
+COMPRESSED_FRAME_PATTERN = re.compile(r"^\$([0-9A-F]{4})([0-9A-F]{2}):([A-Za-z0-9+/=]*)~$")
+
+# Largest dictionary DEFLATE can reference
+MAX_DICTIONARY_SIZE = 32 * 1024
+MAX_DICTIONARY_ID = 0xFFFF
+MAX_BATCH_FRAMES = 0xFF
+
+DICTIONARY_PREFIX = "mizu-"
+DICTIONARY_SUFFIX = ".zdict"
+
+# Raw DEFLATE stream: no zlib header or Adler-32 trailer on the wire
+_WBITS = -15
+
+
+class FrameCompressor:
+    """Compresses batches of frames against one pre-shared dictionary."""
+
+    def __init__(self, dictionary: bytes, dictionary_id: int, level: int = 9) -> None:
+        """
+        Initialize the compressor.
+
+        Args:
+            dictionary: Pre-shared dictionary, at most MAX_DICTIONARY_SIZE bytes
+            dictionary_id: ID of the dictionary sent in the frame header
+            level: zlib compression level (1-9)
+
+        Raises:
+            ValueError: When the dictionary or its ID is out of range
+        """
+        if len(dictionary) > MAX_DICTIONARY_SIZE:
+            raise ValueError(f"Dictionary larger than {MAX_DICTIONARY_SIZE} bytes")
+        if not 0 <= dictionary_id <= MAX_DICTIONARY_ID:
+            raise ValueError(f"Dictionary ID must be between 0 and {MAX_DICTIONARY_ID}")
+
+        self.dictionary = dictionary
+        self.dictionary_id = dictionary_id
+        self.level = level
+
+    def compress(self, frames: List[str]) -> str:
+        """
+        Compress a batch of frames into one wire frame.
+
+        Args:
+            frames: Formatted frames, at most MAX_BATCH_FRAMES
+
+        Returns:
+            Compressed frame in the wire format above
+
+        Raises:
+            ValueError: When the batch is empty or too large
+        """
+        if not 0 < len(frames) <= MAX_BATCH_FRAMES:
+            raise ValueError(f"A compressed batch holds 1 to {MAX_BATCH_FRAMES} frames")
+
+        compressor = zlib.compressobj(self.level, zlib.DEFLATED, _WBITS, zdict=self.dictionary)
+        payload = compressor.compress("".join(frames).encode()) + compressor.flush()
+        encoded = base64.b64encode(payload).decode("ascii")
+        return f"{COMPRESSED_FRAME_PREFIX}{self.dictionary_id:04X}{len(frames):02X}:{encoded}~"
+
+
+def decompress_frame(wire_frame: str, dictionaries: Dict[int, bytes]) -> List[str]:
+    """
+    Restore the frames of a compressed batch.
+
+    Args:
+        wire_frame: Compressed frame in the wire format above
+        dictionaries: Known dictionaries by ID
+
+    Returns:
+        The original frames, in order
+
+    Raises:
+        ValueError: When the frame is malformed, its dictionary is unknown
+            or the frame count does not match
+    """
+    match = COMPRESSED_FRAME_PATTERN.match(wire_frame.strip())
+    if not match:
+        raise ValueError("Not a compressed frame")
+
+    dictionary_id = int(match.group(1), 16)
+    if dictionary_id not in dictionaries:
+        raise ValueError(f"Unknown dictionary {dictionary_id:04X}")
+
+    decompressor = zlib.decompressobj(_WBITS, zdict=dictionaries[dictionary_id])
+    try:
+        text = (decompressor.decompress(base64.b64decode(match.group(3))) + decompressor.flush()).decode()
+    except (zlib.error, UnicodeDecodeError, ValueError) as e:
+        raise ValueError(f"Corrupt compressed frame: {e}") from e
+
+    frames = [frame + "~" for frame in text.split("~")[:-1]]
+    if len(frames) != int(match.group(2), 16):
+        raise ValueError("Frame count mismatch")
+    return frames
+
+
+def train_dictionary(frames: Iterable[str], size: int = MAX_DICTIONARY_SIZE) -> bytes:
+    """
+    Build a DEFLATE dictionary from sample frames.
+
+    Frames are split into their "key=value" fields; the fields that
+    would save the most bytes (occurrences times length) fill the
+    dictionary, with the most valuable ones last, closest to the data.
+    A few complete sample frames at the very end cover the field order
+    and delimiters.
+
+    Args:
+        frames: Sample frames, e.g. recent rows of mizu_sensor_hub
+        size: Maximum dictionary size in bytes
+
+    Returns:
+        Dictionary bytes, at most size bytes long
+    """
+    size = min(size, MAX_DICTIONARY_SIZE)
+    samples = list(frames)
+
+    field_counts = Counter()
+    for frame in samples:
+        for field in frame.strip("#~").split(","):
+            key, _, value = field.partition("=")
+            field_counts[f"{key}="] += 1
+            if key == "timestamp":
+                # Keep the date and hour, which repeat within a batch
+                field_counts[f"timestamp={value[:14]}"] += 1
+            else:
+                field_counts[f"{field},"] += 1
+
+    tail = "".join(samples[-4:]).encode()[-size // 4:]
+    budget = size - len(tail)
+
+    chosen = []
+    for field, count in sorted(field_counts.items(), key=lambda item: item[1] * len(item[0]), reverse=True):
+        if count < 2:
+            break
+        encoded = field.encode()
+        if len(encoded) > budget:
+            continue
+        chosen.append(encoded)
+        budget -= len(encoded)
+
+    return b"".join(reversed(chosen)) + tail
+
+
+def dictionary_path(directory: str, dictionary_id: int) -> str:
+    """Get the path of a stored dictionary."""
+    return os.path.join(directory, f"{DICTIONARY_PREFIX}{dictionary_id:04x}{DICTIONARY_SUFFIX}")
+
+
+def stored_dictionary_ids(directory: str) -> List[int]:
+    """
+    List the IDs of the dictionaries stored in a directory.
+
+    Returns:
+        Sorted dictionary IDs, empty if the directory does not exist
+    """
+    if not os.path.isdir(directory):
+        return []
+
+    ids = []
+    for name in os.listdir(directory):
+        if name.startswith(DICTIONARY_PREFIX) and name.endswith(DICTIONARY_SUFFIX):
+            try:
+                ids.append(int(name[len(DICTIONARY_PREFIX):-len(DICTIONARY_SUFFIX)], 16))
+            except ValueError:
+                continue
+    return sorted(ids)
+
+
+def save_dictionary(directory: str, dictionary: bytes) -> int:
+    """
+    Store a dictionary under the next free ID.
+
+    Stored dictionaries are never overwritten, since receivers may still
+    decode frames compressed with them.
+
+    Args:
+        directory: Directory holding the dictionaries
+        dictionary: Dictionary bytes
+
+    Returns:
+        ID of the stored dictionary
+
+    Raises:
+        ValueError: When every dictionary ID is taken
+    """
+    existing = stored_dictionary_ids(directory)
+    dictionary_id = existing[-1] + 1 if existing else 1
+    if dictionary_id > MAX_DICTIONARY_ID:
+        raise ValueError("No dictionary IDs left")
+
+    os.makedirs(directory, exist_ok=True)
+    with open(dictionary_path(directory, dictionary_id), "xb") as dictionary_file:
+        dictionary_file.write(dictionary)
+    return dictionary_id
+
+
+def load_dictionary(directory: str, dictionary_id: Optional[int] = None) -> Tuple[int, bytes]:
+    """
+    Load a stored dictionary.
+
+    Args:
+        directory: Directory holding the dictionaries
+        dictionary_id: ID to load, or None for the newest dictionary
+
+    Returns:
+        Tuple of (dictionary ID, dictionary bytes)
+
+    Raises:
+        FileNotFoundError: When no matching dictionary is stored
+    """
+    if dictionary_id is None:
+        existing = stored_dictionary_ids(directory)
+        if not existing:
+            raise FileNotFoundError(f"No dictionaries in {directory}")
+        dictionary_id = existing[-1]
+
+    with open(dictionary_path(directory, dictionary_id), "rb") as dictionary_file:
+        return dictionary_id, dictionary_file.read()
@@ -0,0 +1,333 @@
+"""
+Local ingest endpoint for MIZU Ground Station.
+
+Collectors POST readings to http://<host>:<port>/readings, either as JSON
+lines (one object of mizu_sensor_hub column values per line, timestamp
+included) or as frames in the uplink format
+(#device_id=...,timestamp=...,...~). Requests are queued for a single
+writer thread, which coalesces the readings of
+concurrent requests into batched DatabaseManager.ingest_readings() calls
+and answers each request once its readings are committed. When the queue
+is full, requests are refused with 503 and a Retry-After header, so a
+burst of collectors cannot grow memory without bound.
+
+Readings already stored for the same device and timestamp are skipped,
+so a collector can safely resend a request that failed or timed out.
+Readings the database would refuse are rejected with 400 when parsed, and
+a batch that still fails is retried request by request, so one bad
+request cannot fail the requests coalesced with it.
+"""
+
+import json
+import logging
+import queue
+import threading
+import time
+from datetime import datetime, timezone
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Callable, List, Optional
+
+from database_models import SensorData
+from metrics import INGEST_DUPLICATES, INGEST_READINGS, INGEST_REJECTED
+from sensor_record import FRAME_VALUE_KEYS, SENSOR_VALUE_FIELDS, parse_frame
+from tracing import TRACER
+
+logger = logging.getLogger(__name__)
+
+INGEST_PATH = "/readings"
+
+# Content types of JSON lines bodies; anything else is read as frames
+JSON_CONTENT_TYPES = ("application/x-ndjson", "application/jsonl", "application/json")
+
+# Seconds a refused collector is asked to wait before retrying
+RETRY_AFTER_SECONDS = 1
+
+# Columns a JSON reading may set, and the frame keys accepted in their place
+_JSON_FIELDS = ("device_id",) + SENSOR_VALUE_FIELDS + ("priority", "timestamp")
+_FRAME_KEY_FIELDS = dict(zip(FRAME_VALUE_KEYS, SENSOR_VALUE_FIELDS))
+
+# Limits of the mizu_sensor_hub columns, checked before a reading is queued
+_DEVICE_ID_LENGTH = SensorData.__table__.c.device_id.type.length
+_PRIORITY_RANGE = range(-2 ** 31, 2 ** 31)
+
+
+def parse_readings(body: str, content_type: str) -> List[dict]:
+    """
+    Parse a request body into readings for DatabaseManager.ingest_readings().
+
+    Args:
+        body: Request body, JSON lines or uplink frames
+        content_type: Content-Type of the request, without parameters
+
+    Returns:
+        Reading dictionaries in body order
+
+    Raises:
+        ValueError: When a line or frame is malformed; the message names it
+    """
+    if content_type in JSON_CONTENT_TYPES:
+        return [_parse_json_reading(line, number)
+                for number, line in enumerate(body.splitlines(), 1) if line.strip()]
+
+    readings = []
+    for number, frame in enumerate(body.replace("\n", "").replace("\r", "").split("~")[:-1], 1):
+        try:
+            record = parse_frame(frame.strip() + "~")
+            reading = {field: getattr(record, field) for field in _JSON_FIELDS}
+            reading["timestamp"] = _naive_utc(reading["timestamp"])
+            _check_columns(reading)
+        except ValueError as e:
+            raise ValueError(f"frame {number}: {e}") from e
+        readings.append(reading)
+    if body.strip() and not body.rstrip().endswith("~"):
+        raise ValueError("frames must end with ~")
+    return readings
+
+
+def _parse_json_reading(line: str, number: int) -> dict:
+    """Parse one JSON line into a reading, accepting frame keys for the measurements."""
+    try:
+        values = json.loads(line)
+        if not isinstance(values, dict):
+            raise ValueError("not an object")
+        reading = {_FRAME_KEY_FIELDS.get(key, key): value for key, value in values.items()}
+        unknown = set(reading) - set(_JSON_FIELDS)
+        if unknown:
+            raise ValueError(f"unknown fields {', '.join(sorted(unknown))}")
+        if not isinstance(reading.get("device_id"), str) or not reading["device_id"]:
+            raise ValueError("device_id is required")
+        for field in SENSOR_VALUE_FIELDS:
+            if reading.get(field) is not None:
+                reading[field] = float(reading[field])
+        # The timestamp identifies the reading when a collector resends it
+        if not isinstance(reading.get("timestamp"), str):
+            raise ValueError("timestamp is required")
+        reading["timestamp"] = _naive_utc(datetime.fromisoformat(reading["timestamp"]))
+        _check_columns(reading)
+        return reading
+    except (TypeError, ValueError) as e:
+        raise ValueError(f"line {number}: {e}") from e
+
+
+def _naive_utc(timestamp: datetime) -> datetime:
+    """Convert a timestamp with a UTC offset to naive UTC, as stored; naive ones are kept."""
+    if timestamp is None or timestamp.tzinfo is None:
+        return timestamp
+    return timestamp.astimezone(timezone.utc).replace(tzinfo=None)
+
+
+def _check_columns(reading: dict) -> None:
+    """Raise ValueError for a reading the mizu_sensor_hub columns would refuse."""
+    if len(reading["device_id"]) > _DEVICE_ID_LENGTH:
+        raise ValueError(f"device_id longer than {_DEVICE_ID_LENGTH} characters")
+    priority = reading.get("priority")
+    if priority is not None and (type(priority) is not int or priority not in _PRIORITY_RANGE):
+        raise ValueError("priority must be a 32-bit integer")
+
+
+class _PendingWrite:
+    """Readings of one request, waiting for the writer thread."""
+
+    __slots__ = ("readings", "done", "committed")
+
+    def __init__(self, readings: List[dict]) -> None:
+        self.readings = readings
+        self.done = threading.Event()
+        self.committed = False
+
+
+class _IngestRequestHandler(BaseHTTPRequestHandler):
+    """Queues POST /readings bodies for the ingest server's writer."""
+
+    ingest_server: "IngestServer" = None
+
+    def do_POST(self) -> None:
+        if self.path.split("?", 1)[0] != INGEST_PATH:
+            self.send_error(404)
+            return
+
+        server = self.ingest_server
+        length = int(self.headers.get("Content-Length") or 0)
+        if length > server.max_body_bytes:
+            self.send_error(413, f"Body larger than {server.max_body_bytes} bytes")
+            return
+
+        try:
+            body = self.rfile.read(length).decode("utf-8")
+            content_type = (self.headers.get("Content-Type") or "").split(";", 1)[0].strip().lower()
+            readings = parse_readings(body, content_type)
+        except (UnicodeDecodeError, ValueError) as e:
+            self.send_error(400, f"Malformed readings: {e}")
+            return
+
+        if readings:
+            pending = _PendingWrite(readings)
+            try:
+                server._queue.put(pending, timeout=server.enqueue_timeout)
+            except queue.Full:
+                INGEST_REJECTED.inc()
+                self._send_retry_later("Ingest queue full")
+                return
+            if not pending.done.wait(server.write_timeout) or not pending.committed:
+                self._send_retry_later("Readings not stored")
+                return
+
+        self._send_json(200, {"accepted": len(readings)})
+
+    def _send_retry_later(self, message: str) -> None:
+        """Refuse the request; resending it is safe, duplicates are skipped."""
+        self.send_response(503, message)
+        self.send_header("Retry-After", str(RETRY_AFTER_SECONDS))
+        self.send_header("Content-Length", "0")
+        self.end_headers()
+
+    def _send_json(self, status: int, payload: dict) -> None:
+        body = json.dumps(payload).encode()
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args) -> None:
+        """Keep requests out of the console."""
+
+
+class IngestServer:
+    """Local HTTP endpoint writing POSTed readings to the database in batches."""
+
+    def __init__(self, database_manager, host: str, port: int, batch_size: int = 500,
+                 flush_interval: float = 0.05, queue_size: int = 64, max_body_bytes: int = 1024 * 1024,
+                 enqueue_timeout: float = 1.0, write_timeout: float = 10.0,
+                 on_ingested: Optional[Callable[[int], None]] = None) -> None:
+        """
+        Initialize the ingest server.
+
+        Args:
+            database_manager: DatabaseManager the readings are inserted through
+            host: Interface to listen on
+            port: TCP port to listen on
+            batch_size: Readings after which a batch is written without waiting
+            flush_interval: Seconds a batch waits for the readings of further requests
+            queue_size: Requests waiting for the writer before new ones are refused
+            max_body_bytes: Largest request body accepted
+            enqueue_timeout: Seconds a request waits for room in the queue
+            write_timeout: Seconds a request waits for its readings to be committed
+            on_ingested: Called from the writer thread with the number of
+                readings inserted by each batch that inserted any
+        """
+        self.database_manager = database_manager
+        self.host = host
+        self.port = port
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.max_body_bytes = max_body_bytes
+        self.enqueue_timeout = enqueue_timeout
+        self.write_timeout = write_timeout
+        self.on_ingested = on_ingested
+        self._queue: "queue.Queue[_PendingWrite]" = queue.Queue(maxsize=queue_size)
+        self._server: Optional[ThreadingHTTPServer] = None
+        self._thread: Optional[threading.Thread] = None
+        self._writer_thread: Optional[threading.Thread] = None
+        self._should_write = False
+
+    def start(self) -> bool:
+        """
+        Start serving and writing in background threads.
+
+        Returns:
+            True if the server is listening, False otherwise
+        """
+        handler = type("IngestRequestHandler", (_IngestRequestHandler,), {"ingest_server": self})
+        try:
+            self._server = ThreadingHTTPServer((self.host, self.port), handler)
+        except OSError as e:
+            logger.error("Failed to start ingest endpoint on %s:%s: %s", self.host, self.port, e)
+            return False
+
+        self._should_write = True
+        self._writer_thread = threading.Thread(target=self._write_loop, daemon=True)
+        self._writer_thread.start()
+
+        self._server.daemon_threads = True
+        self._thread = threading.Thread(target=self._server.serve_forever, daemon=True)
+        self._thread.start()
+        host, port = self._server.server_address[:2]
+        logger.info("Accepting readings at http://%s:%s%s", host, port, INGEST_PATH)
+        return True
+
+    def stop(self, timeout: float = 5.0) -> None:
+        """
+        Stop accepting requests, write the queued readings and release the port.
+
+        Args:
+            timeout: Seconds to wait for the writer thread to finish
+        """
+        if self._server is not None:
+            self._server.shutdown()
+            self._server.server_close()
+            self._server = None
+        self._should_write = False
+        if self._writer_thread is not None:
+            self._writer_thread.join(timeout)
+            self._writer_thread = None
+
+    def _write_loop(self) -> None:
+        """Write queued readings in batches until stopped and the queue is drained."""
+        while self._should_write or not self._queue.empty():
+            try:
+                batch = [self._queue.get(timeout=0.5)]
+            except queue.Empty:
+                continue
+
+            # Coalesce the requests that arrive within the flush interval
+            reading_count = len(batch[0].readings)
+            deadline = time.monotonic() + self.flush_interval
+            while reading_count < self.batch_size:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                try:
+                    pending = self._queue.get(timeout=remaining)
+                except queue.Empty:
+                    break
+                batch.append(pending)
+                reading_count += len(pending.readings)
+
+            self._write_batch(batch)
+
+    def _write_batch(self, batch: List[_PendingWrite]) -> None:
+        """
+        Insert the readings of a batch of requests and answer each request.
+
+        When the combined insert fails, each request is inserted on its
+        own, so only the requests that fail by themselves are refused.
+        """
+        readings = [reading for pending in batch for reading in pending.readings]
+        try:
+            with TRACER.span("db.ingest", {"rows": len(readings), "requests": len(batch)}):
+                outcome = self.database_manager.ingest_readings(readings)
+        except Exception as e:
+            logger.error("Error ingesting readings: %s", e)
+            outcome = None
+
+        if outcome is None and len(batch) > 1:
+            logger.warning("Batch of %d requests failed; inserting them one by one", len(batch))
+            for pending in batch:
+                self._write_batch([pending])
+            return
+
+        for pending in batch:
+            pending.committed = outcome is not None
+            pending.done.set()
+        if outcome is None:
+            return
+
+        inserted, duplicates = outcome
+        INGEST_READINGS.inc(inserted)
+        INGEST_DUPLICATES.inc(duplicates)
+        if inserted and self.on_ingested is not None:
+            try:
+                self.on_ingested(inserted)
+            except Exception as e:
+                logger.error("Error in ingest callback: %s", e)
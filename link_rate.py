@@ -0,0 +1,241 @@
+"""
+Adaptive link-rate control for MIZU Ground Station.
+
+This module paces outgoing characters according to observed link
+conditions. An AIMD (additive increase, multiplicative decrease)
+controller raises the send rate while writes succeed and the far end
+keeps up, and backs off on write timeouts, NAKs, acknowledgement
+timeouts or a stalled output buffer. It also keeps the round-trip time
+and error statistics of the link.
+"""
+
+import threading
+import time
+from typing import Dict, Optional
+
+# RFC 6298 smoothing factors for the round-trip time estimate
+RTT_ALPHA = 0.125
+RTT_BETA = 0.25
+
+# Lower bound for the acknowledgement timeout derived from the round-trip time
+MIN_RETRANSMISSION_TIMEOUT = 0.5
+
+
+class AdaptiveRateController:
+    """
+    AIMD pacing controller for the serial uplink.
+
+    The rate is expressed in characters per second and converted to the
+    delay SerialManager.send_command() sleeps after every character.
+    When adaptation is disabled the rate stays at its initial value, but
+    statistics are still collected.
+    """
+
+    def __init__(self, initial_rate: float, min_rate: float, increase_step: float,
+                 decrease_factor: float, adaptive: bool = True,
+                 increase_on_ack: bool = False, stall_factor: float = 4.0) -> None:
+        """
+        Initialize the rate controller.
+
+        Args:
+            initial_rate: Starting send rate in characters per second
+            min_rate: Lowest send rate in characters per second
+            increase_step: Characters per second added after each good frame
+            decrease_factor: Factor the rate is multiplied by on congestion (0-1)
+            adaptive: Whether to adjust the rate at all
+            increase_on_ack: Only raise the rate when the far end acknowledges a frame
+            stall_factor: A character write slower than this many character times
+                counts as a full output buffer
+        """
+        self.initial_rate = initial_rate
+        self.min_rate = min_rate
+        self.increase_step = increase_step
+        self.decrease_factor = decrease_factor
+        self.adaptive = adaptive
+        self.increase_on_ack = increase_on_ack
+        self.stall_factor = stall_factor
+
+        self._lock = threading.Lock()
+        self._max_rate = float("inf")
+        self._rate = initial_rate
+        self._last_decrease = 0.0
+        self._smoothed_rtt: Optional[float] = None
+        self._rtt_variance: Optional[float] = None
+        self._throughput = 0.0
+        self._counters = {
+            "frames_sent": 0,
+            "bytes_sent": 0,
+            "acks": 0,
+            "nacks": 0,
+            "ack_timeouts": 0,
+            "write_timeouts": 0,
+            "buffer_full": 0,
+        }
+
+    def reset(self, baud_rate: int) -> None:
+        """
+        Restart pacing for a new connection.
+
+        Args:
+            baud_rate: Baud rate of the connection, which caps the send rate
+        """
+        with self._lock:
+            # 8N1 framing: ten bits on the wire per character
+            self._max_rate = baud_rate / 10.0
+            self._rate = min(self.initial_rate, self._max_rate)
+            self._last_decrease = 0.0
+            self._smoothed_rtt = None
+            self._rtt_variance = None
+            self._throughput = 0.0
+
+    @property
+    def rate(self) -> float:
+        """Current send rate in characters per second."""
+        with self._lock:
+            return self._rate
+
+    @property
+    def char_delay(self) -> float:
+        """Delay after each character that yields the current send rate."""
+        with self._lock:
+            character_time = 1.0 / self._max_rate if self._max_rate != float("inf") else 0.0
+            return max(0.0, 1.0 / self._rate - character_time)
+
+    @property
+    def stall_threshold(self) -> float:
+        """Seconds a single character write may take before the buffer counts as full."""
+        with self._lock:
+            if self._max_rate == float("inf"):
+                return float("inf")
+            return self.stall_factor / self._max_rate
+
+    def retransmission_timeout(self, default: float) -> float:
+        """
+        Get the acknowledgement timeout for the current round-trip time.
+
+        Args:
+            default: Timeout to use until a round-trip time has been measured
+
+        Returns:
+            Timeout in seconds (smoothed RTT + 4 * RTT variance)
+        """
+        with self._lock:
+            if self._smoothed_rtt is None:
+                return default
+            return max(MIN_RETRANSMISSION_TIMEOUT, self._smoothed_rtt + 4 * self._rtt_variance)
+
+    def on_write_success(self, byte_count: int, elapsed: float) -> None:
+        """
+        Record a frame that was written without errors.
+
+        Args:
+            byte_count: Number of bytes written
+            elapsed: Seconds the write took
+        """
+        with self._lock:
+            self._counters["frames_sent"] += 1
+            self._counters["bytes_sent"] += byte_count
+            if elapsed > 0:
+                sample = byte_count / elapsed
+                self._throughput = sample if not self._throughput else (
+                    0.8 * self._throughput + 0.2 * sample
+                )
+            if not self.increase_on_ack:
+                self._increase()
+
+    def on_ack(self, round_trip_time: Optional[float]) -> None:
+        """
+        Record a frame acknowledged by the far end.
+
+        Args:
+            round_trip_time: Seconds from end of write to acknowledgement,
+                or None for retransmitted frames (Karn's algorithm)
+        """
+        with self._lock:
+            self._counters["acks"] += 1
+            if round_trip_time is not None:
+                self._update_rtt(round_trip_time)
+            if self.increase_on_ack:
+                self._increase()
+
+    def on_nack(self) -> None:
+        """Record a frame the far end received corrupted."""
+        with self._lock:
+            self._counters["nacks"] += 1
+            self._decrease()
+
+    def on_ack_timeout(self) -> None:
+        """Record a frame that was not acknowledged in time."""
+        with self._lock:
+            self._counters["ack_timeouts"] += 1
+            self._decrease()
+
+    def on_write_timeout(self) -> None:
+        """Record a write that timed out."""
+        with self._lock:
+            self._counters["write_timeouts"] += 1
+            self._decrease()
+
+    def on_buffer_full(self, byte_count: int) -> None:
+        """
+        Record a frame written while the output buffer was stalling.
+
+        Args:
+            byte_count: Number of bytes written
+        """
+        with self._lock:
+            self._counters["frames_sent"] += 1
+            self._counters["bytes_sent"] += byte_count
+            self._counters["buffer_full"] += 1
+            self._decrease()
+
+    def snapshot(self) -> Dict[str, Optional[float]]:
+        """
+        Get the current rate, round-trip time and error statistics.
+
+        Returns:
+            Dictionary of link statistics; the round-trip time entries
+            are None until a round trip has been measured
+        """
+        with self._lock:
+            snapshot: Dict[str, Optional[float]] = dict(self._counters)
+            snapshot.update({
+                "rate": self._rate,
+                "max_rate": self._max_rate,
+                "throughput": self._throughput,
+                "rtt": self._smoothed_rtt,
+                "rtt_variance": self._rtt_variance,
+            })
+            return snapshot
+
+    def _increase(self) -> None:
+        """Additively raise the rate. Caller holds the lock."""
+        if self.adaptive:
+            self._rate = min(self._max_rate, self._rate + self.increase_step)
+
+    def _decrease(self) -> None:
+        """
+        Multiplicatively lower the rate. Caller holds the lock.
+
+        Several errors caused by one congestion event (e.g. the NAKs for a
+        whole window) only back off once per round trip.
+        """
+        if not self.adaptive:
+            return
+
+        now = time.monotonic()
+        holdoff = self._smoothed_rtt if self._smoothed_rtt is not None else 1.0
+        if now - self._last_decrease < holdoff:
+            return
+
+        self._last_decrease = now
+        self._rate = max(self.min_rate, self._rate * self.decrease_factor)
+
+    def _update_rtt(self, sample: float) -> None:
+        """Fold a round-trip time sample into the estimate. Caller holds the lock."""
+        if self._smoothed_rtt is None:
+            self._smoothed_rtt = sample
+            self._rtt_variance = sample / 2
+        else:
+            self._rtt_variance = (1 - RTT_BETA) * self._rtt_variance + RTT_BETA * abs(self._smoothed_rtt - sample)
+            self._smoothed_rtt = (1 - RTT_ALPHA) * self._smoothed_rtt + RTT_ALPHA * sample
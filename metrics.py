@@ -0,0 +1,313 @@
+"""
+Metrics for MIZU Ground Station.
+
+This module provides lightweight counters, gauges and histograms for the
+transmission pipeline and exposes them in the Prometheus text format over
+a local HTTP /metrics endpoint. Recording a value costs a lock and an
+addition, so instruments can sit on the hot path.
+"""
+
+import bisect
+import logging
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Dict, List, Optional, Sequence, Tuple
+
+# Default latency buckets in seconds
+LATENCY_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+logger = logging.getLogger(__name__)
+
+
+class Counter:
+    """A monotonically increasing value."""
+
+    metric_type = "counter"
+
+    def __init__(self, name: str, description: str) -> None:
+        self.name = name
+        self.description = description
+        self._value = 0.0
+        self._lock = threading.Lock()
+
+    def inc(self, amount: float = 1.0) -> None:
+        """Increase the counter by the given amount."""
+        with self._lock:
+            self._value += amount
+
+    @property
+    def value(self) -> float:
+        """Current value of the counter."""
+        return self._value
+
+    def samples(self) -> List[Tuple[str, float]]:
+        """Get the (sample name, value) pairs to expose."""
+        return [(self.name, self._value)]
+
+
+class Gauge:
+    """A value that can go up and down."""
+
+    metric_type = "gauge"
+
+    def __init__(self, name: str, description: str) -> None:
+        self.name = name
+        self.description = description
+        self._value = 0.0
+        self._lock = threading.Lock()
+
+    def set(self, value: float) -> None:
+        """Set the gauge to the given value."""
+        self._value = value
+
+    def inc(self, amount: float = 1.0) -> None:
+        """Increase the gauge by the given amount."""
+        with self._lock:
+            self._value += amount
+
+    def dec(self, amount: float = 1.0) -> None:
+        """Decrease the gauge by the given amount."""
+        with self._lock:
+            self._value -= amount
+
+    @property
+    def value(self) -> float:
+        """Current value of the gauge."""
+        return self._value
+
+    def samples(self) -> List[Tuple[str, float]]:
+        """Get the (sample name, value) pairs to expose."""
+        return [(self.name, self._value)]
+
+
+class Histogram:
+    """A distribution of observed values in fixed buckets."""
+
+    metric_type = "histogram"
+
+    def __init__(self, name: str, description: str, buckets: Sequence[float] = LATENCY_BUCKETS) -> None:
+        self.name = name
+        self.description = description
+        self.buckets = tuple(sorted(buckets))
+        self._bucket_counts = [0] * (len(self.buckets) + 1)
+        self._sum = 0.0
+        self._count = 0
+        self._lock = threading.Lock()
+
+    def observe(self, value: float) -> None:
+        """Record an observed value."""
+        index = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            self._bucket_counts[index] += 1
+            self._sum += value
+            self._count += 1
+
+    def time(self) -> "_Timer":
+        """
+        Time a block of code.
+
+        Returns:
+            Context manager that observes the elapsed seconds on exit
+        """
+        return _Timer(self)
+
+    @property
+    def count(self) -> int:
+        """Number of observed values."""
+        return self._count
+
+    def totals(self) -> Tuple[float, int]:
+        """Get the sum and the number of observed values."""
+        with self._lock:
+            return self._sum, self._count
+
+    @property
+    def mean(self) -> Optional[float]:
+        """Mean of the observed values, or None before the first observation."""
+        with self._lock:
+            return self._sum / self._count if self._count else None
+
+    def samples(self) -> List[Tuple[str, float]]:
+        """Get the (sample name, value) pairs to expose, with cumulative buckets."""
+        with self._lock:
+            bucket_counts = list(self._bucket_counts)
+            total, count = self._sum, self._count
+
+        samples = []
+        cumulative = 0
+        for bound, bucket_count in zip(self.buckets, bucket_counts):
+            cumulative += bucket_count
+            samples.append((f'{self.name}_bucket{{le="{bound}"}}', cumulative))
+        samples.append((f'{self.name}_bucket{{le="+Inf"}}', count))
+        samples.append((f"{self.name}_sum", total))
+        samples.append((f"{self.name}_count", count))
+        return samples
+
+
+class _Timer:
+    """Context manager that records elapsed time in a histogram."""
+
+    __slots__ = ("histogram", "started")
+
+    def __init__(self, histogram: Histogram) -> None:
+        self.histogram = histogram
+        self.started = 0.0
+
+    def __enter__(self) -> "_Timer":
+        self.started = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback) -> None:
+        self.histogram.observe(time.perf_counter() - self.started)
+
+
+class MetricsRegistry:
+    """Collection of named metrics rendered together."""
+
+    def __init__(self) -> None:
+        self._metrics: Dict[str, object] = {}
+        self._lock = threading.Lock()
+
+    def counter(self, name: str, description: str) -> Counter:
+        """Create or get a counter."""
+        return self._register(Counter(name, description))
+
+    def gauge(self, name: str, description: str) -> Gauge:
+        """Create or get a gauge."""
+        return self._register(Gauge(name, description))
+
+    def histogram(self, name: str, description: str,
+                  buckets: Sequence[float] = LATENCY_BUCKETS) -> Histogram:
+        """Create or get a histogram."""
+        return self._register(Histogram(name, description, buckets))
+
+    def _register(self, metric):
+        """Register a metric unless one with the same name exists."""
+        with self._lock:
+            return self._metrics.setdefault(metric.name, metric)
+
+    def snapshot(self) -> Dict[str, float]:
+        """
+        Get the current value of every metric, e.g. for the GUI dashboard.
+
+        Histograms contribute their <name>_sum and <name>_count values.
+
+        Returns:
+            Dictionary of sample name to value
+        """
+        with self._lock:
+            metrics = list(self._metrics.values())
+
+        snapshot = {}
+        for metric in metrics:
+            if isinstance(metric, Histogram):
+                snapshot[f"{metric.name}_sum"], snapshot[f"{metric.name}_count"] = metric.totals()
+            else:
+                snapshot[metric.name] = metric.value
+        return snapshot
+
+    def render(self) -> str:
+        """
+        Render all metrics in the Prometheus text exposition format.
+
+        Returns:
+            Exposition text
+        """
+        with self._lock:
+            metrics = list(self._metrics.values())
+
+        lines = []
+        for metric in metrics:
+            lines.append(f"# HELP {metric.name} {metric.description}")
+            lines.append(f"# TYPE {metric.name} {metric.metric_type}")
+            for sample_name, value in metric.samples():
+                lines.append(f"{sample_name} {value}")
+        return "\n".join(lines) + "\n"
+
+
+# Registry and instruments shared by the ground station modules
+REGISTRY = MetricsRegistry()
+
+FRAMES_SENT = REGISTRY.counter("mizu_frames_sent_total", "Frames written to the serial port")
+BYTES_SENT = REGISTRY.counter("mizu_bytes_sent_total", "Bytes written to the serial port")
+SEND_FAILURES = REGISTRY.counter("mizu_send_failures_total", "Frames that failed to be written")
+RETRANSMITS = REGISTRY.counter("mizu_retransmits_total", "Frames retransmitted by the reliable link")
+INGEST_READINGS = REGISTRY.counter("mizu_ingest_readings_total", "Readings inserted through the ingest endpoint")
+INGEST_DUPLICATES = REGISTRY.counter("mizu_ingest_duplicates_total", "Duplicate readings skipped by the ingest endpoint")
+INGEST_REJECTED = REGISTRY.counter("mizu_ingest_rejected_total", "Ingest requests refused because the queue was full")
+BACKLOG_SIZE = REGISTRY.gauge("mizu_backlog_size", "Untransmitted rows in the database")
+OUTBOX_DEPTH = REGISTRY.gauge("mizu_outbox_depth", "Frames waiting in the outbox")
+SERIAL_QUEUE_DEPTH = REGISTRY.gauge("mizu_serial_queue_depth", "Commands waiting for the serial writer")
+UI_QUEUE_DEPTH = REGISTRY.gauge("mizu_ui_queue_depth", "UI updates waiting for the Tk main loop")
+DB_POLL_SECONDS = REGISTRY.histogram("mizu_db_poll_seconds", "Latency of untransmitted-data queries")
+DB_COMMIT_SECONDS = REGISTRY.histogram("mizu_db_commit_seconds", "Latency of transmitted-flag commits")
+SERIAL_WRITE_SECONDS = REGISTRY.histogram("mizu_serial_write_seconds", "Latency of writing one frame")
+
+
+class _MetricsRequestHandler(BaseHTTPRequestHandler):
+    """Serves the registry on GET /metrics."""
+
+    registry: MetricsRegistry = REGISTRY
+
+    def do_GET(self) -> None:
+        if self.path.split("?", 1)[0] != "/metrics":
+            self.send_error(404)
+            return
+
+        body = self.registry.render().encode()
+        self.send_response(200)
+        self.send_header("Content-Type", "text/plain; version=0.0.4; charset=utf-8")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args) -> None:
+        """Keep scrapes out of the console."""
+
+
+class MetricsServer:
+    """Local HTTP server exposing a metrics registry at /metrics."""
+
+    def __init__(self, host: str, port: int, registry: MetricsRegistry = REGISTRY) -> None:
+        """
+        Initialize the metrics server.
+
+        Args:
+            host: Interface to listen on
+            port: TCP port to listen on
+            registry: Registry to expose
+        """
+        self.host = host
+        self.port = port
+        self.registry = registry
+        self._server: Optional[ThreadingHTTPServer] = None
+        self._thread: Optional[threading.Thread] = None
+
+    def start(self) -> bool:
+        """
+        Start serving in a background thread.
+
+        Returns:
+            True if the server is listening, False otherwise
+        """
+        handler = type("MetricsRequestHandler", (_MetricsRequestHandler,), {"registry": self.registry})
+        try:
+            self._server = ThreadingHTTPServer((self.host, self.port), handler)
+        except OSError as e:
+            logger.error("Failed to start metrics endpoint on %s:%s: %s", self.host, self.port, e)
+            return False
+
+        self._server.daemon_threads = True
+        self._thread = threading.Thread(target=self._server.serve_forever, daemon=True)
+        self._thread.start()
+        host, port = self._server.server_address[:2]
+        logger.info("Metrics available at http://%s:%s/metrics", host, port)
+        return True
+
+    def stop(self) -> None:
+        """Stop serving and release the port."""
+        if self._server is not None:
+            self._server.shutdown()
+            self._server.server_close()
+            self._server = None
@@ -31,6 +31,12 @@ target_metadata = Base.metadata
 # my_important_option = config.get_main_option("my_important_option")
 # ... etc.
 
+# Allow the database URL to be overridden on the command line, e.g.
+# alembic -x database_url=sqlite:///mizu_sensor_hub.db upgrade head
+database_url_override = context.get_x_argument(as_dictionary=True).get("database_url")
+if database_url_override:
+    config.set_main_option("sqlalchemy.url", database_url_override)
+
 
 def run_migrations_offline() -> None:
     """Run migrations in 'offline' mode.
@@ -71,7 +77,9 @@ def run_migrations_online() -> None:
 
     with connectable.connect() as connection:
         context.configure(
-            connection=connection, target_metadata=target_metadata
+            connection=connection, target_metadata=target_metadata,
+            # SQLite cannot ALTER most column properties; batch mode recreates the table
+            render_as_batch=connection.dialect.name == "sqlite"
         )
 
         with context.begin_transaction():
@@ -0,0 +1,28 @@
+"""Add priority column for transmit scheduling
+
+Revision ID: 0003
+Revises: 0002
+Create Date: 2024-01-01 00:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '0003'
+down_revision = '0002'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    """Add priority column and an index for the priority scheduling policy."""
+    op.add_column('mizu_sensor_hub', sa.Column('priority', sa.Integer(), nullable=False, server_default='0'))
+    op.create_index('ix_mizu_sensor_hub_transmitted_priority', 'mizu_sensor_hub', ['transmitted', 'priority'], unique=False)
+
+
+def downgrade() -> None:
+    """Remove priority column and its index from mizu_sensor_hub table."""
+    op.drop_index('ix_mizu_sensor_hub_transmitted_priority', table_name='mizu_sensor_hub')
+    op.drop_column('mizu_sensor_hub', 'priority')
@@ -0,0 +1,51 @@
+"""Add trigger-maintained backlog counter
+
+Revision ID: 0004
+Revises: 0003
+Create Date: 2024-01-01 00:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+from database_models import install_backlog_counter
+
+
+# revision identifiers, used by Alembic.
+revision = '0004'
+down_revision = '0003'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    """
+    Create the backlog counter table, its triggers and the seeded counter row.
+
+    The trigger DDL is shared with init_database(), whose create_all() may
+    already have created and seeded the counter on a database still at
+    0003; the table is then left as it is.
+    """
+    connection = op.get_bind()
+    if not sa.inspect(connection).has_table('mizu_backlog_counter'):
+        op.create_table('mizu_backlog_counter',
+            sa.Column('id', sa.Integer(), nullable=False),
+            sa.Column('untransmitted', sa.Integer(), nullable=False),
+            sa.PrimaryKeyConstraint('id')
+        )
+
+    # Without trigger support the counter stays empty and the count is computed
+    install_backlog_counter(connection)
+
+
+def downgrade() -> None:
+    """Remove the backlog counter triggers and table."""
+    dialect = op.get_bind().dialect.name
+    for trigger in ('insert', 'update', 'delete'):
+        if dialect == 'postgresql':
+            op.execute(f"DROP TRIGGER IF EXISTS mizu_backlog_counter_{trigger} ON mizu_sensor_hub")
+        else:
+            op.execute(f"DROP TRIGGER IF EXISTS mizu_backlog_counter_{trigger}")
+    if dialect == 'postgresql':
+        op.execute("DROP FUNCTION IF EXISTS mizu_backlog_counter_update()")
+    op.drop_table('mizu_backlog_counter')
@@ -0,0 +1,79 @@
+"""Add precomputed uplink frame column
+
+Revision ID: 0005
+Revises: 0004
+Create Date: 2024-01-01 00:00:00.000000
+
+"""
+from datetime import datetime
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '0005'
+down_revision = '0004'
+branch_labels = None
+depends_on = None
+
+# Rows formatted per round trip while backfilling
+BACKFILL_BATCH_SIZE = 1000
+
+# Columns the frame is formatted from
+FRAME_FIELDS = [
+    'device_id', 'ambient_temperature', 'humidity', 'soil_moisture', 'soil_temperature',
+    'wind_speed', 'ambient_light', 'uv_light', 'timestamp',
+]
+
+# Frame keys of the measurement columns, in FRAME_FIELDS order
+FRAME_KEYS = [
+    ('ambient_temp', 'ambient_temperature'), ('humidity', 'humidity'), ('soil_moisture', 'soil_moisture'),
+    ('soil_temp', 'soil_temperature'), ('wind_speed', 'wind_speed'), ('ambient_light', 'ambient_light'),
+    ('uv_light', 'uv_light'),
+]
+
+
+def format_frame(row: dict) -> str:
+    """
+    Format a row into the uplink frame as it was defined at this revision.
+
+    A copy of sensor_record.format_frame() at the time, so the backfill
+    keeps producing the same frames whatever the application code does later.
+    """
+    timestamp = row['timestamp'] or datetime.utcnow()
+    parts = [f"device_id={row['device_id']}", f"timestamp={timestamp.isoformat()}"]
+    parts += [f"{key}={row[field] or 0.0}" for key, field in FRAME_KEYS]
+    return f"#{','.join(parts)}~"
+
+
+def upgrade() -> None:
+    """Add the frame column and fill it in for untransmitted rows."""
+    op.add_column('mizu_sensor_hub', sa.Column('frame', sa.Text(), nullable=True))
+
+    # Transmitted rows are never sent again, so only the backlog is backfilled.
+    # Measurement columns missing from this database are formatted as 0.0.
+    connection = op.get_bind()
+    existing = {column['name'] for column in sa.inspect(connection).get_columns('mizu_sensor_hub')}
+    fields = [field for field in FRAME_FIELDS if field in existing]
+    select_batch = sa.text(
+        f"SELECT id, {', '.join(fields)} FROM mizu_sensor_hub "
+        "WHERE NOT transmitted AND frame IS NULL AND id > :after_id ORDER BY id LIMIT :batch_size"
+    ).columns(timestamp=sa.DateTime())
+    update_frame = sa.text("UPDATE mizu_sensor_hub SET frame = :frame WHERE id = :id")
+
+    after_id = 0
+    while True:
+        rows = connection.execute(select_batch, {"after_id": after_id, "batch_size": BACKFILL_BATCH_SIZE}).all()
+        if not rows:
+            break
+        connection.execute(update_frame, [
+            {"id": row.id, "frame": format_frame({**dict.fromkeys(FRAME_FIELDS), **row._mapping})}
+            for row in rows
+        ])
+        after_id = rows[-1].id
+
+
+def downgrade() -> None:
+    """Remove the frame column from mizu_sensor_hub table."""
+    op.drop_column('mizu_sensor_hub', 'frame')
@@ -0,0 +1,55 @@
+"""Add sensor summary table for backlog aggregation
+
+Revision ID: 0006
+Revises: 0005
+Create Date: 2024-01-01 00:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '0006'
+down_revision = '0005'
+branch_labels = None
+depends_on = None
+
+# Measurement fields summarized per window
+SUMMARY_FIELDS = [
+    'ambient_temperature', 'humidity', 'soil_moisture', 'soil_temperature',
+    'wind_speed', 'ambient_light', 'uv_light',
+]
+
+
+def upgrade() -> None:
+    """Create mizu_sensor_summary and link readings to the summary sent in their place."""
+    # init_database()'s create_all() may already have created the table
+    if not sa.inspect(op.get_bind()).has_table('mizu_sensor_summary'):
+        op.create_table('mizu_sensor_summary',
+            sa.Column('id', sa.Integer(), autoincrement=True, nullable=False),
+            sa.Column('device_id', sa.String(length=100), nullable=False),
+            sa.Column('window_start', sa.DateTime(), nullable=False),
+            sa.Column('window_seconds', sa.Integer(), nullable=False),
+            sa.Column('reading_count', sa.Integer(), nullable=False),
+            *[sa.Column(f'{field}_{statistic}', sa.Float(), nullable=True)
+              for field in SUMMARY_FIELDS for statistic in ('min', 'mean', 'max')],
+            sa.Column('frame', sa.Text(), nullable=False),
+            sa.Column('transmitted', sa.Boolean(), nullable=False),
+            sa.Column('created_at', sa.DateTime(), nullable=False),
+            sa.PrimaryKeyConstraint('id')
+        )
+        op.create_index(op.f('ix_mizu_sensor_summary_device_id'), 'mizu_sensor_summary', ['device_id'], unique=False)
+        op.create_index(op.f('ix_mizu_sensor_summary_transmitted'), 'mizu_sensor_summary', ['transmitted'], unique=False)
+
+    op.add_column('mizu_sensor_hub', sa.Column('summary_id', sa.Integer(), nullable=True))
+    op.create_index(op.f('ix_mizu_sensor_hub_summary_id'), 'mizu_sensor_hub', ['summary_id'], unique=False)
+
+
+def downgrade() -> None:
+    """Drop mizu_sensor_summary and the summary link of mizu_sensor_hub."""
+    op.drop_index(op.f('ix_mizu_sensor_hub_summary_id'), table_name='mizu_sensor_hub')
+    op.drop_column('mizu_sensor_hub', 'summary_id')
+    op.drop_index(op.f('ix_mizu_sensor_summary_transmitted'), table_name='mizu_sensor_summary')
+    op.drop_index(op.f('ix_mizu_sensor_summary_device_id'), table_name='mizu_sensor_summary')
+    op.drop_table('mizu_sensor_summary')
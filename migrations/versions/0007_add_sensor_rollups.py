@@ -0,0 +1,71 @@
+"""Add hourly and daily rollup tables
+
+Revision ID: 0007
+Revises: 0006
+Create Date: 2024-01-01 00:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '0007'
+down_revision = '0006'
+branch_labels = None
+depends_on = None
+
+# Measurement fields rolled up per period
+ROLLUP_FIELDS = [
+    'ambient_temperature', 'humidity', 'soil_moisture', 'soil_temperature',
+    'wind_speed', 'ambient_light', 'uv_light',
+]
+
+ROLLUP_TABLES = ['mizu_sensor_rollup_hourly', 'mizu_sensor_rollup_daily']
+
+
+def _statistic_columns() -> list:
+    """Build the count, sum, minimum and maximum columns of every field."""
+    columns = []
+    for field in ROLLUP_FIELDS:
+        columns += [
+            sa.Column(f'{field}_count', sa.Integer(), nullable=False),
+            sa.Column(f'{field}_sum', sa.Float(), nullable=False),
+            sa.Column(f'{field}_min', sa.Float(), nullable=True),
+            sa.Column(f'{field}_max', sa.Float(), nullable=True),
+        ]
+    return columns
+
+
+def upgrade() -> None:
+    """Create the rollup tables and the table of their high-water marks."""
+    # init_database()'s create_all() may already have created the tables
+    existing = set(sa.inspect(op.get_bind()).get_table_names())
+    for table in ROLLUP_TABLES:
+        if table in existing:
+            continue
+        op.create_table(table,
+            sa.Column('id', sa.Integer(), autoincrement=True, nullable=False),
+            sa.Column('device_id', sa.String(length=100), nullable=False),
+            sa.Column('period_start', sa.DateTime(), nullable=False),
+            sa.Column('reading_count', sa.Integer(), nullable=False),
+            *_statistic_columns(),
+            sa.PrimaryKeyConstraint('id'),
+            sa.UniqueConstraint('device_id', 'period_start', name=f'uq_{table}_device_period')
+        )
+
+    if 'mizu_rollup_state' in existing:
+        return
+    op.create_table('mizu_rollup_state',
+        sa.Column('name', sa.String(length=50), nullable=False),
+        sa.Column('last_id', sa.Integer(), nullable=False),
+        sa.Column('updated_at', sa.DateTime(), nullable=True),
+        sa.PrimaryKeyConstraint('name')
+    )
+
+
+def downgrade() -> None:
+    """Drop the rollup tables and their high-water marks."""
+    op.drop_table('mizu_rollup_state')
+    for table in reversed(ROLLUP_TABLES):
+        op.drop_table(table)
@@ -0,0 +1,36 @@
+"""Add composite device and timestamp index
+
+Revision ID: 0008
+Revises: 0007
+Create Date: 2024-01-01 00:00:00.000000
+
+"""
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision = '0008'
+down_revision = '0007'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    """Replace the device_id index with a (device_id, timestamp) index."""
+    # On PostgreSQL the index is built without blocking writes to the table
+    if op.get_bind().dialect.name == 'postgresql':
+        with op.get_context().autocommit_block():
+            op.create_index('ix_mizu_sensor_hub_device_id_timestamp', 'mizu_sensor_hub',
+                            ['device_id', 'timestamp'], unique=False, postgresql_concurrently=True)
+    else:
+        op.create_index('ix_mizu_sensor_hub_device_id_timestamp', 'mizu_sensor_hub',
+                        ['device_id', 'timestamp'], unique=False)
+
+    # The composite index serves lookups by device_id alone
+    op.drop_index(op.f('ix_mizu_sensor_hub_device_id'), table_name='mizu_sensor_hub')
+
+
+def downgrade() -> None:
+    """Restore the device_id index and drop the composite index."""
+    op.create_index(op.f('ix_mizu_sensor_hub_device_id'), 'mizu_sensor_hub', ['device_id'], unique=False)
+    op.drop_index('ix_mizu_sensor_hub_device_id_timestamp', table_name='mizu_sensor_hub')
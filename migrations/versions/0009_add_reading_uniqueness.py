@@ -0,0 +1,47 @@
+"""Make readings unique per device and timestamp
+
+Revision ID: 0009
+Revises: 0008
+Create Date: 2024-01-01 00:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '0009'
+down_revision = '0008'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    """Delete duplicate readings and make the (device_id, timestamp) index unique."""
+    # Of each set of duplicates the first stored reading (lowest ID) is kept.
+    # The backlog counter triggers account for deleted untransmitted rows.
+    op.execute(sa.text(
+        "DELETE FROM mizu_sensor_hub WHERE id IN ("
+        "SELECT later.id FROM mizu_sensor_hub later JOIN mizu_sensor_hub earlier "
+        "ON earlier.device_id = later.device_id AND earlier.timestamp = later.timestamp "
+        "AND earlier.id < later.id)"
+    ))
+
+    # On PostgreSQL the index is built without blocking writes to the table
+    if op.get_bind().dialect.name == 'postgresql':
+        with op.get_context().autocommit_block():
+            op.create_index('uq_mizu_sensor_hub_device_id_timestamp', 'mizu_sensor_hub',
+                            ['device_id', 'timestamp'], unique=True, postgresql_concurrently=True)
+    else:
+        op.create_index('uq_mizu_sensor_hub_device_id_timestamp', 'mizu_sensor_hub',
+                        ['device_id', 'timestamp'], unique=True)
+
+    # The unique index serves the same range queries
+    op.drop_index('ix_mizu_sensor_hub_device_id_timestamp', table_name='mizu_sensor_hub')
+
+
+def downgrade() -> None:
+    """Restore the non-unique (device_id, timestamp) index; deleted duplicates are not restored."""
+    op.create_index('ix_mizu_sensor_hub_device_id_timestamp', 'mizu_sensor_hub',
+                    ['device_id', 'timestamp'], unique=False)
+    op.drop_index('uq_mizu_sensor_hub_device_id_timestamp', table_name='mizu_sensor_hub')
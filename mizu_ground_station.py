@@ -15,18 +15,58 @@ The application features:
 """
 
 import customtkinter
+import logging
 import threading
 import time
+from concurrent.futures import Future
+from typing import Callable, List, Optional
 
 from config import (
     WINDOW_WIDTH, WINDOW_HEIGHT, WINDOW_TITLE, DEFAULT_THEME,
     DEFAULT_COLOR_THEME, EXIT_CONFIRMATION_MESSAGE, DIALOG_TITLES,
-    DATABASE_CONFIG, DATABASE_URL_TEMPLATE
+    DATABASE_URL, DATABASE_RETRY_INTERVAL, BACKLOG_RECONCILE_INTERVAL,
+    OUTBOX_DIRECTORY, OUTBOX_SEGMENT_SIZE, OUTBOX_PREFETCH_LIMIT,
+    OUTBOX_FSYNC_BATCH, OUTBOX_FSYNC_INTERVAL, ACK_JOURNAL_PATH,
+    ACK_JOURNAL_COMMIT_BATCH, ACK_JOURNAL_COMMIT_INTERVAL,
+    ACK_JOURNAL_FSYNC_BATCH, ACK_JOURNAL_MAX_SIZE, RELIABLE_LINK_ENABLED,
+    RELIABLE_LINK_WINDOW_SIZE, RELIABLE_LINK_ACK_TIMEOUT, RELIABLE_LINK_MAX_RETRIES,
+    LINK_RATE_ADAPTIVE, LINK_RATE_INITIAL, LINK_RATE_MIN, LINK_RATE_INCREASE_STEP,
+    LINK_RATE_DECREASE_FACTOR, LINK_RATE_STALL_FACTOR, TRANSMISSION_ENTRY_INTERVAL, TRANSMISSION_STOP_TIMEOUT,
+    TRANSMISSION_STOP_POLL_INTERVAL,
+    TRANSMISSION_BATCH_SIZE, TRANSMISSION_PREFETCH_DEPTH, TRANSMISSION_PRECOMPUTED_FRAMES,
+    TRANSMIT_SCHEDULING_POLICY, COMPRESSION_ENABLED, COMPRESSION_DICTIONARY_DIRECTORY,
+    COMPRESSION_DICTIONARY_ID, COMPRESSION_BATCH_SIZE, COMPRESSION_LEVEL, DELTA_ENCODING_ENABLED,
+    DELTA_KEYFRAME_INTERVAL, DELTA_FIELD_PRECISION, AGGREGATION_ENABLED, AGGREGATION_WINDOWS,
+    AGGREGATION_EXIT_BACKLOG, AGGREGATION_BATCH_ROWS, INGEST_ENABLED, INGEST_HOST, INGEST_PORT,
+    INGEST_BATCH_SIZE, INGEST_FLUSH_INTERVAL, INGEST_QUEUE_SIZE, INGEST_MAX_BODY_BYTES,
+    INGEST_ENQUEUE_TIMEOUT, INGEST_WRITE_TIMEOUT, PIPELINE_PROCESSES, METRICS_ENABLED,
+    METRICS_HOST, METRICS_PORT, LOG_LEVEL, LOG_FILE, LOG_MAX_BYTES, LOG_BACKUP_COUNT,
+    LOG_FRAME_SAMPLE_RATE, TRACING_SINK, TRACING_FILE, TRACING_RING_SIZE,
+    TRACING_OTLP_ENDPOINT, TRACING_SERVICE_NAME, DASHBOARD_REFRESH_INTERVAL, SUCCESS_MESSAGES
 )
-from serial_manager import SerialManager
+from serial_manager import SerialManager, PRIORITY_URGENT
 from ui_components import NavigationBar, ConnectionPanel, MainContentPanel
 from error_handler import ErrorHandler
 from database_manager import DatabaseManager
+from outbox import OutboxQueue
+from ack_journal import AckJournal
+from reliable_link import ReliableLink
+from frame_compression import FrameCompressor, load_dictionary
+from delta_encoding import DeltaDeliveryTracker, DeltaEncoder
+from backlog_aggregation import AggregationPolicy, SUMMARY_FRAME_PREFIX
+from link_rate import AdaptiveRateController
+from transmit_scheduler import TransmitScheduler
+from prefetch_stage import PrefetchStage
+from ingest_server import IngestServer
+from process_pipeline import EVENT_COMMAND, EVENT_FAILED, EVENT_SENT, ProcessPipeline
+from metrics import (
+    MetricsServer, REGISTRY, BACKLOG_SIZE, BYTES_SENT, FRAMES_SENT, OUTBOX_DEPTH, SEND_FAILURES, UI_QUEUE_DEPTH
+)
+from structured_logging import FRAME_LOGGER_NAME, configure_logging, shutdown_logging
+from tracing import TRACER, create_sink
+
+logger = logging.getLogger(__name__)
+frame_logger = logging.getLogger(FRAME_LOGGER_NAME)
 
 
 class MizuSensorHub(customtkinter.CTk):
@@ -52,18 +92,123 @@ class MizuSensorHub(customtkinter.CTk):
         customtkinter.set_default_color_theme(DEFAULT_COLOR_THEME)
 
         # Initialize managers and handlers
-        self.serial_manager = SerialManager()
+        self.rate_controller = AdaptiveRateController(
+            LINK_RATE_INITIAL, LINK_RATE_MIN, LINK_RATE_INCREASE_STEP, LINK_RATE_DECREASE_FACTOR,
+            adaptive=LINK_RATE_ADAPTIVE, increase_on_ack=RELIABLE_LINK_ENABLED,
+            stall_factor=LINK_RATE_STALL_FACTOR
+        )
+        self.serial_manager = SerialManager(self.rate_controller)
         self.error_handler = ErrorHandler()
 
         # Initialize database manager
-        database_url = DATABASE_URL_TEMPLATE.format(**DATABASE_CONFIG)
-        self.database_manager = DatabaseManager(database_url)
+        self.database_manager = DatabaseManager(DATABASE_URL)
 
         # Initialize database connection
         if not self.database_manager.initialize():
-            print("Warning: Database initialization failed. Transmission functionality will not work.")
+            logger.warning("Database initialization failed. Transmission functionality will not work.")
         else:
-            print("Database initialized successfully. Ready to transmit sensor data.")
+            logger.info("Database initialized successfully. Ready to transmit sensor data.")
+        self._last_database_retry = time.monotonic()
+        self._database_retry_lock = threading.Lock()
+        self._last_backlog_reconcile = None
+
+        # Open the local outbox that buffers frames between database and link
+        self.outbox = OutboxQueue(
+            OUTBOX_DIRECTORY, OUTBOX_SEGMENT_SIZE,
+            fsync_batch=OUTBOX_FSYNC_BATCH, fsync_interval=OUTBOX_FSYNC_INTERVAL
+        )
+
+        # Open the acknowledgement journal; its committer replays any
+        # sends left uncommitted by a previous run
+        self.ack_journal = AckJournal(
+            ACK_JOURNAL_PATH, self._commit_acknowledged,
+            batch_size=ACK_JOURNAL_COMMIT_BATCH, commit_interval=ACK_JOURNAL_COMMIT_INTERVAL,
+            fsync_batch=ACK_JOURNAL_FSYNC_BATCH, max_size=ACK_JOURNAL_MAX_SIZE
+        )
+        self.ack_journal.start()
+
+        # Decides the order of the transmit backlog
+        self.scheduler = TransmitScheduler(TRANSMIT_SCHEDULING_POLICY)
+
+        # Fetches and encodes the next batches while the current one is sent.
+        # Frames delivered after a prefetched batch was polled are numbered,
+        # so the batch cannot queue them again once they are committed.
+        self.prefetch_stage = None
+        if TRANSMISSION_PREFETCH_DEPTH > 0:
+            self.prefetch_stage = PrefetchStage(
+                self._fetch_planned_batch, TRANSMISSION_PREFETCH_DEPTH, idle_interval=5
+            )
+        self._delivery_sequence = 0
+        self._recent_deliveries = {}
+
+        # Set when new readings are ingested, to end an idle wait early
+        self._backlog_wakeup = threading.Event()
+
+        # Switches to uplinking summaries of the oldest readings while the
+        # backlog is deep; summaries are queued under their negated ID
+        self.aggregation_policy = None
+        if AGGREGATION_ENABLED:
+            self.aggregation_policy = AggregationPolicy(AGGREGATION_WINDOWS, AGGREGATION_EXIT_BACKLOG)
+
+        # Optional acknowledged transport over the serial connection
+        self.reliable_link = None
+        if RELIABLE_LINK_ENABLED:
+            self.reliable_link = ReliableLink(
+                self.serial_manager, RELIABLE_LINK_WINDOW_SIZE, RELIABLE_LINK_ACK_TIMEOUT,
+                RELIABLE_LINK_MAX_RETRIES, self._handle_frame_acknowledged, self._handle_frame_failed,
+                rate_controller=self.rate_controller
+            )
+
+        # Optional compression of batches of frames with a pre-shared dictionary
+        self.compressor = None
+        if COMPRESSION_ENABLED:
+            try:
+                dictionary_id, dictionary = load_dictionary(COMPRESSION_DICTIONARY_DIRECTORY, COMPRESSION_DICTIONARY_ID)
+                self.compressor = FrameCompressor(dictionary, dictionary_id, COMPRESSION_LEVEL)
+                logger.info("Compressing uplink batches with dictionary %04X", dictionary_id)
+            except (OSError, ValueError) as e:
+                logger.error("Uplink compression disabled, no usable dictionary: %s", e)
+
+        # Optional per-device delta encoding of the frames
+        self.delta_encoder = None
+        if DELTA_ENCODING_ENABLED:
+            self.delta_encoder = DeltaEncoder(DELTA_FIELD_PRECISION, DELTA_KEYFRAME_INTERVAL)
+
+        # Over the reliable link a delta only counts as delivered with the frame it builds on
+        self.delta_deliveries = None
+        if self.delta_encoder is not None and self.reliable_link is not None:
+            self.delta_deliveries = DeltaDeliveryTracker()
+
+        # Expose pipeline metrics on a local HTTP endpoint
+        self.metrics_server = None
+        if METRICS_ENABLED:
+            self.metrics_server = MetricsServer(METRICS_HOST, METRICS_PORT)
+            self.metrics_server.start()
+
+        # Optionally run the transmission path in separate processes; the
+        # GUI then only forwards commands and observes status events
+        self.process_pipeline = None
+        if PIPELINE_PROCESSES:
+            if RELIABLE_LINK_ENABLED or AGGREGATION_ENABLED:
+                logger.warning("Reliable link and backlog aggregation are not available with PIPELINE_PROCESSES")
+            self.process_pipeline = ProcessPipeline(DATABASE_URL)
+
+        # Accept readings from local collectors and wake the transmitter for them
+        self.ingest_server = None
+        if INGEST_ENABLED:
+            self.ingest_server = IngestServer(
+                self.database_manager, INGEST_HOST, INGEST_PORT, batch_size=INGEST_BATCH_SIZE,
+                flush_interval=INGEST_FLUSH_INTERVAL, queue_size=INGEST_QUEUE_SIZE,
+                max_body_bytes=INGEST_MAX_BODY_BYTES, enqueue_timeout=INGEST_ENQUEUE_TIMEOUT,
+                write_timeout=INGEST_WRITE_TIMEOUT, on_ingested=self._handle_readings_ingested
+            )
+            self.ingest_server.start()
+
+        # Send timed spans of the transmission phases to the configured sink
+        TRACER.set_sink(create_sink(
+            TRACING_SINK, path=TRACING_FILE, ring_size=TRACING_RING_SIZE,
+            otlp_endpoint=TRACING_OTLP_ENDPOINT, service_name=TRACING_SERVICE_NAME
+        ))
 
         # Setup the main application window and components
         self._configure_main_window()
@@ -73,10 +218,18 @@ class MizuSensorHub(customtkinter.CTk):
         # Initialize transmission loop control
         self.transmission_thread = None
         self.should_transmit = False
+        # Set to cut the transmission thread's waits short when it is stopped
+        self._transmission_stopped = threading.Event()
+        # Callbacks to run once a stopping transmission thread has exited
+        self._transmission_stop_callbacks: List[Callable[[], None]] = []
+        self._transmission_stop_started: Optional[float] = None
 
         # Register cleanup handler for window close events
         self.protocol("WM_DELETE_WINDOW", self._handle_window_close)
 
+        # Refresh the performance dashboard at a fixed rate
+        self._refresh_dashboard()
+
     def _start_transmission_loop(self) -> None:
         """
         Start the continuous transmission loop in a separate thread.
@@ -86,96 +239,534 @@ class MizuSensorHub(customtkinter.CTk):
         """
         if self.transmission_thread is None or not self.transmission_thread.is_alive():
             self.should_transmit = True
+            self._transmission_stopped.clear()
             self.transmission_thread = threading.Thread(
                 target=self._transmission_loop,
                 daemon=True
             )
             self.transmission_thread.start()
-            print("Transmission loop started")
+            if self.prefetch_stage is not None:
+                self.prefetch_stage.start()
+            logger.info("Transmission loop started")
 
-    def _stop_transmission_loop(self) -> None:
+    def _stop_transmission_loop(self, on_stopped: Optional[Callable[[], None]] = None) -> None:
         """
-        Stop the continuous transmission loop.
+        Stop the continuous transmission loop without blocking the UI.
+
+        The transmission thread may itself be waiting for the main loop to
+        run a UI update, so it is not joined here; instead the main loop
+        polls until it has exited and then calls on_stopped, so nothing
+        is acknowledged to the outbox or journal after they are closed.
+
+        Args:
+            on_stopped: Function to call on the main thread once the
+                transmission thread has exited (optional)
         """
         self.should_transmit = False
-        print("Transmission loop stopped")
+        self._transmission_stopped.set()
+        self._backlog_wakeup.set()
+        if self.prefetch_stage is not None:
+            self.prefetch_stage.stop()
+        if on_stopped is not None:
+            self._transmission_stop_callbacks.append(on_stopped)
+        if self._transmission_stop_started is None:
+            self._transmission_stop_started = time.monotonic()
+            self._await_transmission_stop()
+
+    def _await_transmission_stop(self) -> None:
+        """
+        Run the stop callbacks once the transmission thread has exited.
+
+        Reschedules itself with after() while the thread is still running.
+        """
+        if self.transmission_thread is not None and self.transmission_thread.is_alive():
+            waited = time.monotonic() - self._transmission_stop_started
+            if waited > TRANSMISSION_STOP_TIMEOUT:
+                logger.warning("Transmission thread still running after %.0f seconds", waited)
+                self._transmission_stop_started = time.monotonic()
+            self.after(TRANSMISSION_STOP_POLL_INTERVAL, self._await_transmission_stop)
+            return
+
+        self.transmission_thread = None
+        self._transmission_stop_started = None
+        logger.info("Transmission loop stopped")
+        callbacks, self._transmission_stop_callbacks = self._transmission_stop_callbacks, []
+        for callback in callbacks:
+            callback()
+
+    def _is_transmission_stopping(self) -> bool:
+        """Whether a stopped transmission thread has yet to exit."""
+        return self._transmission_stop_started is not None
 
     def _transmission_loop(self) -> None:
         """
         Continuous loop that transmits untransmitted data to the COM port.
 
         This method runs in a separate thread and continuously:
-        1. Gets all untransmitted data from the database
-        2. Formats each entry into the required string format
-        3. Sends the formatted string to the COM port
-        4. Marks the data as transmitted
-        5. Waits 5 seconds before the next iteration
+        1. Plans the next batch with the transmit scheduler and tops up
+           the outbox with untransmitted entries, prefetched and encoded
+           by the prefetch stage while the previous batch was being sent
+        2. Sends up to TRANSMISSION_BATCH_SIZE queued frames to the COM port,
+           in scheduler order
+        3. Records each successful send in the acknowledgement journal
+        4. Waits 5 seconds before the next iteration when nothing was sent
+
+        Entries are spaced TRANSMISSION_ENTRY_INTERVAL apart, or sent back
+        to back when adaptive link-rate control paces the characters or
+        the reliable link's window has room.
+
+        Frames already held in the outbox keep being sent while the
+        database is unreachable, and the journal's committer marks sent
+        entries as transmitted in the background, so the link never
+        waits on a database commit. In reliable link mode a frame only
+        counts as sent once the far end has acknowledged it.
         """
         while self.should_transmit:
             try:
-                # Get all untransmitted data from database
-                untransmitted_data = self.database_manager.get_untransmitted_data()
-
-                if untransmitted_data:
-                    self._update_transmission_status(f"Processing {len(untransmitted_data)} entries", "orange")
-                    print(f"Found {len(untransmitted_data)} untransmitted data entries")
-                    self._display_transmission_data(f"Starting transmission of {len(untransmitted_data)} data entries to satellite...")
-
-                    # Process each untransmitted entry
-                    for i, sensor_data in enumerate(untransmitted_data, 1):
-                        try:
-                            # Format the data into the required string format
-                            formatted_data = self.database_manager.format_sensor_data_for_transmission(sensor_data)
-
-                            self._update_transmission_status(f"Transmitting entry {i}/{len(untransmitted_data)}", "orange")
-                            print(f"Transmitting: {formatted_data}")
-
-                            # Display the data being uploaded in the output window
-                            self._display_transmission_data(f"Uploading to satellite: {formatted_data}")
-
-                            # Send the formatted data to COM port (similar to sending command)
-                            if self.serial_manager.is_connected:
-                                if self.serial_manager.send_command(formatted_data):
-                                    # Mark as transmitted if send was successful
-                                    if self.database_manager.mark_as_transmitted(sensor_data.id):
-                                        self._update_transmission_status(f"Successfully transmitted entry {i}/{len(untransmitted_data)}", "green")
-                                        print(f"Successfully transmitted and marked data ID {sensor_data.id}\n\r")
-                                        self._display_transmission_data(f"✓ Successfully uploaded data ID {sensor_data.id} to satellite\n\r")
-                                    else:
-                                        self._update_transmission_status(f"Failed to mark entry {i} as transmitted", "red")
-                                        print(f"Failed to mark data ID {sensor_data.id} as transmitted")
-                                        self._display_transmission_data(f"✗ Failed to mark data ID {sensor_data.id} as transmitted")
+                with TRACER.span("transmission.cycle") as cycle_span:
+                    frames_attempted = self._run_transmission_cycle()
+                    cycle_span.set_attribute("frames", frames_attempted)
+
+                # Wait 5 seconds before checking for new untransmitted data,
+                # unless frames were sent and more of the backlog may be waiting
+                if not frames_attempted:
+                    self._wait_for_backlog(5)
+
+            except Exception as e:
+                self._update_transmission_status(f"Transmission loop error: {str(e)[:50]}", "red")
+                logger.exception("Error in transmission loop")
+                self._transmission_stopped.wait(5)  # Wait before retrying
+
+    def _run_transmission_cycle(self) -> int:
+        """
+        Top up the outbox and send the next batch of queued frames.
+
+        Returns:
+            Number of frames whose transmission was attempted
+        """
+        if self.reliable_link is not None:
+            self.reliable_link.service()
+
+        if self.prefetch_stage is None:
+            self._prefetch_into_outbox()
+        else:
+            for planned_batch in self.prefetch_stage.take_all():
+                self._apply_planned_batch(planned_batch)
+
+        # Get the next batch of frames waiting in the outbox, best first
+        queued_frames = self.scheduler.order(self.outbox.pending())[:TRANSMISSION_BATCH_SIZE]
+
+        frames_attempted = 0
+        if queued_frames:
+            self._update_transmission_status(f"Processing {len(queued_frames)} entries", "orange")
+            logger.info("Found %d untransmitted data entries", len(queued_frames))
+            self._display_transmission_data(f"Starting transmission of {len(queued_frames)} data entries to satellite...")
+
+            # Process each queued frame, or each compressed batch of frames
+            transmit_units = self._transmit_units(queued_frames)
+            for i, (record_ids, frames) in enumerate(transmit_units, 1):
+                if not self.should_transmit:
+                    break
+                ids_label = ", ".join(map(str, record_ids))
+                sent = False
+                try:
+                    formatted_data = self._encode_unit(record_ids, frames)
+                    frames_attempted += len(record_ids)
+
+                    self._update_transmission_status(f"Transmitting entry {i}/{len(transmit_units)}", "orange")
+                    frame_logger.info("Transmitting: %s", formatted_data, extra={"record_id": record_ids[0]})
+
+                    # Display the data being uploaded in the output window
+                    self._display_transmission_data(f"Uploading to satellite: {formatted_data}")
+
+                    # Send the formatted data to COM port (similar to sending command)
+                    with TRACER.span("transmit_frame", {"record_id": record_ids[0], "frames": len(record_ids)}):
+                        if self.serial_manager.is_connected:
+                            if self.reliable_link is not None:
+                                if self.reliable_link.send_batch(record_ids, formatted_data):
+                                    sent = True
+                                    self._update_transmission_status(f"Entry {i}/{len(transmit_units)} sent, awaiting acknowledgement", "orange")
+                                    frame_logger.info("Sent data ID %s, awaiting acknowledgement", ids_label, extra={"record_id": record_ids[0]})
                                 else:
                                     self._update_transmission_status(f"Failed to send entry {i} to COM port", "red")
-                                    print(f"Failed to send data ID {sensor_data.id} to COM port")
-                                    self._display_transmission_data(f"✗ Failed to send data ID {sensor_data.id} to COM port")
+                                    logger.warning("Failed to send data ID %s to COM port", ids_label, extra={"record_id": record_ids[0]})
+                                    self._display_transmission_data(f"✗ Failed to send data ID {ids_label} to COM port")
+                            elif self.serial_manager.send_command(formatted_data):
+                                sent = True
+                                for record_id in record_ids:
+                                    self._handle_frame_delivered(record_id)
                             else:
-                                self._update_transmission_status("COM port not connected", "red")
-                                print("COM port not connected, skipping transmission")
-                                self._display_transmission_data("✗ COM port not connected - transmission skipped")
+                                self._update_transmission_status(f"Failed to send entry {i} to COM port", "red")
+                                logger.warning("Failed to send data ID %s to COM port", ids_label, extra={"record_id": record_ids[0]})
+                                self._display_transmission_data(f"✗ Failed to send data ID {ids_label} to COM port")
+                        else:
+                            self._update_transmission_status("COM port not connected", "red")
+                            logger.warning("COM port not connected, skipping transmission")
+                            self._display_transmission_data("✗ COM port not connected - transmission skipped")
+
+                    # Pace entries unless the rate controller paces the link itself;
+                    # in reliable link mode the window paces it: send_batch() waits
+                    # for an acknowledgement only once the window is full
+                    paced = LINK_RATE_ADAPTIVE or self.reliable_link is not None
+                    self._idle(0 if paced else TRANSMISSION_ENTRY_INTERVAL)
+
+                except Exception as e:
+                    self._update_transmission_status(f"Error processing entry {i}: {str(e)[:50]}", "red")
+                    logger.exception("Error processing sensor data ID %s", ids_label, extra={"record_id": record_ids[0]})
+                    continue
+                finally:
+                    # The far end never saw this frame, so later deltas would not decode
+                    if not sent and self.delta_encoder is not None:
+                        self.delta_encoder.force_keyframe()
+                        if self.delta_deliveries is not None:
+                            for record_id in record_ids:
+                                self.delta_deliveries.failed(record_id)
+
+            self._update_transmission_status("All entries processed, waiting for next cycle", "green")
+            self._display_transmission_data("✓ Transmission cycle completed - waiting for next cycle...")
+        else:
+            self._update_transmission_status("No untransmitted data found", "blue")
+            logger.debug("No untransmitted data found")
+            self._display_transmission_data("No untransmitted data found - waiting for new data...")
 
-                            # Wait 5 seconds before processing next entry
-                            time.sleep(5)
+        OUTBOX_DEPTH.set(len(self.outbox))
+        return frames_attempted
 
-                        except Exception as e:
-                            self._update_transmission_status(f"Error processing entry {i}: {str(e)[:50]}", "red")
-                            print(f"Error processing sensor data ID {sensor_data.id}: {e}")
-                            continue
+    def _idle(self, seconds: float) -> None:
+        """
+        Wait between transmissions, servicing the reliable link meanwhile.
 
-                    self._update_transmission_status("All entries processed, waiting for next cycle", "green")
-                    self._display_transmission_data("✓ Transmission cycle completed - waiting for next cycle...")
-                else:
-                    self._update_transmission_status("No untransmitted data found", "blue")
-                    print("No untransmitted data found")
-                    self._display_transmission_data("No untransmitted data found - waiting for new data...")
+        Args:
+            seconds: Time to wait in seconds
+        """
+        if self.reliable_link is None:
+            self._transmission_stopped.wait(seconds)
+        else:
+            self.reliable_link.service_for(seconds)
 
-                # Wait 5 seconds before checking for new untransmitted data
-                time.sleep(5)
+    def _wait_for_backlog(self, seconds: float) -> None:
+        """
+        Wait for new untransmitted data while the outbox has nothing to send.
 
-            except Exception as e:
-                self._update_transmission_status(f"Transmission loop error: {str(e)[:50]}", "red")
-                print(f"Error in transmission loop: {e}")
-                time.sleep(5)  # Wait before retrying
+        Returns early once the prefetch stage has a batch ready, or without
+        a prefetch stage once readings are ingested, unless the reliable
+        link has to be serviced for the whole wait.
+
+        Args:
+            seconds: Maximum time to wait in seconds
+        """
+        if self.reliable_link is not None:
+            self._idle(seconds)
+        elif self.prefetch_stage is not None:
+            self.prefetch_stage.wait_ready(seconds)
+        else:
+            self._backlog_wakeup.wait(seconds)
+            self._backlog_wakeup.clear()
+
+    def _handle_readings_ingested(self, inserted: int) -> None:
+        """
+        Wake the transmitter for readings inserted by the ingest endpoint.
+
+        Runs on the ingest server's writer thread.
+
+        Args:
+            inserted: Number of readings inserted
+        """
+        if self.prefetch_stage is not None:
+            self.prefetch_stage.wakeup()
+        if self.process_pipeline is not None:
+            self.process_pipeline.wakeup()
+        self._backlog_wakeup.set()
+
+    def _transmit_units(self, queued_frames: list) -> list:
+        """
+        Group queued frames into the units put on the link.
+
+        Frames already sent, or still awaiting acknowledgement from the
+        far end, are skipped. With uplink compression, the remaining frames
+        are grouped COMPRESSION_BATCH_SIZE at a time into one compressed
+        frame each; otherwise every frame is a unit of its own.
+
+        Args:
+            queued_frames: (record ID, frame bytes) pairs in send order
+
+        Returns:
+            List of (record IDs, frames) tuples in send order
+        """
+        sendable = []
+        for record_id, frame in queued_frames:
+            # Already sent before a restart, only the database commit is outstanding
+            if record_id in self.ack_journal:
+                self.outbox.ack(record_id)
+                continue
+
+            # Still waiting for the far end to acknowledge it, or for the frame it builds on
+            if self.reliable_link is not None and record_id in self.reliable_link:
+                continue
+            if self.delta_deliveries is not None and record_id in self.delta_deliveries:
+                continue
+
+            sendable.append((record_id, frame.decode()))
+
+        unit_size = 1 if self.compressor is None else COMPRESSION_BATCH_SIZE
+        return [
+            (tuple(record_id for record_id, _ in sendable[start:start + unit_size]),
+             [formatted_data for _, formatted_data in sendable[start:start + unit_size]])
+            for start in range(0, len(sendable), unit_size)
+        ]
+
+    def _encode_unit(self, record_ids: tuple, frames: list) -> str:
+        """
+        Encode a unit of frames for the link, right before it is sent.
+
+        Delta encoding depends on the frames sent before, so units are
+        encoded one at a time in send order.
+
+        Args:
+            record_ids: Database IDs of the frames, in the same order
+            frames: Formatted frames of the unit
+
+        Returns:
+            String to send
+        """
+        if self.delta_encoder is not None:
+            frames = [frame if frame.startswith(SUMMARY_FRAME_PREFIX) else self.delta_encoder.encode(frame)
+                      for frame in frames]
+            if self.delta_deliveries is not None:
+                for record_id, frame in zip(record_ids, frames):
+                    self.delta_deliveries.sent(record_id, frame)
+        if self.compressor is None:
+            return frames[0]
+        with TRACER.span("compress", {"frames": len(frames)}):
+            return self.compressor.compress(frames)
+
+    def _handle_frame_delivered(self, record_id: int) -> None:
+        """
+        Record a successfully sent frame.
+
+        Called on the transmission thread after a plain send, or when the
+        far end acknowledges a frame in reliable link mode.
+
+        Args:
+            record_id: Database ID of the delivered sensor data entry
+        """
+        # Journal the send; the committer marks it as transmitted in the database
+        self.ack_journal.append(record_id)
+        self._recent_deliveries[record_id] = self._delivery_sequence
+        self._delivery_sequence += 1
+        self.outbox.ack(record_id)
+        self._update_transmission_status(f"Successfully transmitted data ID {record_id}", "green")
+        frame_logger.info("Successfully transmitted and journaled data ID %s", record_id, extra={"record_id": record_id})
+        self._display_transmission_data(f"✓ Successfully uploaded data ID {record_id} to satellite\n\r")
+
+    def _handle_frame_acknowledged(self, record_id: int) -> None:
+        """
+        Record a frame the far end acknowledged in reliable link mode.
+
+        With delta encoding, the frame is only delivered once the frame it
+        builds on is, since the far end cannot decode it before.
+
+        Args:
+            record_id: Database ID of the acknowledged sensor data entry
+        """
+        if self.delta_deliveries is None:
+            self._handle_frame_delivered(record_id)
+            return
+        for delivered_id in self.delta_deliveries.delivered(record_id):
+            self._handle_frame_delivered(delivered_id)
+
+    def _handle_frame_failed(self, record_id: int) -> None:
+        """
+        Report a frame the far end never acknowledged.
+
+        The frame stays in the outbox and is sent again next cycle, as do
+        acknowledged delta frames that build on it.
+
+        Args:
+            record_id: Database ID of the undelivered sensor data entry
+        """
+        if self.delta_encoder is not None:
+            self.delta_encoder.force_keyframe()
+        if self.delta_deliveries is not None:
+            for dependent_id in self.delta_deliveries.failed(record_id):
+                logger.warning("Data ID %s builds on undelivered data ID %s, retrying next cycle",
+                               dependent_id, record_id, extra={"record_id": dependent_id})
+        self._update_transmission_status(f"No acknowledgement for data ID {record_id}", "red")
+        logger.warning("No acknowledgement for data ID %s, retrying next cycle", record_id, extra={"record_id": record_id})
+        self._display_transmission_data(f"✗ No acknowledgement for data ID {record_id} - will retry")
+
+    def _ensure_database(self) -> bool:
+        """
+        Make sure the database connection is initialized.
+
+        Retries initialization at most once per DATABASE_RETRY_INTERVAL
+        so a database that was down at start-up is picked up when it returns.
+
+        Returns:
+            True if the database is initialized, False otherwise
+        """
+        with self._database_retry_lock:
+            if self.database_manager.is_initialized:
+                return True
+
+            now = time.monotonic()
+            if now - self._last_database_retry < DATABASE_RETRY_INTERVAL:
+                return False
+
+            self._last_database_retry = now
+            return self.database_manager.initialize()
+
+    def _prefetch_into_outbox(self) -> None:
+        """
+        Plan the next batch and top up the outbox from the database.
+
+        Fetches and applies a planned batch in the transmission loop; used
+        when TRANSMISSION_PREFETCH_DEPTH is 0.
+        """
+        planned_batch = self._fetch_planned_batch()
+        if planned_batch is not None:
+            self._apply_planned_batch(planned_batch)
+
+    def _fetch_planned_batch(self) -> Optional[tuple]:
+        """
+        Fetch and encode the best untransmitted entries for the next plan.
+
+        The best OUTBOX_PREFETCH_LIMIT untransmitted entries for the
+        scheduling policy are fetched in rank order and formatted, or only
+        their stored frames with TRANSMISSION_PRECOMPUTED_FRAMES. Entries
+        sent but not yet committed are excluded. With backlog aggregation,
+        the oldest entries are summarized first while the backlog is deep,
+        and untransmitted summaries are ranked ahead of the entries under
+        their negated ID. Runs on the prefetch stage's thread, or in the
+        transmission loop without one.
+
+        Returns:
+            Tuple of the delivery sequence number when the poll started, the
+            ranked record IDs, their frames and the IDs of entries summarized
+            by this fetch; None if there is nothing to fetch
+        """
+        with TRACER.span("prefetch"):
+            if not self._ensure_database():
+                return None
+
+            # The backlog counter is read in O(1); recount it occasionally to correct drift
+            now = time.monotonic()
+            if self._last_backlog_reconcile is None or now - self._last_backlog_reconcile >= BACKLOG_RECONCILE_INTERVAL:
+                self._last_backlog_reconcile = now
+                self.database_manager.reconcile_backlog_counter()
+
+            backlog_size = self.database_manager.count_untransmitted()
+            if backlog_size is not None:
+                BACKLOG_SIZE.set(backlog_size)
+
+            # Read before the journal, so any send missing from it is numbered at or after this
+            delivery_sequence = self._delivery_sequence
+            pending_ids = self.ack_journal.pending_ids()
+
+            # Summarize the oldest readings while the backlog is deep, and send summaries first
+            summarized_ids = []
+            summaries = []
+            if self.aggregation_policy is not None:
+                window_seconds = self.aggregation_policy.window_for(backlog_size) if backlog_size is not None else None
+                # Summarize no further than the exit level, so the newest readings stay raw
+                limit = min(AGGREGATION_BATCH_ROWS, (backlog_size or 0) - AGGREGATION_EXIT_BACKLOG)
+                if window_seconds is not None and limit > 0:
+                    summarized_ids = self.database_manager.aggregate_backlog(
+                        window_seconds, limit, exclude_ids=pending_ids
+                    ) or []
+                summaries = self.database_manager.get_untransmitted_summaries(
+                    OUTBOX_PREFETCH_LIMIT, exclude_ids=[-record_id for record_id in pending_ids if record_id < 0]
+                )
+            record_ids = [-summary_id for summary_id, _ in summaries]
+            frames = [frame for _, frame in summaries]
+
+            if TRANSMISSION_PRECOMPUTED_FRAMES:
+                pairs = self.database_manager.get_untransmitted_frames(
+                    limit=OUTBOX_PREFETCH_LIMIT, exclude_ids=pending_ids,
+                    order=self.scheduler.query_order
+                )
+                record_ids += [record_id for record_id, _ in pairs]
+                frames += [frame for _, frame in pairs]
+            else:
+                batch = self.database_manager.get_untransmitted_batch(
+                    limit=OUTBOX_PREFETCH_LIMIT, exclude_ids=pending_ids,
+                    order=self.scheduler.query_order
+                )
+                if batch:
+                    record_ids += list(batch.ids)
+                    frames += self.database_manager.format_batch_for_transmission(batch)
+
+            if not record_ids and not summarized_ids:
+                return None
+            return delivery_sequence, record_ids, frames, summarized_ids
+
+    def _apply_planned_batch(self, planned_batch: tuple) -> None:
+        """
+        Rank a planned batch and queue its new frames in the outbox.
+
+        Entries not yet in the outbox are queued, evicting queued frames
+        that fell out of the plan when the outbox is full; evicted frames
+        are fetched again later. Entries delivered since the batch was
+        polled are skipped, as their commit may already have landed.
+        Queued frames of entries that were just summarized are dropped,
+        unless they are awaiting acknowledgement.
+
+        Args:
+            planned_batch: Result of _fetch_planned_batch()
+        """
+        delivery_sequence, record_ids, frames, summarized_ids = planned_batch
+
+        with TRACER.span("prefetch.apply", {"rows": len(record_ids)}):
+            delivered_ids = {record_id for record_id, sequence in self._recent_deliveries.items()
+                             if sequence >= delivery_sequence}
+            # Later batches were polled after this one, so older deliveries no longer matter
+            self._recent_deliveries = {record_id: sequence for record_id, sequence in self._recent_deliveries.items()
+                                       if sequence >= delivery_sequence}
+
+            self.scheduler.plan(record_ids)
+
+            queued_ids = self.outbox.known_ids()
+            for record_id in queued_ids.intersection(summarized_ids):
+                if self.reliable_link is None or record_id not in self.reliable_link:
+                    self.outbox.discard(record_id)
+                    queued_ids.discard(record_id)
+
+            for record_id, formatted_data in zip(record_ids, frames):
+                if record_id in queued_ids or record_id in delivered_ids:
+                    continue
+
+                if len(self.outbox) >= OUTBOX_PREFETCH_LIMIT:
+                    in_flight_ids = {record_id for record_id in queued_ids
+                                     if self.reliable_link is not None and record_id in self.reliable_link}
+                    evicted_id = self.scheduler.eviction_candidate(queued_ids, in_flight_ids)
+                    if evicted_id is None:
+                        break
+                    self.outbox.discard(evicted_id)
+                    queued_ids.discard(evicted_id)
+
+                if not self.outbox.enqueue(record_id, formatted_data.encode()):
+                    break
+                queued_ids.add(record_id)
+
+    def _commit_acknowledged(self, record_ids: list) -> bool:
+        """
+        Mark a batch of journaled entries as transmitted in the database.
+
+        Called from the acknowledgement journal's committer thread.
+
+        Args:
+            record_ids: IDs of entries that have been sent over the link;
+                negated IDs stand for summaries
+
+        Returns:
+            True if the batch was committed, False otherwise
+        """
+        if not self._ensure_database():
+            return False
+        summary_ids = [-record_id for record_id in record_ids if record_id < 0]
+        if summary_ids and not self.database_manager.mark_summaries_as_transmitted(summary_ids):
+            return False
+        return self.database_manager.mark_many_as_transmitted([record_id for record_id in record_ids if record_id > 0])
 
     def _update_transmission_status(self, status: str, color: str = "green") -> None:
         """
@@ -188,7 +779,7 @@ class MizuSensorHub(customtkinter.CTk):
             color: Color of the status text
         """
         # Use after() to update UI from main thread
-        self.after(0, self.main_content_panel.update_transmission_status, status, color)
+        self._schedule_ui_update(self.main_content_panel.update_transmission_status, status, color)
 
     def _display_transmission_data(self, data: str) -> None:
         """
@@ -199,7 +790,79 @@ class MizuSensorHub(customtkinter.CTk):
         Args:
             data: The formatted data string to display
         """
-        self.after(0, self.main_content_panel.update_data_display, data)
+        self._schedule_ui_update(self.main_content_panel.update_data_display, data)
+
+    def _schedule_ui_update(self, callback, *args) -> None:
+        """
+        Run a UI update on the main thread, counting it while it waits.
+
+        Args:
+            callback: UI method to call
+            *args: Arguments for the callback
+        """
+        UI_QUEUE_DEPTH.inc()
+        self.after(0, self._run_ui_update, callback, *args)
+
+    def _run_ui_update(self, callback, *args) -> None:
+        """
+        Run a UI update scheduled by _schedule_ui_update().
+
+        Args:
+            callback: UI method to call
+            *args: Arguments for the callback
+        """
+        UI_QUEUE_DEPTH.dec()
+        callback(*args)
+
+    def _refresh_dashboard(self) -> None:
+        """
+        Update the dashboard from the in-process metrics and reschedule.
+
+        Runs on the UI thread; the backlog size comes from the metrics the
+        transmission thread maintains, so the database is never queried here.
+        """
+        if self.process_pipeline is not None:
+            self._observe_pipeline()
+
+        snapshot = REGISTRY.snapshot()
+        snapshot["link_rate"] = self.rate_controller.rate
+        if self.process_pipeline is not None and self.process_pipeline.is_running:
+            snapshot["link_rate"] = self.process_pipeline.link_rate
+        self.main_content_panel.dashboard_panel.update_metrics(snapshot)
+        self.after(DASHBOARD_REFRESH_INTERVAL, self._refresh_dashboard)
+
+    def _observe_pipeline(self) -> None:
+        """
+        Mirror the status events of the pipeline processes into the metrics and the output window.
+
+        Runs on the UI thread before each dashboard refresh.
+        """
+        backlog_size = self.process_pipeline.backlog_size
+        if backlog_size is not None:
+            BACKLOG_SIZE.set(backlog_size)
+
+        for event in self.process_pipeline.poll_events():
+            if event[0] == EVENT_SENT:
+                _, record_ids, formatted_data = event
+                FRAMES_SENT.inc()
+                BYTES_SENT.inc(len(formatted_data.encode()))
+                self.main_content_panel.update_data_display(f"Uploading to satellite: {formatted_data}")
+            elif event[0] == EVENT_FAILED:
+                SEND_FAILURES.inc()
+                self.main_content_panel.update_data_display(
+                    f"✗ Failed to send data ID {', '.join(map(str, event[1]))} to COM port"
+                )
+            elif event[0] == EVENT_COMMAND:
+                _, command_text, sent = event
+                command_future = Future()
+                command_future.set_result(sent)
+                self._handle_command_result(command_text, command_future)
+
+    def _is_link_connected(self) -> bool:
+        """Whether the serial link is up, in this process or in the pipeline's writer process."""
+        if self.process_pipeline is not None:
+            return self.process_pipeline.is_running
+        return self.serial_manager.is_connected
 
     def _configure_main_window(self) -> None:
         """
@@ -288,7 +951,7 @@ class MizuSensorHub(customtkinter.CTk):
         If currently disconnected, attempts to establish a connection.
         If currently connected, closes the existing connection.
         """
-        if self.serial_manager.is_connected:
+        if self._is_link_connected():
             self._close_serial_connection()
         else:
             self._establish_serial_connection()
@@ -312,10 +975,27 @@ class MizuSensorHub(customtkinter.CTk):
         if baud_rate is None:
             return
 
+        # The writer process opens the port and the pipeline transmits on its own
+        if self.process_pipeline is not None:
+            if self.process_pipeline.start(selected_port, baud_rate, selected_os):
+                self.connection_panel.update_connection_button_state(True)
+                self._update_transmission_status("Transmitting from pipeline processes", "green")
+            else:
+                self.error_handler.handle_connection_failure(selected_port, "Connection failed")
+            return
+
+        # The previous connection's transmission thread must exit first
+        if self._is_transmission_stopping():
+            logger.info("Still stopping the previous transmission loop; connect again shortly")
+            return
+
         # Attempt to establish connection
         if self.serial_manager.connect(selected_port, baud_rate, selected_os):
             # Update UI state on successful connection
             self.connection_panel.update_connection_button_state(True)
+            # Acknowledgements arrive on the receive path in reliable link mode
+            if self.reliable_link is not None:
+                self.serial_manager.start_data_monitoring()
             # Start transmission loop when connection is established
             self._start_transmission_loop()
         else:
@@ -326,9 +1006,29 @@ class MizuSensorHub(customtkinter.CTk):
         """
         Close the active serial connection and update UI state.
         """
-        # Stop transmission loop before disconnecting
-        self._stop_transmission_loop()
+        # The writer process commits what it sent and closes the port
+        if self.process_pipeline is not None:
+            self.process_pipeline.stop()
+            self.connection_panel.update_connection_button_state(False)
+            return
+
+        # Stop the transmission loop; disconnecting abandons the frame being
+        # written, so the thread exits promptly and the frame stays queued
+        self._stop_transmission_loop(self._finish_closing_serial_connection)
         self.serial_manager.disconnect()
+
+    def _finish_closing_serial_connection(self) -> None:
+        """
+        Reset the link state once the transmission thread has exited.
+        """
+        # Unacknowledged frames stay in the outbox and are sent again later
+        if self.reliable_link is not None:
+            self.reliable_link.reset()
+        if self.delta_deliveries is not None:
+            self.delta_deliveries.reset()
+        # Start every device with a keyframe on the next connection
+        if self.delta_encoder is not None:
+            self.delta_encoder.force_keyframe()
         self.connection_panel.update_connection_button_state(False)
 
     def _send_serial_command(self) -> None:
@@ -343,17 +1043,40 @@ class MizuSensorHub(customtkinter.CTk):
 
         # Validate command and connection
         if not self.error_handler.handle_command_validation(
-            self.serial_manager.is_connected, command_text
+            self._is_link_connected(), command_text
         ):
             return
 
-        # Send command through serial manager
-        if not self.serial_manager.send_command(command_text):
+        # The writer process sends it before its next unit and reports the result as an event
+        if self.process_pipeline is not None:
+            if not self.process_pipeline.submit_command(command_text):
+                self.error_handler.handle_send_failure("Failed to send command")
+            self.main_content_panel.clear_command_input()
+            return
+
+        # Queue the command ahead of the backlog; the writer thread sends it
+        # between frames and the result is reported back on the UI thread
+        command_future = self.serial_manager.submit_command(command_text, PRIORITY_URGENT)
+        command_future.add_done_callback(
+            lambda future: self.after(0, self._handle_command_result, command_text, future)
+        )
+        self.main_content_panel.clear_command_input()
+
+    def _handle_command_result(self, command_text: str, command_future: Future) -> None:
+        """
+        Report the outcome of a manual command once it has been written.
+
+        Args:
+            command_text: The command that was sent
+            command_future: Future returned by SerialManager.submit_command()
+        """
+        if command_future.exception() is not None or not command_future.result():
             # Handle send failure
             self.error_handler.handle_send_failure("Failed to send command")
         else:
-            # Clear command input on successful send
-            self.main_content_panel.clear_command_input()
+            self.main_content_panel.update_data_display(
+                SUCCESS_MESSAGES["command_sent"].format(command=command_text)
+            )
 
     def _handle_received_data(self, data: str) -> None:
         """
@@ -366,7 +1089,7 @@ class MizuSensorHub(customtkinter.CTk):
             data: The received data string
         """
         # Update the data display in the main thread
-        self.after(0, self.main_content_panel.update_data_display, data)
+        self._schedule_ui_update(self.main_content_panel.update_data_display, data)
 
     def _handle_window_close(self, event=None) -> None:
         """
@@ -383,7 +1106,7 @@ class MizuSensorHub(customtkinter.CTk):
             try:
                 self._close_serial_connection()
             except Exception as cleanup_error:
-                print(f"Error during connection cleanup: {cleanup_error}")
+                logger.error("Error during connection cleanup: %s", cleanup_error)
 
         # Ask user for confirmation before closing
         user_confirmation = self.error_handler.ask_confirmation(
@@ -399,14 +1122,42 @@ class MizuSensorHub(customtkinter.CTk):
         Perform final cleanup and terminate the application.
 
         Ensures all resources are properly released and the
-        application is cleanly shut down.
+        application is cleanly shut down. The outbox and journal are
+        closed and the window destroyed once the transmission thread has
+        exited.
         """
-        # Clean up serial manager
+        # Stop the pipeline processes; the writer commits what it sent
+        if self.process_pipeline is not None:
+            self.process_pipeline.stop()
+
+        # Stop accepting readings; queued ones are still written
+        if self.ingest_server is not None:
+            self.ingest_server.stop()
+
+        # Stop the transmission thread and the prefetch stage; closing the
+        # serial connection abandons the frame being written
+        self._stop_transmission_loop(self._release_and_destroy)
         self.serial_manager.cleanup()
 
-        # The transmission thread is a daemon thread, so it will automatically
-        # terminate when the main thread ends, but we can add a flag if needed
-        # in the future for more graceful shutdown
+    def _release_and_destroy(self) -> None:
+        """
+        Release the remaining resources and destroy the main window.
+
+        Runs once the transmission thread has exited, so nothing is
+        acknowledged after the outbox and journal are closed.
+        """
+        # Flush and release the outbox segment
+        self.outbox.close()
+
+        # Commit outstanding acknowledgements and release the journal
+        self.ack_journal.close()
+
+        # Release the metrics port
+        if self.metrics_server is not None:
+            self.metrics_server.stop()
+
+        # Flush and close the trace sink
+        TRACER.set_sink(None)
 
         # Destroy the main window
         self.destroy()
@@ -433,11 +1184,20 @@ def main() -> None:
     Creates and starts the main application window, beginning
     the event loop that handles user interactions.
     """
-    # Create the main application instance
-    sensor_hub_app = MizuSensorHub()
-
-    # Start the main event loop
-    sensor_hub_app.mainloop()
+    # Log through a background writer so hot paths only enqueue records
+    configure_logging(
+        LOG_LEVEL, LOG_FILE, max_bytes=LOG_MAX_BYTES, backup_count=LOG_BACKUP_COUNT,
+        frame_sample_rate=LOG_FRAME_SAMPLE_RATE
+    )
+
+    try:
+        # Create the main application instance
+        sensor_hub_app = MizuSensorHub()
+
+        # Start the main event loop
+        sensor_hub_app.mainloop()
+    finally:
+        shutdown_logging()
 
 
 if __name__ == "__main__":
@@ -0,0 +1,322 @@
+"""
+Write-ahead outbox for MIZU Ground Station.
+
+This module provides a local, crash-safe queue of uplink frames that sits
+between the database and the serial link. Frames are prefetched from the
+database into an append-only, memory-mapped segment file so transmission
+can continue while the database is unreachable.
+"""
+
+import mmap
+import os
+import struct
+import time
+import zlib
+from collections import OrderedDict
+from typing import List, Set, Tuple
+
+# Segment file header: magic + format version
+SEGMENT_MAGIC = b"MZOB"
+SEGMENT_VERSION = 1
+SEGMENT_HEADER = struct.Struct("<4sH2x")
+
+# Entry layout: kind, record id, payload length, payload, crc32
+ENTRY_HEADER = struct.Struct("<BqI")
+ENTRY_CRC = struct.Struct("<I")
+ENTRY_OVERHEAD = ENTRY_HEADER.size + ENTRY_CRC.size
+
+# Entry kinds
+ENTRY_ENQUEUE = 1
+ENTRY_ACK = 2  # frame retired: sent, or evicted to be fetched again later
+
+SEGMENT_PREFIX = "segment-"
+SEGMENT_SUFFIX = ".dat"
+
+
+class OutboxQueue:
+    """
+    Append-only, memory-mapped queue of frames awaiting uplink.
+
+    Every state change is appended to the active segment as a checksummed
+    entry: a frame is enqueued, and acknowledged once it has been sent.
+    Recording the send in the database is left to the acknowledgement
+    journal. When the segment fills up, the pending frames are compacted
+    into a fresh segment and the old one is removed. On start-up the
+    segment is scanned and the state rebuilt; a torn entry at the tail is
+    discarded.
+    """
+
+    def __init__(self, directory: str, segment_size: int,
+                 fsync_batch: int = 1, fsync_interval: float = 0.0) -> None:
+        """
+        Initialize the outbox and recover any state left on disk.
+
+        Args:
+            directory: Directory holding the segment files
+            segment_size: Size of a segment file in bytes
+            fsync_batch: Number of appends between flushes to disk
+            fsync_interval: Maximum seconds between flushes to disk
+        """
+        self.directory = directory
+        self.segment_size = segment_size
+        self.fsync_batch = max(1, fsync_batch)
+        self.fsync_interval = fsync_interval
+
+        self._pending: "OrderedDict[int, bytes]" = OrderedDict()
+        self._segment_number = 0
+        self._file = None
+        self._map = None
+        self._offset = SEGMENT_HEADER.size
+        self._unsynced_appends = 0
+        self._last_sync = time.monotonic()
+
+        os.makedirs(self.directory, exist_ok=True)
+        self._recover()
+
+    def __len__(self) -> int:
+        """Return the number of frames waiting to be sent."""
+        return len(self._pending)
+
+    def enqueue(self, record_id: int, frame: bytes) -> bool:
+        """
+        Append a frame to the outbox.
+
+        Args:
+            record_id: Database ID of the sensor data entry
+            frame: Encoded frame to transmit
+
+        Returns:
+            True if the frame was queued, False if the outbox is full
+        """
+        if record_id in self._pending:
+            return True
+
+        entry_size = ENTRY_OVERHEAD + len(frame)
+        if not self._has_room(entry_size, reserved_entries=len(self._pending) + 1):
+            self._rotate()
+            if not self._has_room(entry_size, reserved_entries=len(self._pending) + 1):
+                return False
+
+        self._append(ENTRY_ENQUEUE, record_id, frame)
+        self._pending[record_id] = frame
+        return True
+
+    def pending(self) -> List[Tuple[int, bytes]]:
+        """
+        Get the frames waiting to be sent, oldest first.
+
+        Returns:
+            List of (record_id, frame) tuples
+        """
+        return list(self._pending.items())
+
+    def ack(self, record_id: int) -> None:
+        """
+        Record that a frame has been sent over the link.
+
+        Args:
+            record_id: Database ID of the sent sensor data entry
+        """
+        if record_id not in self._pending:
+            return
+
+        if self._offset + ENTRY_OVERHEAD > len(self._map):
+            self._rotate()
+        self._append(ENTRY_ACK, record_id, b"")
+        del self._pending[record_id]
+
+    def discard(self, record_id: int) -> None:
+        """
+        Drop a frame without sending it, e.g. to make room for a better one.
+
+        The entry is still untransmitted in the database and will be
+        prefetched again later.
+
+        Args:
+            record_id: Database ID of the sensor data entry
+        """
+        self.ack(record_id)
+
+    def known_ids(self) -> Set[int]:
+        """
+        Get every record ID waiting in the outbox.
+
+        Returns:
+            Set of pending record IDs
+        """
+        return set(self._pending)
+
+    def sync(self) -> None:
+        """Flush all appended entries to disk."""
+        if self._map is not None and self._unsynced_appends:
+            self._map.flush()
+        self._unsynced_appends = 0
+        self._last_sync = time.monotonic()
+
+    def close(self) -> None:
+        """Flush outstanding entries and release the segment file."""
+        if self._map is None:
+            return
+        self.sync()
+        self._map.close()
+        self._file.close()
+        self._map = None
+        self._file = None
+
+    def _has_room(self, entry_size: int, reserved_entries: int) -> bool:
+        """
+        Check whether an entry fits while leaving room for later acks.
+
+        Args:
+            entry_size: Size of the entry to append
+            reserved_entries: Number of pending frames that still need an ack entry
+        """
+        reserved = reserved_entries * ENTRY_OVERHEAD
+        return self._offset + entry_size + reserved <= len(self._map)
+
+    def _append(self, kind: int, record_id: int, payload: bytes) -> None:
+        """
+        Write a single entry at the end of the active segment.
+
+        Args:
+            kind: Entry kind (ENTRY_ENQUEUE or ENTRY_ACK)
+            record_id: Record ID the entry refers to
+            payload: Entry payload (the frame for enqueue entries)
+        """
+        self._offset = self._write_entry(self._map, self._offset, kind, record_id, payload)
+        self._unsynced_appends += 1
+
+        if (self._unsynced_appends >= self.fsync_batch or
+                time.monotonic() - self._last_sync >= self.fsync_interval):
+            self.sync()
+
+    @staticmethod
+    def _write_entry(buffer, offset: int, kind: int, record_id: int, payload: bytes) -> int:
+        """
+        Serialize an entry into a segment buffer.
+
+        Returns:
+            Offset just past the written entry
+        """
+        header = ENTRY_HEADER.pack(kind, record_id, len(payload))
+        crc = zlib.crc32(payload, zlib.crc32(header))
+        end = offset + ENTRY_HEADER.size + len(payload)
+        buffer[offset:offset + ENTRY_HEADER.size] = header
+        buffer[offset + ENTRY_HEADER.size:end] = payload
+        buffer[end:end + ENTRY_CRC.size] = ENTRY_CRC.pack(crc)
+        return end + ENTRY_CRC.size
+
+    def _segment_path(self, number: int) -> str:
+        """Get the path of a segment file by number."""
+        return os.path.join(self.directory, f"{SEGMENT_PREFIX}{number:06d}{SEGMENT_SUFFIX}")
+
+    def _existing_segments(self) -> List[int]:
+        """List the numbers of segment files on disk, in ascending order."""
+        numbers = []
+        for name in os.listdir(self.directory):
+            if name.endswith(".tmp"):
+                # Leftover from an interrupted compaction
+                os.remove(os.path.join(self.directory, name))
+            elif name.startswith(SEGMENT_PREFIX) and name.endswith(SEGMENT_SUFFIX):
+                try:
+                    numbers.append(int(name[len(SEGMENT_PREFIX):-len(SEGMENT_SUFFIX)]))
+                except ValueError:
+                    continue
+        return sorted(numbers)
+
+    def _recover(self) -> None:
+        """Rebuild the queue state from the newest segment on disk."""
+        segments = self._existing_segments()
+
+        if not segments:
+            self._segment_number = 1
+            self._create_segment(self._segment_path(self._segment_number), [])
+            self._open_segment()
+            return
+
+        # A completed compaction leaves the newest segment holding the full live state
+        self._segment_number = segments[-1]
+        for stale_number in segments[:-1]:
+            os.remove(self._segment_path(stale_number))
+
+        self._open_segment()
+        self._scan_segment()
+
+    def _open_segment(self) -> None:
+        """Memory-map the active segment file."""
+        path = self._segment_path(self._segment_number)
+        self._file = open(path, "r+b")
+        # Grow segments written with a smaller configured size
+        if os.path.getsize(path) < self.segment_size:
+            self._file.truncate(self.segment_size)
+        self._map = mmap.mmap(self._file.fileno(), 0)
+        self._offset = SEGMENT_HEADER.size
+
+    def _scan_segment(self) -> None:
+        """Replay the entries of the active segment into memory."""
+        magic, version = SEGMENT_HEADER.unpack_from(self._map, 0)
+        if magic != SEGMENT_MAGIC or version != SEGMENT_VERSION:
+            raise ValueError(f"Unrecognized outbox segment: {self._segment_path(self._segment_number)}")
+
+        segment_end = len(self._map)
+        offset = SEGMENT_HEADER.size
+        while offset + ENTRY_OVERHEAD <= segment_end:
+            kind, record_id, length = ENTRY_HEADER.unpack_from(self._map, offset)
+            end = offset + ENTRY_HEADER.size + length
+            if kind == 0 or end + ENTRY_CRC.size > segment_end:
+                break
+
+            payload = bytes(self._map[offset + ENTRY_HEADER.size:end])
+            (stored_crc,) = ENTRY_CRC.unpack_from(self._map, end)
+            header = bytes(self._map[offset:offset + ENTRY_HEADER.size])
+            if zlib.crc32(payload, zlib.crc32(header)) != stored_crc:
+                # Torn write at the tail: everything after it is discarded
+                break
+
+            if kind == ENTRY_ENQUEUE:
+                self._pending[record_id] = payload
+            elif kind == ENTRY_ACK:
+                self._pending.pop(record_id, None)
+
+            offset = end + ENTRY_CRC.size
+
+        self._offset = offset
+        # Clear a torn entry's kind byte so the next scan stops at the same place
+        if offset < segment_end:
+            self._map[offset] = 0
+
+    def _create_segment(self, path: str, entries: List[Tuple[int, int, bytes]]) -> None:
+        """
+        Create a segment file atomically, pre-filled with the given entries.
+
+        Args:
+            path: Final path of the segment file
+            entries: List of (kind, record_id, payload) tuples to write
+        """
+        temp_path = path + ".tmp"
+        with open(temp_path, "w+b") as segment_file:
+            segment_file.truncate(self.segment_size)
+            with mmap.mmap(segment_file.fileno(), self.segment_size) as buffer:
+                SEGMENT_HEADER.pack_into(buffer, 0, SEGMENT_MAGIC, SEGMENT_VERSION)
+                offset = SEGMENT_HEADER.size
+                for kind, record_id, payload in entries:
+                    offset = self._write_entry(buffer, offset, kind, record_id, payload)
+                buffer.flush()
+            os.fsync(segment_file.fileno())
+        os.replace(temp_path, path)
+
+    def _rotate(self) -> None:
+        """Compact the pending frames into a new segment and drop the old one."""
+        entries = [(ENTRY_ENQUEUE, record_id, frame) for record_id, frame in self._pending.items()]
+
+        old_number = self._segment_number
+        self.close()
+
+        self._segment_number = old_number + 1
+        self._create_segment(self._segment_path(self._segment_number), entries)
+        os.remove(self._segment_path(old_number))
+
+        self._open_segment()
+        self._offset = SEGMENT_HEADER.size + sum(
+            ENTRY_OVERHEAD + len(payload) for _, _, payload in entries
+        )
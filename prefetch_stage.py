@@ -0,0 +1,133 @@
+"""
+Prefetch stage for MIZU Ground Station.
+
+This module runs the database side of the transmission pipeline on its
+own thread: while the current batch is on the wire, the next batches are
+fetched and encoded and wait in a bounded queue, so the serial link does
+not wait on the database during a backlog drain.
+"""
+
+import logging
+import queue
+import threading
+from typing import Any, Callable, List, Optional
+
+logger = logging.getLogger(__name__)
+
+# Seconds between checks for a stop request while the queue is full
+PUT_POLL_INTERVAL = 0.5
+
+
+class PrefetchStage:
+    """
+    Background producer of prefetched batches.
+
+    A worker thread calls the fetch function repeatedly and places each
+    result in a queue of at most `depth` batches; it blocks while the
+    queue is full, so no more than `depth` batches are prepared ahead of
+    the consumer. When the fetch function returns None (nothing to send,
+    or the database is unavailable) the worker waits for `idle_interval`
+    seconds or until woken.
+    """
+
+    def __init__(self, fetch_function: Callable[[], Optional[Any]], depth: int = 2,
+                 idle_interval: float = 5.0) -> None:
+        """
+        Initialize the stage.
+
+        Args:
+            fetch_function: Fetches and encodes one batch, or returns None when there is nothing to fetch
+            depth: Maximum number of batches waiting for the consumer
+            idle_interval: Seconds to wait after a fetch returned nothing
+        """
+        self.fetch_function = fetch_function
+        self.depth = max(1, depth)
+        self.idle_interval = idle_interval
+
+        self._results: "queue.Queue[Any]" = queue.Queue(maxsize=self.depth)
+        self._ready = threading.Event()
+        self._wakeup = threading.Event()
+        self._should_fetch = False
+        self._thread: Optional[threading.Thread] = None
+
+    def __len__(self) -> int:
+        """Return the number of batches waiting for the consumer."""
+        return self._results.qsize()
+
+    def start(self) -> None:
+        """Start the worker thread."""
+        if self._thread is not None and self._thread.is_alive():
+            return
+
+        self._should_fetch = True
+        self._thread = threading.Thread(target=self._fetch_loop, daemon=True)
+        self._thread.start()
+
+    def stop(self, timeout: float = 5.0) -> None:
+        """
+        Stop the worker thread.
+
+        Args:
+            timeout: Seconds to wait for the worker thread to finish
+        """
+        self._should_fetch = False
+        self._wakeup.set()
+        # Release a consumer waiting in wait_ready()
+        self._ready.set()
+        if self._thread is not None:
+            self._thread.join(timeout)
+            self._thread = None
+
+    def wakeup(self) -> None:
+        """Ask an idle worker to fetch again now."""
+        self._wakeup.set()
+
+    def wait_ready(self, timeout: float) -> bool:
+        """
+        Wait until a batch is waiting for the consumer.
+
+        Args:
+            timeout: Maximum seconds to wait
+
+        Returns:
+            True if a batch is ready or the stage was stopped, False on timeout
+        """
+        return self._ready.wait(timeout)
+
+    def take_all(self) -> List[Any]:
+        """
+        Take every waiting batch without blocking.
+
+        Returns:
+            Batches in the order they were fetched, possibly empty
+        """
+        # Clear before draining, so a batch put meanwhile sets the flag again
+        self._ready.clear()
+        batches = []
+        while True:
+            try:
+                batches.append(self._results.get_nowait())
+            except queue.Empty:
+                return batches
+
+    def _fetch_loop(self) -> None:
+        """Fetch batches into the queue until stopped."""
+        while self._should_fetch:
+            try:
+                result = self.fetch_function()
+            except Exception as e:
+                logger.error("Error prefetching batch: %s", e)
+                result = None
+
+            if result is None:
+                self._wakeup.wait(self.idle_interval)
+                self._wakeup.clear()
+                continue
+
+            while self._should_fetch:
+                try:
+                    self._results.put(result, timeout=PUT_POLL_INTERVAL)
+                except queue.Full:
+                    continue
+                self._ready.set()
+                break
@@ -0,0 +1,509 @@
+"""
+Multi-process transmission pipeline for MIZU Ground Station.
+
+With PIPELINE_PROCESSES enabled, the transmission path runs outside the
+GUI process, in three processes connected by shared-memory rings
+(shared_ring.py):
+
+    database reader --frames--> encoder --units--> serial writer
+           ^                                            |
+           +------------------ feedback ----------------+
+
+The reader polls untransmitted frames in scheduling order, the encoder
+delta-encodes and compresses them into units, and the writer owns the
+serial port, records every sent unit in its own acknowledgement journal
+and commits it to the database. The writer tells the reader which
+entries were committed or failed, so the reader neither re-reads entries
+in flight nor loses failed ones. The GUI only observes: it forwards
+manual commands and drains a ring of status events.
+
+Units are encoded ahead of the link, so after a failed send the units
+already encoded carry deltas the far end will never be able to apply.
+The writer counts failures in a shared resync epoch; the encoder starts
+every device with a keyframe when the epoch changes and tags each unit
+with the epoch it was encoded in, and the writer hands units from an
+older epoch back to the reader unsent.
+
+Backlog aggregation and the reliable link are not available in this
+mode; the threaded transmission loop in mizu_ground_station.py supports
+every feature.
+"""
+
+import logging
+import pickle
+import time
+from multiprocessing import get_context
+from typing import List, Optional
+
+from config import (
+    ACK_JOURNAL_COMMIT_BATCH, ACK_JOURNAL_COMMIT_INTERVAL, ACK_JOURNAL_FSYNC_BATCH, ACK_JOURNAL_MAX_SIZE,
+    COMPRESSION_BATCH_SIZE, COMPRESSION_DICTIONARY_DIRECTORY, COMPRESSION_DICTIONARY_ID, COMPRESSION_ENABLED,
+    COMPRESSION_LEVEL, DATABASE_RETRY_INTERVAL, DELTA_ENCODING_ENABLED, DELTA_FIELD_PRECISION,
+    DELTA_KEYFRAME_INTERVAL, LINK_RATE_ADAPTIVE, LINK_RATE_DECREASE_FACTOR, LINK_RATE_INCREASE_STEP,
+    LINK_RATE_INITIAL, LINK_RATE_MIN, LINK_RATE_STALL_FACTOR, LOG_LEVEL, OUTBOX_PREFETCH_LIMIT,
+    PIPELINE_ACK_JOURNAL_PATH, PIPELINE_POLL_INTERVAL, PIPELINE_RING_SLOTS, PIPELINE_SLOT_SIZE,
+    PIPELINE_STOP_TIMEOUT, TRANSMISSION_ENTRY_INTERVAL, TRANSMIT_SCHEDULING_POLICY
+)
+from shared_ring import SharedRingBuffer
+
+logger = logging.getLogger(__name__)
+
+# Status events from the writer to the observer
+EVENT_CONNECTED = "connected"  # (EVENT_CONNECTED, success)
+EVENT_SENT = "sent"  # (EVENT_SENT, record IDs, sent string)
+EVENT_FAILED = "failed"  # (EVENT_FAILED, record IDs)
+EVENT_COMMAND = "command"  # (EVENT_COMMAND, command, success)
+
+# Feedback from the writer to the reader
+_FEEDBACK_COMMITTED = "committed"
+_FEEDBACK_FAILED = "failed"
+_FEEDBACK_REJECTED = "rejected"  # too large for a ring slot; not read again until restart
+
+# Record IDs per feedback message, so a message fits in a slot
+_FEEDBACK_CHUNK = 256
+
+# Seconds a blocked ring operation waits before checking for a stop
+_RING_POLL_INTERVAL = 0.2
+
+# Seconds start() waits for the writer to open the serial port
+_CONNECT_TIMEOUT = 10.0
+
+
+class ProcessPipeline:
+    """Runs the database reader, encoder and serial writer as separate processes."""
+
+    def __init__(self, database_url: str, slot_count: int = PIPELINE_RING_SLOTS,
+                 slot_size: int = PIPELINE_SLOT_SIZE) -> None:
+        """
+        Initialize the pipeline; no process runs until start().
+
+        Args:
+            database_url: SQLAlchemy URL the reader and writer connect to
+            slot_count: Slots per ring
+            slot_size: Largest message per slot in bytes
+        """
+        self.database_url = database_url
+        self.slot_count = slot_count
+        self.slot_size = slot_size
+        self._context = get_context("spawn")
+        self._processes = []
+        self._rings = {}
+        self._stop_event = None
+        self._wakeup_event = None
+        self._resync_epoch = None
+        self._backlog_size = None
+        self._link_rate = None
+
+    @property
+    def is_running(self) -> bool:
+        """Whether the pipeline processes were started and not stopped."""
+        return bool(self._processes)
+
+    @property
+    def backlog_size(self) -> Optional[int]:
+        """Untransmitted entries last counted by the reader, if known."""
+        if self._backlog_size is None or self._backlog_size.value < 0:
+            return None
+        return self._backlog_size.value
+
+    @property
+    def link_rate(self) -> Optional[float]:
+        """Current link rate of the writer in characters per second, if running."""
+        return self._link_rate.value if self._link_rate is not None else None
+
+    def start(self, port: str, baud_rate: int, os_type: int) -> bool:
+        """
+        Start the processes and wait for the writer to open the serial port.
+
+        Args:
+            port: Serial port, as for SerialManager.connect()
+            baud_rate: Baud rate of the serial port
+            os_type: Operating system type (OS_WINDOWS or OS_LINUX)
+
+        Returns:
+            True if the pipeline is running, False if the port could not be opened
+        """
+        if self.is_running:
+            return True
+
+        context = self._context
+        self._rings = {
+            name: SharedRingBuffer(self.slot_count, self.slot_size, context)
+            for name in ("frames", "units", "feedback", "commands", "status")
+        }
+        self._stop_event = context.Event()
+        self._wakeup_event = context.Event()
+        # Kept referenced while the processes run: collecting a synchronized
+        # object unlinks its semaphore, which a starting process may not have
+        # attached to yet
+        self._resync_epoch = context.Value("i", 0)
+        self._backlog_size = context.Value("q", -1, lock=False)
+        self._link_rate = context.Value("d", LINK_RATE_INITIAL, lock=False)
+
+        rings = self._rings
+        self._processes = [
+            context.Process(target=run_writer, name="mizu-serial-writer", daemon=True, args=(
+                port, baud_rate, os_type, self.database_url, rings["units"], rings["feedback"],
+                rings["commands"], rings["status"], self._resync_epoch, self._link_rate, self._stop_event
+            )),
+            context.Process(target=run_encoder, name="mizu-encoder", daemon=True, args=(
+                rings["frames"], rings["units"], self._resync_epoch, self._stop_event
+            )),
+            context.Process(target=run_reader, name="mizu-db-reader", daemon=True, args=(
+                self.database_url, rings["frames"], rings["feedback"], self._backlog_size, self._wakeup_event,
+                self._stop_event
+            )),
+        ]
+        for process in self._processes:
+            process.start()
+
+        event = _get(rings["status"], _CONNECT_TIMEOUT)
+        if event != (EVENT_CONNECTED, True):
+            logger.error("Serial writer process could not open %s", port)
+            self.stop()
+            return False
+
+        logger.info("Transmission pipeline running in %d processes", len(self._processes))
+        return True
+
+    def stop(self) -> None:
+        """Stop the processes, letting the writer commit what it sent, and free the rings."""
+        if self._stop_event is not None:
+            self._stop_event.set()
+
+        deadline = time.monotonic() + PIPELINE_STOP_TIMEOUT
+        for process in self._processes:
+            process.join(max(0.0, deadline - time.monotonic()))
+            if process.is_alive():
+                logger.warning("Terminating pipeline process %s", process.name)
+                process.terminate()
+                process.join()
+        self._processes = []
+
+        for ring in self._rings.values():
+            ring.close()
+        self._rings = {}
+        self._wakeup_event = None
+        self._resync_epoch = None
+        self._link_rate = None
+
+    def wakeup(self) -> None:
+        """Ask an idle reader to poll for untransmitted entries now, e.g. after readings were ingested."""
+        wakeup_event = self._wakeup_event
+        if wakeup_event is not None:
+            wakeup_event.set()
+
+    def submit_command(self, command: str) -> bool:
+        """
+        Queue a manual command for the writer, ahead of the backlog.
+
+        Returns:
+            True if queued; the outcome arrives as an EVENT_COMMAND event
+        """
+        if not self.is_running:
+            return False
+        return self._rings["commands"].put(pickle.dumps(command), timeout=0)
+
+    def poll_events(self, limit: int = 100) -> List[tuple]:
+        """
+        Take the status events reported by the writer, without blocking.
+
+        Events are dropped by the writer while this ring is full, so the
+        observer may miss some under load; the database stays authoritative.
+
+        Args:
+            limit: Maximum number of events to take
+
+        Returns:
+            Events in the order they were reported
+        """
+        events = []
+        while self.is_running and len(events) < limit:
+            event = _get(self._rings["status"], 0)
+            if event is None:
+                break
+            events.append(event)
+        return events
+
+
+def _get(ring: SharedRingBuffer, timeout: Optional[float]):
+    """Take and unpickle the next message of a ring, or None."""
+    message = ring.get(timeout)
+    return None if message is None else pickle.loads(message)
+
+
+def _put(ring: SharedRingBuffer, message, stop_event, while_waiting=None) -> bool:
+    """
+    Pickle a message into a ring, waiting for room until stopped.
+
+    Args:
+        ring: Ring to write to
+        message: Picklable message
+        stop_event: Event that ends the wait
+        while_waiting: Called between waits, e.g. to drain the process's own input
+
+    Returns:
+        True if written, False if stopped first
+    """
+    data = pickle.dumps(message)
+    while not ring.put(data, _RING_POLL_INTERVAL):
+        if stop_event.is_set():
+            return False
+        if while_waiting is not None:
+            while_waiting()
+    return True
+
+
+def _configure_process_logging() -> None:
+    """Log to stderr in a pipeline process, which starts without the GUI's handlers."""
+    logging.basicConfig(level=LOG_LEVEL, format="%(asctime)s %(processName)s %(name)s %(levelname)s %(message)s")
+
+
+def run_reader(database_url: str, frames_ring: SharedRingBuffer, feedback_ring: SharedRingBuffer,
+               backlog_size, wakeup_event, stop_event) -> None:
+    """
+    Database reader process: feed untransmitted frames to the encoder.
+
+    At most OUTBOX_PREFETCH_LIMIT entries are in flight between the reader
+    and their commit; they are excluded from the next polls until the
+    writer reports them committed, or failed and due to be read again.
+    Entries whose frame does not fit in a ring slot stay untransmitted and
+    are not read again until the pipeline is restarted. When there is
+    nothing to read, the reader polls again every PIPELINE_POLL_INTERVAL,
+    or as soon as ProcessPipeline.wakeup() is called.
+    """
+    from database_manager import DatabaseManager
+    from transmit_scheduler import POLICY_QUERY_ORDERS
+
+    _configure_process_logging()
+    database_manager = DatabaseManager(database_url)
+    database_manager.initialize()
+    last_database_retry = time.monotonic()
+    order = POLICY_QUERY_ORDERS[TRANSMIT_SCHEDULING_POLICY]
+    in_flight = set()
+    rejected = set()
+
+    def apply_feedback(timeout: float = 0) -> bool:
+        message = _get(feedback_ring, timeout)
+        applied = message is not None
+        while message is not None:
+            in_flight.difference_update(message[1])
+            if message[0] == _FEEDBACK_REJECTED:
+                rejected.update(message[1])
+            message = _get(feedback_ring, 0)
+        return applied
+
+    def wait_for_backlog() -> None:
+        # Until entries in flight are settled, readings are ingested or the poll interval passes
+        deadline = time.monotonic() + PIPELINE_POLL_INTERVAL
+        while not stop_event.is_set() and not wakeup_event.is_set():
+            remaining = deadline - time.monotonic()
+            if remaining <= 0 or apply_feedback(min(remaining, _RING_POLL_INTERVAL)):
+                break
+        wakeup_event.clear()
+
+    while not stop_event.is_set():
+        apply_feedback()
+
+        if not database_manager.is_initialized:
+            if time.monotonic() - last_database_retry >= DATABASE_RETRY_INTERVAL:
+                last_database_retry = time.monotonic()
+                database_manager.initialize()
+            stop_event.wait(PIPELINE_POLL_INTERVAL)
+            continue
+
+        count = database_manager.count_untransmitted()
+        backlog_size.value = count if count is not None else -1
+
+        room = OUTBOX_PREFETCH_LIMIT - len(in_flight)
+        pairs = database_manager.get_untransmitted_frames(
+            limit=room, exclude_ids=in_flight | rejected, order=order
+        ) if room > 0 else []
+        if not pairs:
+            wait_for_backlog()
+            continue
+
+        for record_id, frame in pairs:
+            try:
+                if not _put(frames_ring, (record_id, frame), stop_event, apply_feedback):
+                    return
+            except ValueError as e:
+                logger.error("Frame of entry %s not sent: %s", record_id, e)
+                rejected.add(record_id)
+                continue
+            in_flight.add(record_id)
+
+
+def run_encoder(frames_ring: SharedRingBuffer, units_ring: SharedRingBuffer, resync_epoch, stop_event) -> None:
+    """
+    Encoder process: delta-encode and compress frames into units for the writer.
+
+    Frames already waiting are grouped COMPRESSION_BATCH_SIZE at a time
+    when compression is enabled; a compressed unit that would not fit in
+    a slot is sent as separate frames instead. A frame that does not fit
+    on its own is passed on without data, for the writer to reject.
+    """
+    from delta_encoding import DeltaEncoder
+    from frame_compression import FrameCompressor, load_dictionary
+
+    _configure_process_logging()
+    delta_encoder = DeltaEncoder(DELTA_FIELD_PRECISION, DELTA_KEYFRAME_INTERVAL) if DELTA_ENCODING_ENABLED else None
+    compressor = None
+    if COMPRESSION_ENABLED:
+        try:
+            dictionary_id, dictionary = load_dictionary(COMPRESSION_DICTIONARY_DIRECTORY, COMPRESSION_DICTIONARY_ID)
+            compressor = FrameCompressor(dictionary, dictionary_id, COMPRESSION_LEVEL)
+        except (OSError, ValueError) as e:
+            logger.error("Uplink compression disabled, no usable dictionary: %s", e)
+    unit_size = 1 if compressor is None else COMPRESSION_BATCH_SIZE
+    epoch = resync_epoch.value
+
+    while not stop_event.is_set():
+        item = _get(frames_ring, _RING_POLL_INTERVAL)
+        if item is None:
+            continue
+        items = [item]
+        while len(items) < unit_size:
+            item = _get(frames_ring, 0)
+            if item is None:
+                break
+            items.append(item)
+
+        # The writer failed a send since the last unit: start every device afresh
+        if resync_epoch.value != epoch:
+            epoch = resync_epoch.value
+            if delta_encoder is not None:
+                delta_encoder.force_keyframe()
+
+        record_ids = tuple(record_id for record_id, _ in items)
+        frames = [frame for _, frame in items]
+        if delta_encoder is not None:
+            frames = [delta_encoder.encode(frame) for frame in frames]
+
+        units = [(record_ids, compressor.compress(frames) if compressor is not None else frames[0])]
+        if len(pickle.dumps((record_ids, units[0][1], epoch))) > units_ring.slot_size:
+            units = [((record_id,), frame) for record_id, frame in zip(record_ids, frames)]
+
+        for unit_ids, data in units:
+            try:
+                if not _put(units_ring, (unit_ids, data, epoch), stop_event):
+                    return
+            except ValueError as e:
+                logger.error("Frame of entry %s not sent: %s", unit_ids[0], e)
+                # The encoder state already includes this frame, which the far end never gets
+                if delta_encoder is not None:
+                    delta_encoder.force_keyframe()
+                if not _put(units_ring, (unit_ids, None, epoch), stop_event):
+                    return
+
+
+def run_writer(port: str, baud_rate: int, os_type: int, database_url: str, units_ring: SharedRingBuffer,
+               feedback_ring: SharedRingBuffer, commands_ring: SharedRingBuffer, status_ring: SharedRingBuffer,
+               resync_epoch, link_rate, stop_event) -> None:
+    """
+    Serial writer process: send units, journal them and commit them to the database.
+
+    Manual commands are sent before the next unit. Each sent unit is
+    appended to the pipeline's acknowledgement journal, whose committer
+    marks it as transmitted and then reports it committed to the reader.
+    """
+    from ack_journal import AckJournal
+    from database_manager import DatabaseManager
+    from link_rate import AdaptiveRateController
+    from serial_manager import SerialManager
+
+    _configure_process_logging()
+    rate_controller = AdaptiveRateController(
+        LINK_RATE_INITIAL, LINK_RATE_MIN, LINK_RATE_INCREASE_STEP, LINK_RATE_DECREASE_FACTOR,
+        adaptive=LINK_RATE_ADAPTIVE, stall_factor=LINK_RATE_STALL_FACTOR
+    )
+    serial_manager = SerialManager(rate_controller)
+    if not serial_manager.connect(port, baud_rate, os_type):
+        status_ring.put(pickle.dumps((EVENT_CONNECTED, False)), timeout=0)
+        return
+    status_ring.put(pickle.dumps((EVENT_CONNECTED, True)), timeout=0)
+
+    def report(*event) -> None:
+        # Status is for display only; drop it rather than stall the link
+        try:
+            status_ring.put(pickle.dumps(event), timeout=0)
+        except ValueError:
+            pass
+
+    def resync() -> None:
+        with resync_epoch.get_lock():
+            resync_epoch.value += 1
+
+    def send_feedback(kind: str, record_ids) -> None:
+        record_ids = list(record_ids)
+        for start in range(0, len(record_ids), _FEEDBACK_CHUNK):
+            _put(feedback_ring, (kind, record_ids[start:start + _FEEDBACK_CHUNK]), stop_event)
+
+    database_manager = DatabaseManager(database_url)
+    database_manager.initialize()
+    last_database_retry = [time.monotonic()]
+
+    def commit(record_ids: List[int]) -> bool:
+        if not database_manager.is_initialized:
+            if time.monotonic() - last_database_retry[0] < DATABASE_RETRY_INTERVAL:
+                return False
+            last_database_retry[0] = time.monotonic()
+            if not database_manager.initialize():
+                return False
+        if not database_manager.mark_many_as_transmitted(record_ids):
+            return False
+        send_feedback(_FEEDBACK_COMMITTED, record_ids)
+        return True
+
+    ack_journal = AckJournal(
+        PIPELINE_ACK_JOURNAL_PATH, commit, batch_size=ACK_JOURNAL_COMMIT_BATCH,
+        commit_interval=ACK_JOURNAL_COMMIT_INTERVAL, fsync_batch=ACK_JOURNAL_FSYNC_BATCH,
+        max_size=ACK_JOURNAL_MAX_SIZE
+    )
+    ack_journal.start()
+
+    try:
+        while not stop_event.is_set():
+            command = _get(commands_ring, 0)
+            if command is not None:
+                report(EVENT_COMMAND, command, serial_manager.send_command(command))
+
+            unit = _get(units_ring, _RING_POLL_INTERVAL)
+            if unit is None:
+                continue
+            record_ids, data, epoch = unit
+
+            # Too large for a ring slot; sending it again would not help
+            if data is None:
+                send_feedback(_FEEDBACK_REJECTED, record_ids)
+                report(EVENT_FAILED, record_ids)
+                continue
+
+            # Encoded before a failed send; its deltas may refer to frames the far end never got
+            if epoch != resync_epoch.value:
+                send_feedback(_FEEDBACK_FAILED, record_ids)
+                continue
+
+            # Already sent before a restart, only the database commit is outstanding.
+            # The far end never gets this encoding of the frames, so resync.
+            if all(record_id in ack_journal for record_id in record_ids):
+                if DELTA_ENCODING_ENABLED:
+                    resync()
+                continue
+
+            if serial_manager.send_command(data):
+                for record_id in record_ids:
+                    ack_journal.append(record_id)
+                report(EVENT_SENT, record_ids, data)
+            else:
+                resync()
+                send_feedback(_FEEDBACK_FAILED, record_ids)
+                report(EVENT_FAILED, record_ids)
+            link_rate.value = rate_controller.rate
+
+            # Pace entries unless the rate controller paces the link itself
+            if not LINK_RATE_ADAPTIVE:
+                stop_event.wait(TRANSMISSION_ENTRY_INTERVAL)
+    finally:
+        serial_manager.disconnect()
+        ack_journal.close()
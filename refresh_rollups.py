@@ -0,0 +1,67 @@
+#!/usr/bin/env python3
+"""
+Rollup maintenance for MIZU Sensor Hub.
+
+This script folds new readings from mizu_sensor_hub into the hourly and
+daily rollup tables (migration 0007), continuing from the high-water mark
+left by the previous run. Run it from cron, or keep it running with
+--loop; overlapping runs wait for each other.
+
+Readings are folded in once their ID has been visible for
+ROLLUP_SETTLE_SECONDS, so an insert that commits after a higher ID is
+still counted. Inserts must commit within that time; a reading whose
+insert took longer is missing from the rollups.
+
+Usage:
+    python refresh_rollups.py           # catch up once
+    python refresh_rollups.py --loop    # catch up every ROLLUP_REFRESH_INTERVAL seconds
+"""
+
+import argparse
+import sys
+import time
+
+from config import DATABASE_URL, ROLLUP_BATCH_ROWS, ROLLUP_REFRESH_INTERVAL
+from database_manager import DatabaseManager
+
+
+def catch_up(database_manager: DatabaseManager, batch_rows: int) -> bool:
+    """Fold in readings batch by batch until the rollups are up to date."""
+    total = 0
+    while True:
+        folded = database_manager.refresh_rollups(batch_rows)
+        if folded is None:
+            print("❌ Rollup refresh failed")
+            return False
+        total += folded
+        if folded < batch_rows:
+            print(f"✅ Rollups up to date, {total} new readings folded in")
+            return True
+
+
+def main() -> bool:
+    """Main maintenance function."""
+    parser = argparse.ArgumentParser(description="Update the hourly and daily rollup tables")
+    parser.add_argument("--batch-rows", type=int, default=ROLLUP_BATCH_ROWS, help="readings per transaction")
+    parser.add_argument("--loop", action="store_true", help="keep running, refreshing periodically")
+    parser.add_argument("--interval", type=float, default=ROLLUP_REFRESH_INTERVAL, help="seconds between runs with --loop")
+    arguments = parser.parse_args()
+
+    database_manager = DatabaseManager(DATABASE_URL)
+    if not database_manager.initialize():
+        print("❌ Could not connect to the database")
+        return False
+
+    succeeded = catch_up(database_manager, arguments.batch_rows)
+    while arguments.loop:
+        try:
+            time.sleep(arguments.interval)
+        except KeyboardInterrupt:
+            break
+        succeeded = catch_up(database_manager, arguments.batch_rows)
+    return succeeded
+
+
+if __name__ == "__main__":
+    success = main()
+    sys.exit(0 if success else 1)
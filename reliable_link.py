@@ -0,0 +1,314 @@
+"""
+Reliable link protocol for MIZU Ground Station.
+
+This module adds an optional acknowledged transport on top of the
+SerialManager. Each frame is wrapped with a sequence number and a
+checksum, up to a configurable window of frames is kept in flight, and
+the far end answers every frame with an ACK or NAK line. Frames that are
+negatively acknowledged or time out are retransmitted individually.
+
+Wire format:
+    @<seq>:<frame>*<crc>\\n    outgoing frame (seq: 2 hex digits, crc: CRC-16/CCITT, 4 hex digits)
+    ACK <seq>                 frame received intact
+    NAK <seq>                 frame received corrupted, retransmit
+"""
+
+import binascii
+import re
+import threading
+import time
+from collections import OrderedDict
+from typing import Callable, Iterable, List, Optional, Tuple
+
+from link_rate import AdaptiveRateController
+from metrics import RETRANSMITS
+from serial_manager import SerialManager
+
+SEQUENCE_MODULUS = 256
+RESPONSE_PATTERN = re.compile(r"^(ACK|NAK) ([0-9A-Fa-f]{2})$")
+
+
+class InFlightFrame:
+    """A frame that has been sent and is waiting for an acknowledgement."""
+
+    __slots__ = ("record_ids", "wire_frame", "sent_at", "attempts", "retransmit")
+
+    def __init__(self, record_ids: Tuple[int, ...], wire_frame: str) -> None:
+        self.record_ids = record_ids
+        self.wire_frame = wire_frame
+        self.sent_at = 0.0
+        self.attempts = 0
+        self.retransmit = False
+
+
+class ReliableLink:
+    """
+    Sliding-window, selective-repeat transport over a serial connection.
+
+    Frames are only reported as delivered once the far end has
+    acknowledged them. Delivery and failure callbacks are always invoked
+    on the thread that calls send() or service(), never on the serial
+    receive thread.
+    """
+
+    def __init__(self, serial_manager: SerialManager, window_size: int, ack_timeout: float,
+                 max_retries: int, on_delivered: Callable[[int], None],
+                 on_failed: Optional[Callable[[int], None]] = None,
+                 rate_controller: Optional[AdaptiveRateController] = None) -> None:
+        """
+        Initialize the reliable link.
+
+        Args:
+            serial_manager: Serial manager used to write frames
+            window_size: Maximum number of unacknowledged frames in flight
+            ack_timeout: Seconds to wait for an acknowledgement before retransmitting,
+                until the rate controller has measured the round-trip time
+            max_retries: Retransmissions before a frame is given up
+            on_delivered: Called with the record ID of every acknowledged frame
+            on_failed: Called with the record ID of every frame given up
+            rate_controller: Controller fed with round-trip times, NAKs and timeouts (optional)
+        """
+        if not 1 <= window_size <= SEQUENCE_MODULUS // 2:
+            raise ValueError(f"Window size must be between 1 and {SEQUENCE_MODULUS // 2}")
+
+        self.serial_manager = serial_manager
+        self.window_size = window_size
+        self.ack_timeout = ack_timeout
+        self.max_retries = max_retries
+        self.on_delivered = on_delivered
+        self.on_failed = on_failed
+        self.rate_controller = rate_controller
+
+        self._in_flight: "OrderedDict[int, InFlightFrame]" = OrderedDict()
+        self._responses: List[Tuple[str, int, float]] = []
+        self._next_sequence = 0
+        self._lock = threading.Lock()
+        self._response_event = threading.Event()
+
+        self.serial_manager.add_receive_listener(self.handle_line)
+
+    def __len__(self) -> int:
+        """Return the number of frames in flight."""
+        with self._lock:
+            return len(self._in_flight)
+
+    def __contains__(self, record_id: int) -> bool:
+        """Check whether a record's frame is currently in flight."""
+        with self._lock:
+            return any(record_id in frame.record_ids for frame in self._in_flight.values())
+
+    @staticmethod
+    def encode_frame(sequence: int, frame: str) -> str:
+        """
+        Wrap a frame with its sequence number and checksum.
+
+        Args:
+            sequence: Sequence number of the frame
+            frame: Frame to wrap
+
+        Returns:
+            The frame as it is written to the serial port
+        """
+        body = f"{sequence:02X}:{frame}"
+        checksum = binascii.crc_hqx(body.encode(), 0xFFFF)
+        return f"@{body}*{checksum:04X}\n"
+
+    def send(self, record_id: int, frame: str, timeout: Optional[float] = None) -> bool:
+        """
+        Send a frame, waiting for room in the window if necessary.
+
+        Args:
+            record_id: Database ID of the sensor data entry
+            frame: Formatted frame to send
+            timeout: Maximum seconds to wait for room in the window (default: no limit)
+
+        Returns:
+            True if the frame was written and is now in flight, False otherwise
+        """
+        return self.send_batch((record_id,), frame, timeout)
+
+    def send_batch(self, record_ids: Iterable[int], frame: str, timeout: Optional[float] = None) -> bool:
+        """
+        Send a frame carrying several entries, e.g. a compressed batch.
+
+        The frame is acknowledged as a whole; the delivery and failure
+        callbacks are invoked once for each of its record IDs.
+
+        Args:
+            record_ids: Database IDs of the sensor data entries in the frame
+            frame: Frame to send
+            timeout: Maximum seconds to wait for room in the window (default: no limit)
+
+        Returns:
+            True if the frame was written and is now in flight, False otherwise
+        """
+        record_ids = tuple(record_ids)
+        deadline = None if timeout is None else time.monotonic() + timeout
+
+        while True:
+            self.service()
+            with self._lock:
+                if len(self._in_flight) < self.window_size:
+                    sequence = self._next_sequence
+                    self._next_sequence = (self._next_sequence + 1) % SEQUENCE_MODULUS
+                    in_flight_frame = InFlightFrame(record_ids, self.encode_frame(sequence, frame))
+                    self._in_flight[sequence] = in_flight_frame
+                    break
+
+            if not self.serial_manager.is_connected:
+                return False
+            if deadline is not None and time.monotonic() >= deadline:
+                return False
+            self._wait_for_response(deadline)
+
+        if self._transmit(in_flight_frame):
+            return True
+
+        with self._lock:
+            self._in_flight.pop(sequence, None)
+        return False
+
+    def service(self) -> None:
+        """
+        Process received acknowledgements and retransmit overdue frames.
+
+        Must be called regularly from the sending thread while frames
+        are in flight.
+        """
+        delivered, failed, due = self._collect()
+
+        for record_id in delivered:
+            self.on_delivered(record_id)
+
+        for in_flight_frame in due:
+            if not self._transmit(in_flight_frame):
+                break
+
+        if self.on_failed:
+            for record_id in failed:
+                self.on_failed(record_id)
+
+    def service_for(self, duration: float) -> None:
+        """
+        Keep servicing the link for a while, e.g. between paced sends.
+
+        Acknowledgements are processed as soon as they arrive and overdue
+        frames are retransmitted, without waiting for the window to drain.
+
+        Args:
+            duration: Seconds to keep servicing the link
+        """
+        deadline = time.monotonic() + duration
+        while True:
+            self.service()
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                return
+            if not len(self):
+                time.sleep(remaining)
+                return
+            self._wait_for_response(deadline)
+
+    def reset(self) -> None:
+        """Drop all in-flight frames, e.g. after the connection was closed."""
+        with self._lock:
+            self._in_flight.clear()
+            self._responses.clear()
+
+    def handle_line(self, line: str) -> bool:
+        """
+        Handle a line received from the serial port.
+
+        Called on the serial receive thread; only queues the response.
+
+        Args:
+            line: Received line
+
+        Returns:
+            True if the line was an ACK/NAK response, False otherwise
+        """
+        match = RESPONSE_PATTERN.match(line.strip())
+        if not match:
+            return False
+
+        with self._lock:
+            self._responses.append((match.group(1), int(match.group(2), 16), time.monotonic()))
+        self._response_event.set()
+        return True
+
+    def _collect(self) -> Tuple[List[int], List[int], List[InFlightFrame]]:
+        """
+        Apply queued responses and find frames due for retransmission.
+
+        Returns:
+            Tuple of (delivered record IDs, failed record IDs, frames to retransmit)
+        """
+        delivered = []
+        failed = []
+        due = []
+        now = time.monotonic()
+        ack_timeout = self._ack_timeout()
+
+        with self._lock:
+            responses, self._responses = self._responses, []
+            self._response_event.clear()
+
+            for kind, sequence, received_at in responses:
+                in_flight_frame = self._in_flight.get(sequence)
+                if in_flight_frame is None:
+                    # Duplicate or stale response
+                    continue
+                if kind == "ACK":
+                    del self._in_flight[sequence]
+                    delivered.extend(in_flight_frame.record_ids)
+                    if self.rate_controller is not None:
+                        # Karn's algorithm: retransmitted frames give ambiguous samples
+                        sample = received_at - in_flight_frame.sent_at if in_flight_frame.attempts == 1 else None
+                        self.rate_controller.on_ack(sample)
+                else:
+                    in_flight_frame.retransmit = True
+                    if self.rate_controller is not None:
+                        self.rate_controller.on_nack()
+
+            for sequence, in_flight_frame in list(self._in_flight.items()):
+                if not in_flight_frame.retransmit:
+                    if now - in_flight_frame.sent_at < ack_timeout:
+                        continue
+                    if self.rate_controller is not None:
+                        self.rate_controller.on_ack_timeout()
+                if in_flight_frame.attempts > self.max_retries:
+                    del self._in_flight[sequence]
+                    failed.extend(in_flight_frame.record_ids)
+                else:
+                    due.append(in_flight_frame)
+
+        return delivered, failed, due
+
+    def _transmit(self, in_flight_frame: InFlightFrame) -> bool:
+        """Write a frame to the serial port and restart its timer."""
+        in_flight_frame.retransmit = False
+        if in_flight_frame.attempts:
+            RETRANSMITS.inc()
+        in_flight_frame.attempts += 1
+        sent = self.serial_manager.send_command(in_flight_frame.wire_frame)
+        # The timeout counts from the end of the write, not the start
+        in_flight_frame.sent_at = time.monotonic()
+        return sent
+
+    def _wait_for_response(self, deadline: Optional[float]) -> None:
+        """Block until a response arrives or the next frame may time out."""
+        with self._lock:
+            if not self._in_flight:
+                return
+            oldest_sent_at = min(frame.sent_at for frame in self._in_flight.values())
+
+        wait_time = max(0.0, oldest_sent_at + self._ack_timeout() - time.monotonic())
+        if deadline is not None:
+            wait_time = min(wait_time, max(0.0, deadline - time.monotonic()))
+        self._response_event.wait(wait_time)
+
+    def _ack_timeout(self) -> float:
+        """Get the current acknowledgement timeout in seconds."""
+        if self.rate_controller is None:
+            return self.ack_timeout
+        return self.rate_controller.retransmission_timeout(self.ack_timeout)
@@ -0,0 +1,241 @@
+"""
+In-flight sensor readings for MIZU Ground Station.
+
+This module provides the compact record type that carries a polled
+reading from the database to the encoder, a column-oriented batch of
+readings for encoding many records at once, and the uplink frame format.
+Unlike SensorData instances, records carry no ORM state: a record is a
+fixed set of slots.
+"""
+
+from array import array
+from datetime import datetime
+from typing import Dict, Iterable, Iterator, List, Sequence
+
+try:
+    import numpy
+except ImportError:  # NumPy is optional; columnar batches fall back to array('d')
+    numpy = None
+
+# Measurement fields, in frame order
+SENSOR_VALUE_FIELDS = (
+    "ambient_temperature",
+    "humidity",
+    "soil_moisture",
+    "soil_temperature",
+    "wind_speed",
+    "ambient_light",
+    "uv_light",
+)
+
+# All fields of a record, in the order they are polled
+SENSOR_RECORD_FIELDS = ("id", "device_id") + SENSOR_VALUE_FIELDS + ("priority", "timestamp")
+
+# Stored in columnar batches for missing measurements
+_NAN = float("nan")
+
+
+class SensorRecord:
+    """A sensor reading awaiting transmission."""
+
+    __slots__ = SENSOR_RECORD_FIELDS
+
+    def __init__(self, id, device_id, ambient_temperature, humidity, soil_moisture,
+                 soil_temperature, wind_speed, ambient_light, uv_light, priority, timestamp) -> None:
+        self.id = id
+        self.device_id = device_id
+        self.ambient_temperature = ambient_temperature
+        self.humidity = humidity
+        self.soil_moisture = soil_moisture
+        self.soil_temperature = soil_temperature
+        self.wind_speed = wind_speed
+        self.ambient_light = ambient_light
+        self.uv_light = uv_light
+        self.priority = priority
+        self.timestamp = timestamp
+
+    def __iter__(self) -> Iterator:
+        """Iterate over the field values in SENSOR_RECORD_FIELDS order."""
+        return (getattr(self, field) for field in SENSOR_RECORD_FIELDS)
+
+    def __eq__(self, other) -> bool:
+        if not isinstance(other, SensorRecord):
+            return NotImplemented
+        return tuple(self) == tuple(other)
+
+    def __repr__(self):
+        return f"<SensorRecord(id={self.id}, device_id='{self.device_id}', timestamp='{self.timestamp}')>"
+
+
+class SensorBatch:
+    """
+    Column-oriented batch of sensor readings.
+
+    IDs and priorities are held in array('q'), every measurement field in
+    its own array('d') with missing values stored as NaN; device IDs and
+    timestamps stay Python lists.
+    """
+
+    def __init__(self) -> None:
+        self.ids = array("q")
+        self.device_ids: List[str] = []
+        self.values: Dict[str, array] = {field: array("d") for field in SENSOR_VALUE_FIELDS}
+        self.priorities = array("q")
+        self.timestamps: list = []
+
+    @classmethod
+    def from_records(cls, records: Iterable) -> "SensorBatch":
+        """
+        Build a batch from records.
+
+        Args:
+            records: SensorRecord objects, or anything with the same attributes
+
+        Returns:
+            Batch holding the records' values column by column
+        """
+        batch = cls()
+        for record in records:
+            batch.append(record)
+        return batch
+
+    @classmethod
+    def from_rows(cls, rows: Sequence[tuple]) -> "SensorBatch":
+        """
+        Build a batch by transposing database rows.
+
+        Args:
+            rows: Tuples of values in SENSOR_RECORD_FIELDS order
+
+        Returns:
+            Batch holding the rows' values column by column
+        """
+        batch = cls()
+        if not rows:
+            return batch
+
+        columns = dict(zip(SENSOR_RECORD_FIELDS, zip(*rows)))
+        batch.ids = array("q", columns["id"])
+        batch.device_ids = list(columns["device_id"])
+        for field in SENSOR_VALUE_FIELDS:
+            batch.values[field] = array("d", [_NAN if value is None else value for value in columns[field]])
+        batch.priorities = array("q", [priority or 0 for priority in columns["priority"]])
+        batch.timestamps = list(columns["timestamp"])
+        return batch
+
+    def __len__(self) -> int:
+        """Return the number of readings in the batch."""
+        return len(self.ids)
+
+    def append(self, record) -> None:
+        """Add one record to the end of the batch."""
+        self.ids.append(record.id)
+        self.device_ids.append(record.device_id)
+        for field, column in self.values.items():
+            value = getattr(record, field)
+            column.append(_NAN if value is None else value)
+        self.priorities.append(record.priority or 0)
+        self.timestamps.append(record.timestamp)
+
+    def records(self) -> List[SensorRecord]:
+        """
+        Convert the batch back into records.
+
+        Returns:
+            One SensorRecord per reading, with NaN values restored to None
+        """
+        columns = [self.values[field] for field in SENSOR_VALUE_FIELDS]
+        return [
+            SensorRecord(record_id, device_id,
+                         *(None if column[index] != column[index] else column[index] for column in columns),
+                         priority, timestamp)
+            for index, (record_id, device_id, priority, timestamp)
+            in enumerate(zip(self.ids, self.device_ids, self.priorities, self.timestamps))
+        ]
+
+    def to_numpy(self) -> Dict[str, "numpy.ndarray"]:
+        """
+        View the numeric columns as NumPy arrays, without copying.
+
+        The batch cannot grow while the views are in use.
+
+        Returns:
+            Dictionary of arrays keyed by "id", "priority" and the measurement field names
+
+        Raises:
+            RuntimeError: When NumPy is not installed
+        """
+        if numpy is None:
+            raise RuntimeError("NumPy is not installed")
+
+        columns = {"id": numpy.frombuffer(self.ids, dtype=numpy.int64),
+                   "priority": numpy.frombuffer(self.priorities, dtype=numpy.int64)}
+        for field, column in self.values.items():
+            columns[field] = numpy.frombuffer(column, dtype=numpy.float64)
+        return columns
+
+
+def format_frame(sensor_data) -> str:
+    """
+    Format a sensor reading into the uplink frame.
+
+    Args:
+        sensor_data: SensorRecord, SensorData or any object with the same attributes
+
+    Returns:
+        Formatted string starting with # and ending with ~
+    """
+    # Format: #device_id=SENSOR001,timestamp=2024-01-15T10:30:00,ambient_temp=25.5,humidity=60.2,soil_moisture=45.8,soil_temp=22.1,wind_speed=5.2,ambient_light=500.0,uv_light=0.8~
+
+    # Format timestamp as ISO format string
+    timestamp_str = sensor_data.timestamp.isoformat() if sensor_data.timestamp else datetime.utcnow().isoformat()
+
+    formatted_parts = [
+        f"device_id={sensor_data.device_id}",
+        f"timestamp={timestamp_str}",
+        f"ambient_temp={sensor_data.ambient_temperature or 0.0}",
+        f"humidity={sensor_data.humidity or 0.0}",
+        f"soil_moisture={sensor_data.soil_moisture or 0.0}",
+        f"soil_temp={sensor_data.soil_temperature or 0.0}",
+        f"wind_speed={sensor_data.wind_speed or 0.0}",
+        f"ambient_light={sensor_data.ambient_light or 0.0}",
+        f"uv_light={sensor_data.uv_light or 0.0}"
+    ]
+
+    return f"#{','.join(formatted_parts)}~"
+
+
+# Frame keys of the measurement fields, in SENSOR_VALUE_FIELDS order
+FRAME_VALUE_KEYS = (
+    "ambient_temp",
+    "humidity",
+    "soil_moisture",
+    "soil_temp",
+    "wind_speed",
+    "ambient_light",
+    "uv_light",
+)
+
+
+def parse_frame(frame: str) -> SensorRecord:
+    """
+    Parse an uplink frame back into a reading.
+
+    Args:
+        frame: Frame produced by format_frame()
+
+    Returns:
+        SensorRecord without ID, with priority 0; missing measurements are None
+
+    Raises:
+        ValueError: When the frame is malformed
+    """
+    if not (frame.startswith("#") and frame.endswith("~")):
+        raise ValueError("Frame must start with # and end with ~")
+
+    pairs = dict(part.partition("=")[::2] for part in frame[1:-1].split(","))
+    try:
+        values = [float(pairs[key]) if key in pairs else None for key in FRAME_VALUE_KEYS]
+        return SensorRecord(None, pairs["device_id"], *values, 0, datetime.fromisoformat(pairs["timestamp"]))
+    except KeyError as e:
+        raise ValueError(f"Frame has no {e.args[0]} field") from e
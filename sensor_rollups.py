@@ -0,0 +1,127 @@
+"""
+Rollups of sensor readings for MIZU Sensor Hub.
+
+Hourly and daily rollups keep, per device and period, the count, sum,
+minimum and maximum of every measurement. These statistics merge, so a
+rollup row can be updated incrementally as new readings arrive and the
+mean is always sum / count. DatabaseManager maintains the rollup tables
+from a high-water mark on mizu_sensor_hub and serves history queries from
+the coarsest rollup that still resolves the requested range.
+"""
+
+from collections.abc import Mapping
+from datetime import datetime
+from typing import Dict, Iterable, Optional, Tuple
+
+from backlog_aggregation import window_start
+from sensor_record import SENSOR_VALUE_FIELDS
+
+# Rollup resolutions, coarsest first, with their period in seconds
+ROLLUP_RESOLUTIONS = (
+    ("day", 86400),
+    ("hour", 3600),
+)
+
+
+def accumulate(records: Iterable, period_seconds: int) -> Dict[Tuple[str, datetime], dict]:
+    """
+    Compute the rollup statistics of readings per device and period.
+
+    Args:
+        records: SensorRecord objects, or anything with the same attributes
+        period_seconds: Period length in seconds, aligned to the Unix epoch
+
+    Returns:
+        Dictionary of rollup column values keyed by (device ID, period start)
+    """
+    rollups: Dict[Tuple[str, datetime], dict] = {}
+    for record in records:
+        key = (record.device_id, window_start(record.timestamp, period_seconds))
+        rollup = rollups.get(key)
+        if rollup is None:
+            rollup = rollups[key] = {"device_id": key[0], "period_start": key[1], "reading_count": 0}
+            for field in SENSOR_VALUE_FIELDS:
+                rollup.update({f"{field}_count": 0, f"{field}_sum": 0.0, f"{field}_min": None, f"{field}_max": None})
+
+        rollup["reading_count"] += 1
+        for field in SENSOR_VALUE_FIELDS:
+            value = getattr(record, field)
+            if value is None:
+                continue
+            rollup[f"{field}_count"] += 1
+            rollup[f"{field}_sum"] += value
+            if rollup[f"{field}_min"] is None or value < rollup[f"{field}_min"]:
+                rollup[f"{field}_min"] = value
+            if rollup[f"{field}_max"] is None or value > rollup[f"{field}_max"]:
+                rollup[f"{field}_max"] = value
+    return rollups
+
+
+def merge(existing: dict, new: dict) -> dict:
+    """
+    Merge the statistics of two rollups of the same device and period.
+
+    Args:
+        existing: Column values of the stored rollup
+        new: Column values computed from newer readings
+
+    Returns:
+        Column values covering the readings of both
+    """
+    merged = dict(new)
+    merged["reading_count"] = existing["reading_count"] + new["reading_count"]
+    for field in SENSOR_VALUE_FIELDS:
+        merged[f"{field}_count"] = existing[f"{field}_count"] + new[f"{field}_count"]
+        merged[f"{field}_sum"] = existing[f"{field}_sum"] + new[f"{field}_sum"]
+        minimums = [value for value in (existing[f"{field}_min"], new[f"{field}_min"]) if value is not None]
+        maximums = [value for value in (existing[f"{field}_max"], new[f"{field}_max"]) if value is not None]
+        merged[f"{field}_min"] = min(minimums) if minimums else None
+        merged[f"{field}_max"] = max(maximums) if maximums else None
+    return merged
+
+
+def choose_resolution(start: datetime, end: datetime, min_points: int) -> Optional[str]:
+    """
+    Pick the coarsest rollup that still gives enough points over a range.
+
+    Args:
+        start: Start of the range
+        end: End of the range
+        min_points: Minimum number of periods the range must span
+
+    Returns:
+        "day" or "hour", or None when raw readings are needed
+    """
+    span = (end - start).total_seconds()
+    for resolution, period_seconds in ROLLUP_RESOLUTIONS:
+        if span / period_seconds >= min_points:
+            return resolution
+    return None
+
+
+def to_history_point(rollup, period_seconds: int) -> dict:
+    """
+    Convert a rollup row into a history point.
+
+    Args:
+        rollup: Rollup row, row mapping or column value dictionary
+        period_seconds: Period length of the rollup
+
+    Returns:
+        Dictionary with device_id, period_start, period_seconds, count and
+        the minimum, mean and maximum of every measurement
+    """
+    get = rollup.get if isinstance(rollup, Mapping) else lambda name: getattr(rollup, name)
+
+    point = {
+        "device_id": get("device_id"),
+        "period_start": get("period_start"),
+        "period_seconds": period_seconds,
+        "count": get("reading_count"),
+    }
+    for field in SENSOR_VALUE_FIELDS:
+        count = get(f"{field}_count")
+        point[f"{field}_min"] = get(f"{field}_min")
+        point[f"{field}_mean"] = get(f"{field}_sum") / count if count else None
+        point[f"{field}_max"] = get(f"{field}_max")
+    return point
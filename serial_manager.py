@@ -5,15 +5,33 @@ This module handles all serial port operations including connection
 management, data transmission, and port discovery.
 """
 
+import itertools
+import logging
+import queue
 import sys
 import threading
+import time
+import warnings
+from concurrent.futures import Future
 from typing import List, Optional, Callable
 import serial
 
 from config import (
-    SERIAL_TIMEOUT, MAX_COM_PORTS, OS_WINDOWS, OS_LINUX,
-    ERROR_MESSAGES, SUCCESS_MESSAGES
+    SERIAL_TIMEOUT, SERIAL_WRITE_TIMEOUT, MAX_COM_PORTS,
+    OS_WINDOWS, OS_LINUX, ERROR_MESSAGES, SUCCESS_MESSAGES
 )
+from link_rate import AdaptiveRateController
+from metrics import BYTES_SENT, FRAMES_SENT, SEND_FAILURES, SERIAL_QUEUE_DEPTH, SERIAL_WRITE_SECONDS
+from structured_logging import FRAME_LOGGER_NAME
+from tracing import TRACER, Span
+
+logger = logging.getLogger(__name__)
+frame_logger = logging.getLogger(FRAME_LOGGER_NAME)
+
+# Write priorities: lower values are written first
+PRIORITY_URGENT = 0
+PRIORITY_BULK = 10
+_PRIORITY_STOP = -1
 
 
 class SerialManager:
@@ -22,19 +40,33 @@ class SerialManager:
 
     This class handles establishing and maintaining serial connections,
     sending commands, and monitoring incoming data.
+
+    All writes go through a single writer thread that owns the port and
+    consumes a priority queue of whole commands, so commands from
+    different threads can never interleave on the wire.
     """
 
-    def __init__(self) -> None:
+    def __init__(self, rate_controller: Optional[AdaptiveRateController] = None) -> None:
         """
         Initialize the serial manager.
 
         Sets up the connection state and monitoring thread.
+
+        Args:
+            rate_controller: Controller that paces outgoing characters (optional)
         """
+        self.rate_controller = rate_controller
         self.serial_connection: Optional[serial.Serial] = None
         self.is_connected = False
         self.should_monitor_data = False
         self.data_monitoring_thread: Optional[threading.Thread] = None
         self.data_callback: Optional[Callable[[str], None]] = None
+        self.receive_listeners: List[Callable[[str], bool]] = []
+        self.writer_thread: Optional[threading.Thread] = None
+        self._writer_stop = threading.Event()
+        self._write_queue: "queue.PriorityQueue" = queue.PriorityQueue()
+        self._write_sequence = itertools.count()
+        self._write_queue_lock = threading.Lock()
 
     def set_data_callback(self, callback: Callable[[str], None]) -> None:
         """
@@ -45,6 +77,18 @@ class SerialManager:
         """
         self.data_callback = callback
 
+    def add_receive_listener(self, listener: Callable[[str], bool]) -> None:
+        """
+        Register a listener for received lines.
+
+        Listeners are called before the data callback; a listener that
+        returns True consumes the line and it is not passed on.
+
+        Args:
+            listener: Function to call with every received line
+        """
+        self.receive_listeners.append(listener)
+
     def scan_available_ports(self) -> List[str]:
         """
         Scan the system for available serial ports.
@@ -93,18 +137,25 @@ class SerialManager:
             if os_type == OS_LINUX:
                 full_port_path = f'/dev/tty{port}'
                 self.serial_connection = serial.Serial(
-                    full_port_path, baud_rate, timeout=SERIAL_TIMEOUT
+                    full_port_path, baud_rate, timeout=SERIAL_TIMEOUT,
+                    write_timeout=SERIAL_WRITE_TIMEOUT
                 )
             elif os_type == OS_WINDOWS:
                 self.serial_connection = serial.Serial(
-                    port, baud_rate, timeout=SERIAL_TIMEOUT
+                    port, baud_rate, timeout=SERIAL_TIMEOUT,
+                    write_timeout=SERIAL_WRITE_TIMEOUT
                 )
             else:
                 return False
 
+            if self.rate_controller is not None:
+                self.rate_controller.reset(baud_rate)
+
+            self._start_writer()
             self.is_connected = True
-            # Disabled data monitoring for transmitter-only operation
-            # self._start_data_monitoring()
+            # Data monitoring is disabled for transmitter-only operation;
+            # reliable link mode starts it to receive acknowledgements
+            # self.start_data_monitoring()
             return True
 
         except serial.SerialException:
@@ -114,27 +165,159 @@ class SerialManager:
     def disconnect(self) -> None:
         """
         Close the serial connection and stop data monitoring.
+
+        The port is closed only after the writer thread has exited; a
+        command being written is abandoned at the next character. Commands
+        still queued for writing are completed with False.
         """
         self.should_monitor_data = False
+        with self._write_queue_lock:
+            self.is_connected = False
+        self._stop_writer()
 
         if self.serial_connection:
             try:
                 self.serial_connection.close()
-                print(SUCCESS_MESSAGES["connection_closed"])
+                logger.info(SUCCESS_MESSAGES["connection_closed"])
             except serial.SerialException as close_error:
-                print(f"Error while closing connection: {close_error}")
+                logger.error("Error while closing connection: %s", close_error)
             finally:
                 self.serial_connection = None
 
-        self.is_connected = False
+        self._fail_queued_commands()
 
-    def send_command(self, command: str, char_delay: float = 0.05) -> bool:
+    def submit_command(self, command: str, priority: int = PRIORITY_BULK) -> Future:
         """
-        Send a command through the serial connection character by character.
+        Queue a command for the writer thread without blocking.
 
         Args:
             command: The command string to send
-            char_delay: Delay between characters in seconds (default: 0.01s = 10ms)
+            priority: PRIORITY_URGENT to go ahead of queued bulk frames,
+                or PRIORITY_BULK (default)
+
+        Returns:
+            Future resolving to True if the command was sent, False otherwise
+        """
+        return self._enqueue_command(command, priority, None)
+
+    def send_command(self, command: str, char_delay: Optional[float] = None) -> bool:
+        """
+        Send a command through the writer thread and wait until it is written.
+
+        Args:
+            command: The command string to send
+            char_delay: Deprecated. Fixed delay between characters in seconds
+                for this command, instead of the rate controller's pacing
+
+        Returns:
+            True if command sent successfully, False otherwise
+        """
+        if char_delay is not None:
+            warnings.warn("char_delay is deprecated; the rate controller paces the link",
+                          DeprecationWarning, stacklevel=2)
+        try:
+            with TRACER.span("serial.send", {"bytes": len(command)}):
+                return self._enqueue_command(command, PRIORITY_BULK, char_delay).result()
+        except Exception as e:
+            logger.error("Error sending command: %s", e)
+            return False
+
+    def _enqueue_command(self, command: str, priority: int, char_delay: Optional[float]) -> Future:
+        """Queue a command for the writer thread, with an optional fixed character delay."""
+        future: Future = Future()
+        with self._write_queue_lock:
+            if not self.is_connected:
+                future.set_result(False)
+            else:
+                # The writer's span nests in the caller's, which does not cross threads by itself
+                self._write_queue.put((priority, next(self._write_sequence), command, char_delay,
+                                       TRACER.current_span(), future))
+                SERIAL_QUEUE_DEPTH.set(self._write_queue.qsize())
+        return future
+
+    def _start_writer(self) -> None:
+        """
+        Start the writer thread for the current connection.
+
+        Each connection gets its own queue and stop event, so a writer
+        from a previous connection never takes over new commands.
+        """
+        self._write_queue = queue.PriorityQueue()
+        self._writer_stop = threading.Event()
+        self.writer_thread = threading.Thread(
+            target=self._write_loop, args=(self._write_queue, self._writer_stop), daemon=True
+        )
+        self.writer_thread.start()
+
+    def _stop_writer(self) -> None:
+        """
+        Stop the writer thread and wait until it has exited.
+
+        The stop event makes the writer abandon the command it is writing
+        at the next character, so the wait is bounded by one character
+        write rather than a whole frame. The sentinel only wakes a writer
+        idle in the queue.
+        """
+        if self.writer_thread is None:
+            return
+
+        self._writer_stop.set()
+        self._write_queue.put((_PRIORITY_STOP, next(self._write_sequence), None, None, None, None))
+        self.writer_thread.join()
+        self.writer_thread = None
+
+    def _fail_queued_commands(self) -> None:
+        """
+        Complete every command still waiting in the write queue with False.
+
+        Only called once the writer thread has exited; the stop sentinel,
+        if still queued, is skipped.
+        """
+        while True:
+            try:
+                *_, future = self._write_queue.get_nowait()
+            except queue.Empty:
+                return
+            if future is not None and future.set_running_or_notify_cancel():
+                future.set_result(False)
+
+    def _write_loop(self, write_queue: "queue.PriorityQueue", stop_event: threading.Event) -> None:
+        """
+        Write queued commands to the serial port, highest priority first.
+
+        This method runs in the writer thread, the only thread that
+        writes to the serial connection.
+
+        Args:
+            write_queue: Queue of the connection this writer serves
+            stop_event: Event set when the connection is closing
+        """
+        while True:
+            _, _, command, char_delay, parent_span, future = write_queue.get()
+            SERIAL_QUEUE_DEPTH.set(write_queue.qsize())
+            if future is None:
+                return
+            if not future.set_running_or_notify_cancel():
+                continue
+            if stop_event.is_set():
+                future.set_result(False)
+                return
+
+            try:
+                future.set_result(self._write_command(command, char_delay, parent_span))
+            except Exception as e:
+                future.set_exception(e)
+
+    def _write_command(self, command: str, char_delay: Optional[float] = None,
+                       parent_span: Optional[Span] = None) -> bool:
+        """
+        Write a command to the serial connection character by character.
+
+        Args:
+            command: The command string to send
+            char_delay: Delay between characters in seconds (default: paced by
+                the rate controller, or 0.05s without one)
+            parent_span: Span of the caller that queued the command (optional)
 
         Returns:
             True if command sent successfully, False otherwise
@@ -142,29 +325,67 @@ class SerialManager:
         if not self.is_connected or not self.serial_connection:
             return False
 
+        if char_delay is None:
+            char_delay = self.rate_controller.char_delay if self.rate_controller else 0.05
+        stall_threshold = self.rate_controller.stall_threshold if self.rate_controller else float("inf")
+
         try:
-            import time
+            started = time.monotonic()
+            stalled = False
 
             # Send each character individually with a delay
-            for i, char in enumerate(command):
-                self.serial_connection.write(char.encode())
-                self.serial_connection.flush()  # Ensure the character is sent immediately
-
-                # Add delay between characters
-                time.sleep(char_delay)
-
-                # Print character being sent
-                print(f"{char}", end='')
-            print("")
+            with TRACER.span("serial.write", {"bytes": len(command), "char_delay": char_delay},
+                             parent=parent_span):
+                for i, char in enumerate(command):
+                    if self._writer_stop.is_set():
+                        logger.info("Abandoned command after %d of %d characters: connection closing",
+                                    i, len(command))
+                        return False
+
+                    write_started = time.monotonic()
+                    self.serial_connection.write(char.encode())
+                    self.serial_connection.flush()  # Ensure the character is sent immediately
+
+                    # A flush that takes far longer than a character time means the
+                    # output buffer is backing up (e.g. the far end holding off flow control)
+                    if time.monotonic() - write_started > stall_threshold:
+                        stalled = True
+
+                    # Add delay between characters; wakes early when the connection closes
+                    self._writer_stop.wait(char_delay)
+
+            elapsed = time.monotonic() - started
+            byte_count = len(command.encode())
+            FRAMES_SENT.inc()
+            BYTES_SENT.inc(byte_count)
+            SERIAL_WRITE_SECONDS.observe(elapsed)
+            frame_logger.debug("Wrote %s", command.strip(),
+                               extra={"bytes": byte_count, "seconds": round(elapsed, 4)})
+
+            if self.rate_controller is not None:
+                if stalled:
+                    self.rate_controller.on_buffer_full(byte_count)
+                else:
+                    self.rate_controller.on_write_success(byte_count, elapsed)
             return True
+        except serial.SerialTimeoutException as e:
+            SEND_FAILURES.inc()
+            if self.rate_controller is not None:
+                self.rate_controller.on_write_timeout()
+            logger.warning("Timed out sending command: %s", e)
+            return False
         except serial.SerialException as e:
-            print(f"Error sending command: {e}")
+            SEND_FAILURES.inc()
+            logger.error("Error sending command: %s", e)
             return False
 
-    def _start_data_monitoring(self) -> None:
+    def start_data_monitoring(self) -> None:
         """
         Start the data monitoring thread.
         """
+        if self.data_monitoring_thread is not None and self.data_monitoring_thread.is_alive():
+            return
+
         self.should_monitor_data = True
         self.data_monitoring_thread = threading.Thread(target=self._monitor_data)
         self.data_monitoring_thread.daemon = True
@@ -182,9 +403,15 @@ class SerialManager:
             try:
                 incoming_data = self.serial_connection.readline()
 
-                if incoming_data and self.data_callback:
-                    decoded_data = incoming_data.decode('utf-8', errors='ignore')
-                    print(f"Received data: {decoded_data}")
+                if not incoming_data:
+                    continue
+
+                decoded_data = incoming_data.decode('utf-8', errors='ignore')
+                if any(listener(decoded_data) for listener in self.receive_listeners):
+                    continue
+
+                if self.data_callback:
+                    logger.info("Received data: %s", decoded_data.rstrip())
                     self.data_callback(decoded_data)
 
             except serial.SerialException:
@@ -2,14 +2,14 @@
 """
 Database setup script for MIZU Sensor Hub.
 
-This script helps users set up the PostgreSQL database and run
-initial migrations for the sensor data storage.
+This script helps users set up the PostgreSQL database (or the embedded
+SQLite database file) and run initial migrations for the sensor data storage.
 """
 
 import os
 import sys
 import subprocess
-from config import DATABASE_CONFIG, DATABASE_URL_TEMPLATE
+from config import DATABASE_CONFIG, DATABASE_URL, DATABASE_BACKEND, SQLITE_DATABASE_PATH
 
 
 def check_postgresql_installed():
@@ -106,11 +106,8 @@ def create_database_alternative():
 def run_migrations():
     """Run Alembic migrations to create tables."""
     try:
-        # Update alembic.ini with the correct database URL
-        database_url = DATABASE_URL_TEMPLATE.format(**DATABASE_CONFIG)
-
-        # Run alembic upgrade
-        result = subprocess.run(['alembic', 'upgrade', 'head'],
+        # Run alembic upgrade against the configured database URL
+        result = subprocess.run(['alembic', '-x', f'database_url={DATABASE_URL}', 'upgrade', 'head'],
                               capture_output=True, text=True, check=True)
         print("Migrations completed successfully.")
         print(result.stdout)
@@ -128,8 +125,7 @@ def test_database_connection():
     """Test the database connection."""
     try:
         from database_models import init_database
-        database_url = DATABASE_URL_TEMPLATE.format(**DATABASE_CONFIG)
-        init_database(database_url)
+        init_database(DATABASE_URL)
         print("Database connection test successful.")
         return True
     except Exception as e:
@@ -137,11 +133,37 @@ def test_database_connection():
         return False
 
 
+def setup_sqlite_database():
+    """Set up the embedded SQLite database file."""
+    print(f"\nDatabase configuration:")
+    print(f"  Backend: SQLite")
+    print(f"  File: {os.path.abspath(SQLITE_DATABASE_PATH)}")
+
+    # The database file is created by the first migration
+    print("\nRunning database migrations...")
+    if not run_migrations():
+        print("Failed to run migrations. Please check the error messages above.")
+        return False
+
+    print("\nTesting database connection...")
+    if not test_database_connection():
+        print("Database connection test failed.")
+        return False
+
+    print("\n" + "=" * 40)
+    print("Database setup completed successfully!")
+    print("You can now run the MIZU Sensor Hub application.")
+    return True
+
+
 def main():
     """Main setup function."""
     print("MIZU Sensor Hub Database Setup")
     print("=" * 40)
 
+    if DATABASE_BACKEND == "sqlite":
+        return setup_sqlite_database()
+
     # Check PostgreSQL installation
     if not check_postgresql_installed():
         print("\nPlease install PostgreSQL and ensure 'psql' is in your PATH.")
@@ -0,0 +1,141 @@
+"""
+Shared-memory ring buffer for MIZU Ground Station.
+
+A SharedRingBuffer is a fixed number of fixed-size slots in one
+multiprocessing.shared_memory block, passed from one producer process to
+one consumer process. Two semaphores count the free and the filled slots,
+so a full ring blocks (or refuses) the producer and an empty ring blocks
+the consumer; no slot is ever read while it is being written. Messages
+are copied straight into the slot, without a pipe or a pickled queue
+item per message.
+
+Each slot holds a 4-byte length followed by up to slot_size bytes of
+message. Threads within the producer or the consumer process may share
+their end; they are serialized by a per-process lock.
+"""
+
+import struct
+import threading
+from multiprocessing import get_context
+from multiprocessing.shared_memory import SharedMemory
+from typing import Optional
+
+# Message length header of every slot
+_LENGTH = struct.Struct("<I")
+
+
+class SharedRingBuffer:
+    """Single-producer, single-consumer ring of fixed-size slots in shared memory."""
+
+    def __init__(self, slot_count: int, slot_size: int, context=None) -> None:
+        """
+        Create the shared memory block and the slot semaphores.
+
+        The ring must be handed to the other process (as a Process
+        argument) before either end is used, since each end keeps its own
+        positions in the ring.
+
+        Args:
+            slot_count: Number of slots
+            slot_size: Largest message in bytes
+            context: multiprocessing context the semaphores are created in
+                (default: the spawn context)
+        """
+        if slot_count < 1 or slot_size < 1:
+            raise ValueError("A ring needs at least one slot of at least one byte")
+
+        context = context or get_context("spawn")
+        self.slot_count = slot_count
+        self.slot_size = slot_size
+        self._memory = SharedMemory(create=True, size=slot_count * (_LENGTH.size + slot_size))
+        self._owner = True
+        self._free_slots = context.Semaphore(slot_count)
+        self._filled_slots = context.Semaphore(0)
+        self._write_position = 0
+        self._read_position = 0
+        self._lock = threading.Lock()
+
+    def __getstate__(self) -> dict:
+        return {
+            "name": self._memory.name,
+            "slot_count": self.slot_count,
+            "slot_size": self.slot_size,
+            "free_slots": self._free_slots,
+            "filled_slots": self._filled_slots,
+        }
+
+    def __setstate__(self, state: dict) -> None:
+        self.slot_count = state["slot_count"]
+        self.slot_size = state["slot_size"]
+        # Processes started by the creator share its resource tracker, so
+        # attaching does not make this process responsible for the block
+        self._memory = SharedMemory(name=state["name"])
+        self._owner = False
+        self._free_slots = state["free_slots"]
+        self._filled_slots = state["filled_slots"]
+        self._write_position = 0
+        self._read_position = 0
+        self._lock = threading.Lock()
+
+    @property
+    def name(self) -> str:
+        """Name of the shared memory block."""
+        return self._memory.name
+
+    def put(self, message: bytes, timeout: Optional[float] = None) -> bool:
+        """
+        Copy a message into the next free slot.
+
+        Args:
+            message: Message of at most slot_size bytes
+            timeout: Seconds to wait for a free slot (None waits indefinitely, 0 not at all)
+
+        Returns:
+            True if the message was written, False if the ring stayed full
+
+        Raises:
+            ValueError: When the message is larger than a slot
+        """
+        if len(message) > self.slot_size:
+            raise ValueError(f"Message of {len(message)} bytes exceeds the {self.slot_size}-byte slot")
+        if not self._free_slots.acquire(True, timeout):
+            return False
+
+        with self._lock:
+            offset = self._write_position * (_LENGTH.size + self.slot_size)
+            _LENGTH.pack_into(self._memory.buf, offset, len(message))
+            start = offset + _LENGTH.size
+            self._memory.buf[start:start + len(message)] = message
+            self._write_position = (self._write_position + 1) % self.slot_count
+            # Released under the lock, so filled slots are announced in ring order
+            self._filled_slots.release()
+        return True
+
+    def get(self, timeout: Optional[float] = None) -> Optional[bytes]:
+        """
+        Copy the oldest message out of its slot and free the slot.
+
+        Args:
+            timeout: Seconds to wait for a message (None waits indefinitely, 0 not at all)
+
+        Returns:
+            The message, or None if the ring stayed empty
+        """
+        if not self._filled_slots.acquire(True, timeout):
+            return None
+
+        with self._lock:
+            offset = self._read_position * (_LENGTH.size + self.slot_size)
+            (length,) = _LENGTH.unpack_from(self._memory.buf, offset)
+            start = offset + _LENGTH.size
+            message = bytes(self._memory.buf[start:start + length])
+            self._read_position = (self._read_position + 1) % self.slot_count
+            self._free_slots.release()
+        return message
+
+    def close(self) -> None:
+        """Detach from the shared memory block; the creator also frees it."""
+        self._memory.close()
+        if self._owner:
+            self._memory.unlink()
+
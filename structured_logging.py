@@ -0,0 +1,140 @@
+"""
+Structured logging for MIZU Ground Station.
+
+This module configures asynchronous logging for the application. Log
+calls only put the record on a queue; a background listener thread
+formats it and writes it to the console and to a rotating file of JSON
+lines. Per-frame messages go to a dedicated logger that is sampled, so
+a large backlog does not flood the output.
+"""
+
+import atexit
+import itertools
+import json
+import logging
+import logging.handlers
+import os
+import queue
+from datetime import datetime, timezone
+from typing import Optional
+
+# Logger for messages emitted once per transmitted frame
+FRAME_LOGGER_NAME = "mizu.frames"
+
+# Attributes every LogRecord has; anything else was passed via extra=
+_STANDARD_RECORD_ATTRIBUTES = set(vars(logging.makeLogRecord({}))) | {"message", "asctime"}
+
+_listener: Optional[logging.handlers.QueueListener] = None
+
+
+class JsonFormatter(logging.Formatter):
+    """Formats records as single-line JSON objects, including extra= fields."""
+
+    def format(self, record: logging.LogRecord) -> str:
+        entry = {
+            "time": datetime.fromtimestamp(record.created, timezone.utc).isoformat(),
+            "level": record.levelname,
+            "logger": record.name,
+            "thread": record.threadName,
+            "message": record.getMessage(),
+        }
+        for key, value in vars(record).items():
+            if key not in _STANDARD_RECORD_ATTRIBUTES and not key.startswith("_"):
+                entry[key] = value
+        if record.exc_info:
+            entry["exception"] = self.formatException(record.exc_info)
+        elif record.exc_text:
+            entry["exception"] = record.exc_text
+        return json.dumps(entry, default=str)
+
+
+class SamplingFilter(logging.Filter):
+    """
+    Passes one in every N records below WARNING.
+
+    Warnings and errors always pass. The count is only approximately
+    exact when several threads log at once, which is fine for sampling.
+    """
+
+    def __init__(self, sample_rate: int) -> None:
+        """
+        Initialize the filter.
+
+        Args:
+            sample_rate: Keep one record out of this many (1 keeps all)
+        """
+        super().__init__()
+        self.sample_rate = max(1, sample_rate)
+        self._counter = itertools.count()
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        if record.levelno >= logging.WARNING:
+            return True
+        return next(self._counter) % self.sample_rate == 0
+
+
+def configure_logging(level: str = "INFO", log_file: Optional[str] = None,
+                      max_bytes: int = 5 * 1024 * 1024, backup_count: int = 5,
+                      frame_sample_rate: int = 1, console: bool = True) -> None:
+    """
+    Route all logging through a queue to a background writer thread.
+
+    Safe to call more than once; the previous configuration is replaced.
+
+    Args:
+        level: Minimum level name, e.g. "DEBUG" or "INFO"
+        log_file: Path of the rotating JSON log file (None disables the file)
+        max_bytes: Size in bytes at which the log file is rotated
+        backup_count: Number of rotated log files to keep
+        frame_sample_rate: Keep one per-frame message out of this many
+        console: Whether to also write human-readable lines to stderr
+    """
+    global _listener
+    shutdown_logging()
+
+    handlers = []
+    if console:
+        console_handler = logging.StreamHandler()
+        console_handler.setFormatter(logging.Formatter(
+            "%(asctime)s %(levelname)-7s %(name)s: %(message)s"
+        ))
+        handlers.append(console_handler)
+
+    if log_file:
+        directory = os.path.dirname(log_file)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        file_handler = logging.handlers.RotatingFileHandler(
+            log_file, maxBytes=max_bytes, backupCount=backup_count, encoding="utf-8"
+        )
+        file_handler.setFormatter(JsonFormatter())
+        handlers.append(file_handler)
+
+    log_queue: "queue.SimpleQueue[logging.LogRecord]" = queue.SimpleQueue()
+    root_logger = logging.getLogger()
+    for handler in list(root_logger.handlers):
+        root_logger.removeHandler(handler)
+    root_logger.addHandler(logging.handlers.QueueHandler(log_queue))
+    root_logger.setLevel(level)
+
+    frame_logger = logging.getLogger(FRAME_LOGGER_NAME)
+    for log_filter in list(frame_logger.filters):
+        frame_logger.removeFilter(log_filter)
+    if frame_sample_rate > 1:
+        frame_logger.addFilter(SamplingFilter(frame_sample_rate))
+
+    _listener = logging.handlers.QueueListener(log_queue, *handlers, respect_handler_level=True)
+    _listener.start()
+
+
+def shutdown_logging() -> None:
+    """Write out queued records and stop the background writer thread."""
+    global _listener
+    if _listener is not None:
+        _listener.stop()
+        for handler in _listener.handlers:
+            handler.close()
+        _listener = None
+
+
+atexit.register(shutdown_logging)
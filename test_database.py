@@ -6,16 +6,23 @@ This script tests the database connection, data parsing, and storage
 capabilities of the sensor hub application.
 """
 
+import os
 import sys
-from config import DATABASE_CONFIG, DATABASE_URL_TEMPLATE
+import tempfile
+from datetime import datetime, timedelta
+from sqlalchemy import update
+from config import DATABASE_URL
 from database_manager import DatabaseManager
+from database_models import SensorData, get_db_session
+from sensor_record import SensorRecord, format_frame
+from sensor_rollups import accumulate, choose_resolution, merge, to_history_point
 
 
 def test_database_connection():
     """Test database connection and initialization."""
     print("Testing database connection...")
 
-    database_url = DATABASE_URL_TEMPLATE.format(**DATABASE_CONFIG)
+    database_url = DATABASE_URL
     db_manager = DatabaseManager(database_url)
 
     if db_manager.initialize():
@@ -83,11 +90,172 @@ def test_database_save(db_manager):
         print("  ✗ Failed to save data to database")
 
 
+def create_scratch_database():
+    """Create a DatabaseManager on an empty SQLite database in a temporary directory."""
+    sqlite_path = os.path.join(tempfile.mkdtemp(prefix="mizu_test_"), "test.db")
+    db_manager = DatabaseManager(f"sqlite:///{sqlite_path}")
+    assert db_manager.initialize()
+    return db_manager
+
+
+def test_ingest_readings():
+    """Test bulk ingestion, including the frame stored with each reading."""
+    print("\nTesting reading ingestion...")
+
+    db_manager = create_scratch_database()
+    started_at = datetime(2024, 1, 15, 10, 30)
+    readings = [{"device_id": "INGEST_TEST", "ambient_temperature": 20.0 + index, "priority": index % 2,
+                 "timestamp": started_at + timedelta(minutes=index)} for index in range(5)]
+
+    assert db_manager.ingest_readings(readings) == (5, 0)
+    assert db_manager.ingest_readings([]) == (0, 0)
+    assert db_manager.ingest_readings([{"device_id": "INGEST_TEST", "humidity": 50.0}]) is None
+    assert db_manager.count_untransmitted() == 5
+
+    db = get_db_session()
+    try:
+        rows = db.query(SensorData).order_by(SensorData.id).all()
+        assert [row.priority for row in rows] == [0, 1, 0, 1, 0]
+        assert all(row.frame == format_frame(row) for row in rows)
+    finally:
+        db.close()
+    print("✓ Ingested 5 readings with their frames")
+
+
+def test_ingest_deduplication():
+    """Test that readings re-sent for the same device and timestamp are skipped, not inserted twice."""
+    print("\nTesting duplicate reading ingestion...")
+
+    db_manager = create_scratch_database()
+    started_at = datetime(2024, 1, 15, 10, 30)
+    readings = [{"device_id": "DEDUP_TEST", "ambient_temperature": 20.0 + index,
+                 "timestamp": started_at + timedelta(minutes=index)} for index in range(4)]
+    assert db_manager.ingest_readings(readings) == (4, 0)
+
+    # A retried delivery, then one overlapping the stored readings, with a repeat inside the batch
+    assert db_manager.ingest_readings(readings) == (0, 4)
+    retried = [dict(reading, ambient_temperature=99.0) for reading in readings[2:]]
+    new = {"device_id": "DEDUP_TEST", "ambient_temperature": 30.0, "timestamp": started_at + timedelta(minutes=4)}
+    other_device = dict(readings[0], device_id="DEDUP_OTHER")
+    assert db_manager.ingest_readings(retried + [new, new, other_device]) == (2, 3)
+
+    db = get_db_session()
+    try:
+        rows = db.query(SensorData).filter(SensorData.device_id == "DEDUP_TEST").order_by(SensorData.timestamp).all()
+        assert [row.ambient_temperature for row in rows] == [20.0, 21.0, 22.0, 23.0, 30.0]
+    finally:
+        db.close()
+    assert db_manager.count_untransmitted() == 6
+    print("✓ Duplicates skipped; the first stored reading is kept")
+
+
+def test_untransmitted_frames():
+    """Test that stored frames are sent as they are, and rows without one are formatted."""
+    print("\nTesting precomputed frames...")
+
+    db_manager = create_scratch_database()
+    timestamp = datetime(2024, 1, 15, 10, 30)
+    assert db_manager.ingest_readings([{"device_id": "FRAME_TEST", "ambient_temperature": 20.0,
+                                        "timestamp": timestamp}]) == (1, 0)
+
+    db = get_db_session()
+    try:
+        # Rows edited after insert keep the frame stored at insert time
+        db.execute(update(SensorData).values(ambient_temperature=30.0))
+        db.add(SensorData(device_id="FRAME_TEST", ambient_temperature=25.0, transmitted=False,
+                          timestamp=timestamp + timedelta(minutes=1)))
+        db.commit()
+        stored_id, formatted_id = [row.id for row in db.query(SensorData).order_by(SensorData.id)]
+    finally:
+        db.close()
+
+    frames = dict(db_manager.get_untransmitted_frames())
+    assert "ambient_temp=20.0," in frames[stored_id]
+    assert "ambient_temp=25.0," in frames[formatted_id]
+    assert db_manager.get_untransmitted_frames(exclude_ids=[stored_id]) == [(formatted_id, frames[formatted_id])]
+    print("✓ Stored frame sent unchanged; frame of a row inserted without one formatted")
+
+
+def test_device_history():
+    """Test streaming one device's readings and reading its history from raw data and rollups."""
+    print("\nTesting device history...")
+
+    db_manager = create_scratch_database()
+    started_at = datetime(2024, 1, 15)
+    readings = [{"device_id": "HISTORY_TEST", "ambient_temperature": 20.0 + index % 4,
+                 "timestamp": started_at + timedelta(minutes=30 * index)} for index in range(144)]
+    readings += [{"device_id": "OTHER_DEVICE", "ambient_temperature": 99.0,
+                  "timestamp": started_at + timedelta(minutes=30 * index)} for index in range(10)]
+    assert db_manager.ingest_readings(readings) == (154, 0)
+
+    # The end of the range is exclusive; rows are fetched across several buffers
+    records = list(db_manager.iter_device_readings("HISTORY_TEST", started_at + timedelta(hours=1),
+                                                   started_at + timedelta(hours=4), fetch_size=2))
+    assert [record.timestamp for record in records] == [started_at + timedelta(minutes=30 * index)
+                                                        for index in range(2, 8)]
+    assert {record.device_id for record in records} == {"HISTORY_TEST"}
+    stream = db_manager.iter_device_readings("HISTORY_TEST", started_at, started_at + timedelta(days=3))
+    assert next(stream).ambient_temperature == 20.0
+    stream.close()
+
+    # Short ranges are answered from the raw readings
+    points = db_manager.get_device_history("HISTORY_TEST", started_at, started_at + timedelta(hours=6))
+    assert len(points) == 12 and points[0]["period_seconds"] == 0 and points[0]["count"] == 1
+    assert points[1]["ambient_temperature_mean"] == 21.0
+
+    assert db_manager.refresh_rollups(1000, settle_seconds=0) == 154
+    points = db_manager.get_device_history("HISTORY_TEST", started_at, started_at + timedelta(days=2))
+    assert len(points) == 48 and points[0]["period_seconds"] == 3600
+    assert points[0]["count"] == 2 and points[0]["ambient_temperature_mean"] == 20.5
+    points = db_manager.get_device_history("HISTORY_TEST", started_at, started_at + timedelta(days=3),
+                                           resolution="day")
+    assert [point["count"] for point in points] == [48, 48, 48]
+    assert points[0]["ambient_temperature_min"] == 20.0 and points[0]["ambient_temperature_max"] == 23.0
+    assert db_manager.get_device_history("MISSING", started_at, started_at + timedelta(days=3)) == []
+    print(f"✓ Streamed {len(records)} readings; daily history of {len(points)} points from rollups")
+
+
+def test_rollup_statistics():
+    """Test that rollups merged incrementally match rollups computed in one pass."""
+    print("\nTesting rollup statistics...")
+
+    started_at = datetime(2024, 1, 15)
+    records = [
+        SensorRecord(index, 'ROLLUP_TEST', 20.0 + index % 7, None if index % 3 else 50.0 + index, 45.0, 22.0,
+                     5.0, 500.0, 0.5, 0, started_at + timedelta(minutes=7 * index))
+        for index in range(100)
+    ]
+
+    whole = accumulate(records, 3600)
+    first, second = accumulate(records[:40], 3600), accumulate(records[40:], 3600)
+    merged = {key: merge(first[key], rollup) if key in first else rollup for key, rollup in second.items()}
+    merged.update({key: rollup for key, rollup in first.items() if key not in second})
+    assert merged == whole
+
+    point = to_history_point(whole[('ROLLUP_TEST', started_at)], 3600)
+    print(f"✓ First hour: {point['count']} readings, mean temperature {point['ambient_temperature_mean']}")
+    assert point['count'] == 9 and point['ambient_temperature_min'] == 20.0 and point['ambient_temperature_max'] == 26.0
+    assert point['humidity_mean'] == (50.0 + 53.0 + 56.0) / 3
+
+    assert choose_resolution(started_at, started_at + timedelta(days=60), 24) == "day"
+    assert choose_resolution(started_at, started_at + timedelta(days=2), 24) == "hour"
+    assert choose_resolution(started_at, started_at + timedelta(hours=6), 24) is None
+
+
 def main():
     """Main test function."""
     print("MIZU Sensor Hub Database Test")
     print("=" * 40)
 
+    # Test rollup statistics (no database needed)
+    test_rollup_statistics()
+
+    # Test ingestion, stored frames and device history (temporary SQLite database)
+    test_ingest_readings()
+    test_ingest_deduplication()
+    test_untransmitted_frames()
+    test_device_history()
+
     # Test database connection
     db_manager = test_database_connection()
     if not db_manager:
@@ -7,20 +7,39 @@ to ensure everything works correctly.
 
 import sys
 import os
+import tempfile
+import time
 
 # Add the current directory to the Python path
 sys.path.append(os.path.dirname(os.path.abspath(__file__)))
 
+from datetime import datetime, timedelta
+
+import database_manager
 from database_manager import DatabaseManager
 from database_models import SensorData, get_db_session
-from config import DATABASE_CONFIG, DATABASE_URL_TEMPLATE
+from sensor_record import SensorBatch, SensorRecord, format_frame
+from delta_encoding import DeltaDecoder, DeltaDeliveryTracker, DeltaEncoder
+from backlog_aggregation import AggregationPolicy, format_summary_frame, summarize
+from frame_compression import FrameCompressor, decompress_frame, load_dictionary, train_dictionary
+from ingest_server import IngestServer, _PendingWrite, parse_readings
+from shared_ring import SharedRingBuffer
+from outbox import ENTRY_CRC, OutboxQueue
+from ack_journal import JOURNAL_RECORD, AckJournal
+from serial_manager import SerialManager
+from reliable_link import ReliableLink
+from link_rate import AdaptiveRateController
+from tracing import TRACER, RingBufferSink
+from transmit_scheduler import TransmitScheduler
+from config import DATABASE_URL, DELTA_FIELD_PRECISION
+import train_dictionary as dictionary_trainer
 
 
 def test_database_operations():
     """Test database operations and transmission formatting."""
 
     # Initialize database manager
-    database_url = DATABASE_URL_TEMPLATE.format(**DATABASE_CONFIG)
+    database_url = DATABASE_URL
     db_manager = DatabaseManager(database_url)
 
     if not db_manager.initialize():
@@ -102,5 +121,539 @@ def test_database_operations():
     print(f"Remaining untransmitted records: {len(remaining_data)}")
 
 
+def test_batch_formatting():
+    """Test that batch formatting produces the same frames as formatting one entry at a time."""
+
+    db_manager = DatabaseManager(DATABASE_URL)
+    records = [
+        SensorRecord(1, 'SENSOR001', 25.5, 60.2, 45.8, 22.1, 5.2, 500.0, 0.8, 0, datetime(2024, 1, 15, 10, 30)),
+        SensorRecord(2, 'SENSOR002', None, 0.0, -0.0, 1e-05, 1e16, 123456.789, None, 1, datetime(2024, 1, 15, 10, 30, 0, 250)),
+        SensorRecord(3, 'SENSOR001', 25.5, -3.25, 0.1, 22.1, 0.0, 480.0, 0.7, 0, datetime(2024, 1, 15, 10, 31)),
+    ]
+
+    expected = [db_manager.format_sensor_data_for_transmission(record) for record in records]
+    formatted = db_manager.format_batch_for_transmission(SensorBatch.from_records(records))
+    for frame in formatted:
+        print(frame)
+
+    assert formatted == expected
+
+
+def test_batch_formatting_nan():
+    """Test that a NaN stored in the database is sent as 0.0, with and without NumPy."""
+
+    db_manager = DatabaseManager(DATABASE_URL)
+    row = (1, 'SENSOR001', float("nan"), 60.2, None, 22.1, 5.2, 500.0, 0.8, 0, datetime(2024, 1, 15, 10, 30))
+    expected = ["#device_id=SENSOR001,timestamp=2024-01-15T10:30:00,ambient_temp=0.0,humidity=60.2,"
+                "soil_moisture=0.0,soil_temp=22.1,wind_speed=5.2,ambient_light=500.0,uv_light=0.8~"]
+
+    assert db_manager.format_batch_for_transmission(SensorBatch.from_rows([row])) == expected
+    numpy_module, database_manager.numpy = database_manager.numpy, None
+    try:
+        assert db_manager.format_batch_for_transmission(SensorBatch.from_rows([row])) == expected
+    finally:
+        database_manager.numpy = numpy_module
+
+
+def test_batch_compression():
+    """Test that a compressed batch restores the original frames and is shorter than them."""
+
+    records = [
+        SensorRecord(index, f'SENSOR00{index % 3}', 25.0 + index / 10, 60.2, 45.8, 22.1, 5.2, 500.0, 0.8, 0,
+                     datetime(2024, 1, 15, 10, index % 60))
+        for index in range(200)
+    ]
+    frames = [format_frame(record) for record in records]
+    dictionary = train_dictionary(frames[:150])
+    compressor = FrameCompressor(dictionary, 0x0001)
+
+    batch = frames[150:158]
+    wire_frame = compressor.compress(batch)
+    print(f"{sum(len(frame) for frame in batch)} chars compressed to {len(wire_frame)}: {wire_frame}")
+
+    assert wire_frame.startswith("$000108:") and wire_frame.endswith("~")
+    assert decompress_frame(wire_frame, {0x0001: dictionary}) == batch
+    assert len(wire_frame) * 2 < sum(len(frame) for frame in batch)
+
+
+def test_dictionary_training_script():
+    """Test that train_dictionary.py trains and stores a dictionary from a seeded SQLite database."""
+
+    directory = tempfile.mkdtemp(prefix="mizu_test_")
+    database_url = f"sqlite:///{os.path.join(directory, 'readings.db')}"
+    db_manager = DatabaseManager(database_url)
+    assert db_manager.initialize()
+
+    started = datetime(2024, 1, 15, 10, 0)
+    readings = [{"device_id": f"SENSOR00{i % 3}", "ambient_temperature": 20.0 + i % 7, "humidity": 60.0 - i % 5,
+                 "timestamp": started + timedelta(minutes=i)} for i in range(50)]
+    assert db_manager.ingest_readings(readings) == (50, 0)
+
+    dictionary_directory = os.path.join(directory, "dictionaries")
+    arguments = sys.argv
+    sys.argv = ["train_dictionary.py", "--url", database_url, "--directory", dictionary_directory]
+    try:
+        assert dictionary_trainer.main()
+    finally:
+        sys.argv = arguments
+
+    dictionary_id, dictionary = load_dictionary(dictionary_directory)
+    assert dictionary_id == 1 and dictionary
+
+
+def test_delta_encoding():
+    """Test that delta frames decode to the quantized readings, and that a dropped frame is recovered at the next keyframe."""
+
+    records = [
+        SensorRecord(index, f'SENSOR00{index % 2}', 25.0 + index / 10, 60.2, 45.8, 22.1, 5.2, 500.0 + index, 0.8, 0,
+                     datetime(2024, 1, 15, 10, index))
+        for index in range(40)
+    ]
+    encoder = DeltaEncoder(DELTA_FIELD_PRECISION, keyframe_interval=8)
+    frames = [encoder.encode(format_frame(record)) for record in records]
+    for frame in frames[:4]:
+        print(frame)
+
+    decoder = DeltaDecoder(DELTA_FIELD_PRECISION)
+    decoded = [reading for frame in frames for reading in decoder.decode(frame)]
+    assert [format_frame(reading) for reading in decoded] == [format_frame(record) for record in records]
+
+    # Reordered frames still decode; deltas after a dropped frame are lost until the device's next keyframe
+    decoder = DeltaDecoder(DELTA_FIELD_PRECISION)
+    received = frames[:4] + [frames[5], frames[4]] + frames[6:10] + frames[11:]
+    decoded = [reading for frame in received for reading in decoder.decode(frame)]
+    assert frames[16].startswith("#K") and decoder.lost == 2
+    assert len(decoded) == len(received) - decoder.lost
+
+
+def test_delta_delivery_after_loss():
+    """Test that a frame given up mid-window leaves every later delta of its device decoded or untransmitted."""
+
+    records = {
+        record_id: SensorRecord(record_id, 'SENSOR001', 25.0 + record_id / 10, 60.2, 45.8, 22.1, 5.2, 500.0, 0.8, 0,
+                                datetime(2024, 1, 15, 10, record_id))
+        for record_id in range(1, 7)
+    }
+    encoder = DeltaEncoder(DELTA_FIELD_PRECISION, keyframe_interval=16)
+    decoder = DeltaDecoder(DELTA_FIELD_PRECISION)
+    tracker = DeltaDeliveryTracker()
+    journaled = []
+
+    # One window of six frames; frame 3 never reaches the far end and is given up after the others are acknowledged
+    window = {record_id: encoder.encode(format_frame(record)) for record_id, record in records.items()}
+    for record_id, frame in window.items():
+        tracker.sent(record_id, frame)
+    decoded = [reading for record_id, frame in window.items() if record_id != 3 for reading in decoder.decode(frame)]
+    for record_id in (1, 2, 4, 5):
+        journaled += tracker.delivered(record_id)
+    assert tracker.failed(3) == [4, 5]
+    encoder.force_keyframe()
+    journaled += tracker.delivered(6)  # acknowledged after frame 3 was given up
+    assert journaled == [1, 2] and len(decoded) == 2 and 6 not in tracker
+
+    # Every record either decoded or stays untransmitted, and the rest is delivered in the next cycle
+    untransmitted = [record_id for record_id in records if record_id not in journaled]
+    for record_id in untransmitted:
+        frame = encoder.encode(format_frame(records[record_id]))
+        tracker.sent(record_id, frame)
+        decoded += decoder.decode(frame)
+        journaled += tracker.delivered(record_id)
+    assert sorted(journaled) == list(records)
+    assert sorted(format_frame(reading) for reading in decoded) == sorted(format_frame(record) for record in records.values())
+
+    # A frame retransmitted late releases the acknowledgements held back behind it
+    tracker = DeltaDeliveryTracker()
+    for record_id, frame in zip((1, 2, 3), ("#K000,A,1~", "#D001,A,1~", "#D002,A,1~")):
+        tracker.sent(record_id, frame)
+    assert tracker.delivered(2) == [] and tracker.delivered(3) == []
+    assert tracker.delivered(1) == [1, 2, 3]
+
+
+def test_backlog_summaries():
+    """Test per-device window summaries and the backlog-driven aggregation policy."""
+
+    records = [
+        SensorRecord(index, f'SENSOR00{index % 2}', 20.0 + index, None, 45.8, 22.1, 5.2, 500.0, 0.8, 0,
+                     datetime(2024, 1, 15, 10, index))
+        for index in range(10)
+    ]
+    summaries = summarize(records, 300)
+    frame = format_summary_frame(summaries[0])
+    print(frame)
+
+    assert [(summary["device_id"], summary["reading_count"]) for summary in summaries] == [
+        ('SENSOR000', 3), ('SENSOR001', 2), ('SENSOR000', 2), ('SENSOR001', 3)
+    ]
+    assert summaries[0]["record_ids"] == [0, 2, 4] and summaries[0]["humidity_mean"] is None
+    assert frame.startswith("#S,device_id=SENSOR000,window_start=2024-01-15T10:00:00,window=300,count=3,")
+    assert "ambient_temp=20.0/22.0/24.0" in frame and frame.endswith("~")
+
+    policy = AggregationPolicy([(5000, 300), (20000, 900)], exit_backlog=1000)
+    assert [policy.window_for(size) for size in (4000, 6000, 25000, 3000, 999, 4000)] == [None, 300, 900, 300, None, None]
+
+
+def test_ingest_parsing():
+    """Test parsing of ingest endpoint bodies in JSON lines and frame format."""
+
+    lines = (
+        '{"device_id": "SENSOR001", "ambient_temp": 25.5, "humidity": 60, "timestamp": "2024-01-15T10:30:00"}\n'
+        '\n'
+        '{"device_id": "SENSOR002", "uv_light": 0.7, "timestamp": "2024-01-15T10:31:00"}\n'
+    )
+    readings = parse_readings(lines, "application/x-ndjson")
+    assert readings[0] == {"device_id": "SENSOR001", "ambient_temperature": 25.5, "humidity": 60.0,
+                           "timestamp": datetime(2024, 1, 15, 10, 30)}
+    assert readings[1] == {"device_id": "SENSOR002", "uv_light": 0.7, "timestamp": datetime(2024, 1, 15, 10, 31)}
+
+    # Timestamps with a UTC offset are stored as naive UTC
+    readings = parse_readings('{"device_id": "SENSOR001", "timestamp": "2024-01-15T12:30:00+02:00"}',
+                              "application/json")
+    assert readings[0]["timestamp"] == datetime(2024, 1, 15, 10, 30)
+
+    record = SensorRecord(None, 'SENSOR003', 23.1, 65.4, 38.9, 20.5, 7.1, 520.0, 0.9, 0, datetime(2024, 1, 15, 10, 31))
+    readings = parse_readings(format_frame(record) + "\n" + format_frame(record), "text/plain")
+    assert len(readings) == 2 and readings[0]["device_id"] == 'SENSOR003' and readings[0]["soil_moisture"] == 38.9
+    assert readings[0]["timestamp"] == record.timestamp
+
+    for body, content_type in (('{"device_id": "SENSOR001", "colour": 1}', "application/x-ndjson"),
+                               ('{"humidity": 60}', "application/x-ndjson"),
+                               ('{"device_id": "SENSOR001", "humidity": 60}', "application/x-ndjson"),
+                               ('{"device_id": "%s", "timestamp": "2024-01-15T10:30:00"}' % ("S" * 101),
+                                "application/x-ndjson"),
+                               ('{"device_id": "SENSOR001", "priority": "high", "timestamp": "2024-01-15T10:30:00"}',
+                                "application/x-ndjson"),
+                               ('{"device_id": "SENSOR001", "priority": 2.5, "timestamp": "2024-01-15T10:30:00"}',
+                                "application/x-ndjson"),
+                               ("#device_id=SENSOR001~", "text/plain"),
+                               (format_frame(record)[:-1], "text/plain")):
+        try:
+            parse_readings(body, content_type)
+        except ValueError as e:
+            print(f"Rejected: {e}")
+        else:
+            raise AssertionError(f"Accepted malformed body {body!r}")
+
+
+def test_ingest_batch_isolation():
+    """Test that a request failing in a coalesced batch does not fail the others."""
+
+    class FailingDatabase:
+        def ingest_readings(self, readings):
+            if any(reading["device_id"] == "BROKEN" for reading in readings):
+                return None
+            return len(readings), 0
+
+    server = IngestServer(FailingDatabase(), "127.0.0.1", 0)
+    good = _PendingWrite([{"device_id": "SENSOR001", "timestamp": datetime(2024, 1, 15, 10, 30)}])
+    bad = _PendingWrite([{"device_id": "BROKEN", "timestamp": datetime(2024, 1, 15, 10, 30)}])
+    server._write_batch([good, bad])
+    assert good.done.is_set() and good.committed
+    assert bad.done.is_set() and not bad.committed
+
+
+def test_shared_ring():
+    """Test the shared-memory ring: ordering across wraparound, a full ring and oversize messages."""
+
+    ring = SharedRingBuffer(slot_count=3, slot_size=16)
+    try:
+        for round_number in range(3):
+            messages = [f"frame {round_number}.{i}".encode() for i in range(3)]
+            assert all(ring.put(message, timeout=0) for message in messages)
+            assert not ring.put(b"overflow", timeout=0)
+            assert [ring.get(timeout=0) for _ in messages] == messages
+        assert ring.get(timeout=0) is None
+
+        assert ring.put(b"", timeout=0) and ring.get(timeout=0) == b""
+        try:
+            ring.put(b"x" * 17, timeout=0)
+        except ValueError as e:
+            print(f"Rejected: {e}")
+        else:
+            raise AssertionError("Accepted a message larger than a slot")
+    finally:
+        ring.close()
+
+
+def test_outbox_recovery():
+    """Test that the outbox survives a reopen, a torn tail entry and segment rotation."""
+
+    directory = tempfile.mkdtemp(prefix="mizu_test_")
+    outbox = OutboxQueue(directory, 1024)
+    for record_id in (1, 2, 3):
+        assert outbox.enqueue(record_id, f"#frame {record_id}~".encode())
+    outbox.ack(2)
+    outbox.close()
+
+    outbox = OutboxQueue(directory, 1024)
+    assert outbox.pending() == [(1, b"#frame 1~"), (3, b"#frame 3~")]
+
+    # Corrupt the checksum of the last entry, as a write torn by a crash would
+    assert outbox.enqueue(4, b"#frame 4~")
+    torn_offset = outbox._offset - ENTRY_CRC.size
+    outbox.close()
+    segment_path = os.path.join(directory, os.listdir(directory)[0])
+    with open(segment_path, "r+b") as segment_file:
+        segment_file.seek(torn_offset)
+        segment_file.write(b"\xff\xff\xff\xff")
+
+    outbox = OutboxQueue(directory, 1024)
+    assert outbox.known_ids() == {1, 3}
+    assert outbox.enqueue(5, b"#frame 5~")
+    outbox.close()
+    outbox = OutboxQueue(directory, 1024)
+    assert [record_id for record_id, _ in outbox.pending()] == [1, 3, 5]
+
+    # Filling the segment compacts the pending frames into a new one
+    first_segment = outbox._segment_number
+    for record_id in range(10, 60):
+        assert outbox.enqueue(record_id, b"#" + b"x" * 40 + b"~")
+        outbox.ack(record_id)
+    assert outbox._segment_number > first_segment
+    assert len(os.listdir(directory)) == 1
+    assert [record_id for record_id, _ in outbox.pending()] == [1, 3, 5]
+    outbox.close()
+
+    outbox = OutboxQueue(directory, 1024)
+    assert outbox.pending() == [(1, b"#frame 1~"), (3, b"#frame 3~"), (5, b"#frame 5~")]
+    outbox.close()
+
+
+def test_ack_journal_recovery():
+    """Test replay after a crash, a truncated trailing record and compaction of the journal."""
+
+    path = os.path.join(tempfile.mkdtemp(prefix="mizu_test_"), "ack_journal.log")
+    committed = []
+
+    def commit(record_ids):
+        committed.extend(record_ids)
+        return True
+
+    # A crash leaves the acknowledgements uncommitted; they are replayed on restart
+    journal = AckJournal(path, commit)
+    for record_id in (1, 2, 3):
+        journal.append(record_id)
+    os.close(journal._fd)
+
+    journal = AckJournal(path, commit)
+    assert journal.pending_ids() == {1, 2, 3}
+    assert journal.flush() and committed == [1, 2, 3]
+    assert len(journal) == 0 and os.path.getsize(path) == 0
+
+    # A record torn by a crash is dropped, along with the acknowledgement it held
+    journal.append(4)
+    journal.append(5)
+    os.close(journal._fd)
+    with open(path, "r+b") as journal_file:
+        journal_file.truncate(JOURNAL_RECORD.size + 5)
+
+    journal = AckJournal(path, commit)
+    assert journal.pending_ids() == {4}
+    assert os.path.getsize(path) == JOURNAL_RECORD.size
+    journal.close()
+
+    # An oversized journal is rewritten with only the uncommitted acknowledgements
+    os.remove(path)
+    commit_results = [True]
+    journal = AckJournal(path, lambda record_ids: commit_results.pop() if commit_results else False,
+                         batch_size=2, max_size=10 * JOURNAL_RECORD.size)
+    for record_id in range(1, 11):
+        journal.append(record_id)
+    assert not journal.flush()
+    assert os.path.getsize(path) == 8 * JOURNAL_RECORD.size
+    journal.close()
+    journal = AckJournal(path, commit)
+    assert journal.pending_ids() == set(range(3, 11))
+    journal.close()
+
+
+def test_adaptive_rate():
+    """Test that the link rate rises additively while frames get through and halves on congestion."""
+
+    controller = AdaptiveRateController(initial_rate=500.0, min_rate=100.0, increase_step=100.0,
+                                        decrease_factor=0.5)
+    controller.reset(baud_rate=9600)  # 960 characters per second on the wire
+    assert controller.snapshot()["rtt"] is None
+
+    controller.on_write_success(100, 0.2)
+    assert controller.rate == 600.0
+    for _ in range(10):
+        controller.on_write_success(100, 0.2)
+    assert controller.rate == 960.0 and controller.char_delay == 0.0
+
+    # One decrease per round trip, down to the minimum rate
+    controller.on_ack(0.01)
+    controller.on_nack()
+    controller.on_ack_timeout()
+    assert controller.rate == 480.0
+    for _ in range(3):
+        time.sleep(0.02)
+        controller.on_write_timeout()
+    assert controller.rate == 100.0
+
+    snapshot = controller.snapshot()
+    assert snapshot["nacks"] == 1 and snapshot["ack_timeouts"] == 1 and snapshot["write_timeouts"] == 3
+    assert snapshot["rtt"] == 0.01 and snapshot["frames_sent"] == 11
+
+    # With increase_on_ack only acknowledgements raise the rate; without adaptation nothing does
+    controller = AdaptiveRateController(500.0, 100.0, 100.0, 0.5, increase_on_ack=True)
+    controller.reset(baud_rate=9600)
+    controller.on_write_success(100, 0.2)
+    assert controller.rate == 500.0
+    controller.on_ack(None)
+    assert controller.rate == 600.0 and controller.snapshot()["rtt"] is None
+
+    controller = AdaptiveRateController(500.0, 100.0, 100.0, 0.5, adaptive=False)
+    controller.reset(baud_rate=9600)
+    controller.on_write_success(100, 0.2)
+    controller.on_nack()
+    assert controller.rate == 500.0
+    print(f"✓ Link rate adapts between {controller.min_rate:.0f} and 960 characters per second")
+
+
+def test_transmit_scheduler():
+    """Test the sending order of the scheduling policies, with and without a plan."""
+
+    temp_dir = tempfile.mkdtemp(prefix="mizu_scheduler_")
+    manager = DatabaseManager(f"sqlite:///{os.path.join(temp_dir, 'test.db')}")
+    assert manager.initialize()
+    started_at = datetime(2024, 1, 15, 10, 30)
+    manager.ingest_readings([{"device_id": device_id, "ambient_temperature": 20.0, "priority": priority,
+                              "timestamp": started_at + timedelta(minutes=index)}
+                             for index, (device_id, priority) in enumerate(
+                                 [("A", 0), ("A", 2), ("A", 0), ("B", 1), ("B", 0)])])
+
+    expected = {"fifo": [1, 2, 3, 4, 5], "newest_first": [5, 4, 3, 2, 1],
+                "fair": [1, 4, 2, 5, 3], "priority": [2, 4, 1, 3, 5]}
+    for policy, ranked_ids in expected.items():
+        scheduler = TransmitScheduler(policy)
+        records = manager.get_untransmitted_data(limit=3, order=scheduler.query_order)
+        assert [record.id for record in records] == ranked_ids[:3], policy
+
+        # Outbox frames follow the plan; frames outside it follow in ID order
+        scheduler.plan(record.id for record in records)
+        pending = [(record_id, b"") for record_id in [7, 6, 5, 4, 3, 2, 1]]
+        unranked = sorted(set(range(1, 8)) - set(ranked_ids[:3]), reverse=policy == "newest_first")
+        assert [record_id for record_id, _ in scheduler.order(pending)] == ranked_ids[:3] + unranked, policy
+
+        # The worst unplanned frame makes room, never a protected one
+        queued = {record_id for record_id, _ in pending}
+        assert scheduler.eviction_candidate(queued, protected_ids=set()) == unranked[-1]
+        assert scheduler.eviction_candidate(queued, protected_ids=set(unranked)) is None
+
+    try:
+        TransmitScheduler("random")
+    except ValueError:
+        pass
+    else:
+        raise AssertionError("unknown policy accepted")
+    print("✓ Scheduling policies order the backlog and the outbox")
+
+
+def test_reliable_link_retransmission():
+    """Test that the reliable link retransmits NAKed and overdue frames and gives up after its retries."""
+
+    class RecordingSerial:
+        is_connected = True
+
+        def __init__(self):
+            self.written = []
+
+        def add_receive_listener(self, listener):
+            pass
+
+        def send_command(self, command):
+            self.written.append(command)
+            return True
+
+    serial_port = RecordingSerial()
+    delivered, failed = [], []
+    link = ReliableLink(serial_port, window_size=2, ack_timeout=0.05, max_retries=1,
+                        on_delivered=delivered.append, on_failed=failed.append)
+
+    assert link.send(1, "#a~") and link.send(2, "#b~")
+    assert not link.send(3, "#c~", timeout=0)  # window full
+    assert serial_port.written == [ReliableLink.encode_frame(0, "#a~"), ReliableLink.encode_frame(1, "#b~")]
+
+    # A NAK retransmits at once, an ACK delivers
+    link.handle_line("NAK 00\n")
+    link.service()
+    assert serial_port.written[-1] == ReliableLink.encode_frame(0, "#a~")
+    link.handle_line("ACK 00\n")
+    link.service()
+    assert delivered == [1] and 1 not in link and 2 in link
+
+    # An unacknowledged frame is retransmitted after the timeout, then given up
+    time.sleep(0.06)
+    link.service()
+    assert serial_port.written[-1] == ReliableLink.encode_frame(1, "#b~") and len(serial_port.written) == 4
+    time.sleep(0.06)
+    link.service()
+    assert failed == [2] and len(link) == 0 and len(serial_port.written) == 4
+
+
+def test_disconnect_during_write():
+    """Test that disconnecting with a frame in flight stops the writer before the port closes."""
+
+    import serial
+
+    manager = SerialManager()
+    manager.serial_connection = serial.serial_for_url("loop://", timeout=0.1)
+    manager._start_writer()
+    manager.is_connected = True
+
+    writer = manager.writer_thread
+    in_flight = manager.submit_command("#" + "x" * 200 + "~\n")  # about 10 s at 0.05 s per character
+    queued = manager.submit_command("#queued~\n")
+    while not in_flight.running():
+        time.sleep(0.01)
+
+    started = time.monotonic()
+    manager.disconnect()
+    assert time.monotonic() - started < 1.0
+    assert not writer.is_alive() and manager.writer_thread is None
+    assert manager.serial_connection is None
+    assert in_flight.result(timeout=0) is False and queued.result(timeout=0) is False
+    assert manager.submit_command("#late~\n").result(timeout=0) is False
+
+
+def test_write_span_parent():
+    """Test that the writer thread's serial.write span nests in the span that queued the command."""
+
+    import serial
+
+    sink = RingBufferSink()
+    TRACER.set_sink(sink)
+    manager = SerialManager()
+    try:
+        manager.serial_connection = serial.serial_for_url("loop://", timeout=0.1)
+        manager._start_writer()
+        manager.is_connected = True
+        assert manager.send_command("#a~")
+    finally:
+        manager.disconnect()
+        TRACER.set_sink(None)
+
+    spans = {span.name: span for span in sink.spans()}
+    assert spans["serial.write"].parent_id == spans["serial.send"].span_id
+    assert spans["serial.write"].trace_id == spans["serial.send"].trace_id
+
+
 if __name__ == "__main__":
+    test_batch_formatting()
+    test_batch_formatting_nan()
+    test_batch_compression()
+    test_dictionary_training_script()
+    test_delta_encoding()
+    test_delta_delivery_after_loss()
+    test_backlog_summaries()
+    test_ingest_parsing()
+    test_ingest_batch_isolation()
+    test_shared_ring()
+    test_outbox_recovery()
+    test_ack_journal_recovery()
+    test_adaptive_rate()
+    test_transmit_scheduler()
+    test_reliable_link_retransmission()
+    test_disconnect_during_write()
+    test_write_span_parent()
     test_database_operations()
@@ -0,0 +1,369 @@
+"""
+Tracing for MIZU Ground Station.
+
+This module provides timed spans around the phases of a transmission
+cycle (database poll, formatting, serial write, acknowledgement commit)
+and hands finished spans to a pluggable sink: an in-memory ring, a file
+of JSON lines, or an OpenTelemetry (OTLP/HTTP JSON) exporter to a local
+collector. Without a sink, starting a span returns a shared no-op span.
+"""
+
+import contextvars
+import json
+import logging
+import os
+import random
+import threading
+import time
+import urllib.request
+from collections import deque
+from typing import Any, Dict, List, Optional
+
+logger = logging.getLogger(__name__)
+
+# Sink names accepted by create_sink()
+SINK_RING = "ring"
+SINK_JSON = "json"
+SINK_OTLP = "otlp"
+
+_current_span: "contextvars.ContextVar[Optional[Span]]" = contextvars.ContextVar("current_span", default=None)
+
+
+class Span:
+    """A timed operation, optionally nested in a parent span."""
+
+    __slots__ = ("name", "trace_id", "span_id", "parent_id", "start_ns", "end_ns",
+                 "attributes", "error", "_tracer", "_token")
+
+    def __init__(self, tracer: "Tracer", name: str, parent: Optional["Span"],
+                 attributes: Optional[Dict[str, Any]]) -> None:
+        self.name = name
+        self.trace_id = parent.trace_id if parent is not None else random.getrandbits(128)
+        self.span_id = random.getrandbits(64)
+        self.parent_id = parent.span_id if parent is not None else None
+        self.start_ns = 0
+        self.end_ns = 0
+        self.attributes = dict(attributes) if attributes else {}
+        self.error: Optional[str] = None
+        self._tracer = tracer
+        self._token = None
+
+    @property
+    def duration(self) -> float:
+        """Duration of the span in seconds."""
+        return (self.end_ns - self.start_ns) / 1e9
+
+    def set_attribute(self, key: str, value: Any) -> None:
+        """Attach an attribute to the span."""
+        self.attributes[key] = value
+
+    def __enter__(self) -> "Span":
+        self._token = _current_span.set(self)
+        self.start_ns = time.time_ns()
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback) -> None:
+        self.end_ns = time.time_ns()
+        _current_span.reset(self._token)
+        if exc_type is not None:
+            self.error = f"{exc_type.__name__}: {exc_value}"
+        self._tracer.finish(self)
+
+    def to_dict(self) -> Dict[str, Any]:
+        """
+        Convert the span to a JSON-serializable dictionary.
+
+        Returns:
+            Dictionary with hex IDs, nanosecond timestamps and attributes
+        """
+        return {
+            "name": self.name,
+            "trace_id": f"{self.trace_id:032x}",
+            "span_id": f"{self.span_id:016x}",
+            "parent_id": f"{self.parent_id:016x}" if self.parent_id is not None else None,
+            "start_ns": self.start_ns,
+            "end_ns": self.end_ns,
+            "duration": self.duration,
+            "attributes": self.attributes,
+            "error": self.error,
+        }
+
+
+class _NoOpSpan:
+    """Span returned while tracing is disabled; does nothing."""
+
+    __slots__ = ()
+
+    def set_attribute(self, key: str, value: Any) -> None:
+        pass
+
+    def __enter__(self) -> "_NoOpSpan":
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback) -> None:
+        pass
+
+
+_NOOP_SPAN = _NoOpSpan()
+
+
+class RingBufferSink:
+    """Keeps the most recent finished spans in memory."""
+
+    def __init__(self, capacity: int = 4096) -> None:
+        """
+        Initialize the ring.
+
+        Args:
+            capacity: Number of spans kept; older spans are dropped
+        """
+        self._spans: "deque[Span]" = deque(maxlen=capacity)
+
+    def export(self, span: Span) -> None:
+        """Store a finished span."""
+        self._spans.append(span)
+
+    def spans(self) -> List[Span]:
+        """Get the stored spans, oldest first."""
+        return list(self._spans)
+
+    def close(self) -> None:
+        """Nothing to release."""
+
+
+class JsonFileSink:
+    """Appends finished spans to a file, one JSON object per line."""
+
+    def __init__(self, path: str) -> None:
+        """
+        Open the span file.
+
+        Args:
+            path: Path of the file spans are appended to
+        """
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self._file = open(path, "a", encoding="utf-8")
+        self._lock = threading.Lock()
+
+    def export(self, span: Span) -> None:
+        """Write a finished span."""
+        line = json.dumps(span.to_dict(), default=str)
+        with self._lock:
+            self._file.write(line + "\n")
+
+    def close(self) -> None:
+        """Flush and close the span file."""
+        with self._lock:
+            self._file.close()
+
+
+class OtlpHttpSink:
+    """
+    Exports spans to an OpenTelemetry collector using OTLP/HTTP with JSON.
+
+    Spans are batched and posted by a background thread, so exporting
+    never blocks the traced code; spans are dropped while the batch queue
+    is full or the collector is unreachable.
+    """
+
+    def __init__(self, endpoint: str, service_name: str, batch_size: int = 256,
+                 flush_interval: float = 5.0, max_queue_size: int = 8192) -> None:
+        """
+        Initialize the exporter.
+
+        Args:
+            endpoint: Collector traces URL, e.g. http://127.0.0.1:4318/v1/traces
+            service_name: Value of the service.name resource attribute
+            batch_size: Maximum number of spans per request
+            flush_interval: Seconds between exports
+            max_queue_size: Maximum number of spans waiting for export
+        """
+        self.endpoint = endpoint
+        self.service_name = service_name
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self._spans: "deque[Span]" = deque(maxlen=max_queue_size)
+        self._wakeup = threading.Event()
+        self._should_export = True
+        self._thread = threading.Thread(target=self._export_loop, daemon=True)
+        self._thread.start()
+
+    def export(self, span: Span) -> None:
+        """Queue a finished span for export."""
+        self._spans.append(span)
+        if len(self._spans) >= self.batch_size:
+            self._wakeup.set()
+
+    def close(self) -> None:
+        """Export the remaining spans and stop the exporter thread."""
+        self._should_export = False
+        self._wakeup.set()
+        self._thread.join(self.flush_interval)
+
+    def _export_loop(self) -> None:
+        """Post queued spans to the collector until closed."""
+        while self._should_export:
+            self._wakeup.wait(self.flush_interval)
+            self._wakeup.clear()
+            self._flush()
+        self._flush()
+
+    def _flush(self) -> None:
+        """Post all queued spans in batches."""
+        while self._spans:
+            batch = []
+            while self._spans and len(batch) < self.batch_size:
+                batch.append(self._spans.popleft())
+            try:
+                self._post(batch)
+            except OSError as e:
+                logger.warning("Failed to export %d spans to %s: %s", len(batch), self.endpoint, e)
+                return
+
+    def _post(self, batch: List[Span]) -> None:
+        """Send one batch of spans as an OTLP ExportTraceServiceRequest."""
+        body = json.dumps({
+            "resourceSpans": [{
+                "resource": {"attributes": [_otlp_attribute("service.name", self.service_name)]},
+                "scopeSpans": [{
+                    "scope": {"name": "mizu_ground_station"},
+                    "spans": [_otlp_span(span) for span in batch],
+                }],
+            }],
+        }).encode()
+        request = urllib.request.Request(
+            self.endpoint, data=body, headers={"Content-Type": "application/json"}, method="POST"
+        )
+        with urllib.request.urlopen(request, timeout=self.flush_interval) as response:
+            response.read()
+
+
+def _otlp_attribute(key: str, value: Any) -> Dict[str, Any]:
+    """Encode an attribute as an OTLP KeyValue."""
+    if isinstance(value, bool):
+        encoded = {"boolValue": value}
+    elif isinstance(value, int):
+        encoded = {"intValue": str(value)}
+    elif isinstance(value, float):
+        encoded = {"doubleValue": value}
+    else:
+        encoded = {"stringValue": str(value)}
+    return {"key": key, "value": encoded}
+
+
+def _otlp_span(span: Span) -> Dict[str, Any]:
+    """Encode a finished span as an OTLP Span."""
+    encoded = {
+        "traceId": f"{span.trace_id:032x}",
+        "spanId": f"{span.span_id:016x}",
+        "name": span.name,
+        "kind": 1,  # SPAN_KIND_INTERNAL
+        "startTimeUnixNano": str(span.start_ns),
+        "endTimeUnixNano": str(span.end_ns),
+        "attributes": [_otlp_attribute(key, value) for key, value in span.attributes.items()],
+    }
+    if span.parent_id is not None:
+        encoded["parentSpanId"] = f"{span.parent_id:016x}"
+    if span.error is not None:
+        encoded["status"] = {"code": 2, "message": span.error}  # STATUS_CODE_ERROR
+    return encoded
+
+
+class Tracer:
+    """Creates spans and passes finished ones to the configured sink."""
+
+    def __init__(self) -> None:
+        self._sink = None
+
+    @property
+    def enabled(self) -> bool:
+        """Whether spans are being recorded."""
+        return self._sink is not None
+
+    def set_sink(self, sink) -> None:
+        """
+        Replace the sink that receives finished spans.
+
+        Args:
+            sink: Object with export(span) and close() methods, or None to disable tracing
+        """
+        previous, self._sink = self._sink, sink
+        if previous is not None and previous is not sink:
+            previous.close()
+
+    def span(self, name: str, attributes: Optional[Dict[str, Any]] = None,
+             parent: Optional[Span] = None):
+        """
+        Start a span as a context manager, nested in the current span.
+
+        Args:
+            name: Name of the traced operation
+            attributes: Attributes to attach to the span (optional)
+            parent: Span to nest in instead of the current one, e.g. one
+                captured with current_span() on the thread that handed
+                over the work (optional)
+
+        Returns:
+            Span to use in a with statement, or a no-op span when tracing is disabled
+        """
+        if self._sink is None:
+            return _NOOP_SPAN
+        return Span(self, name, parent if parent is not None else _current_span.get(), attributes)
+
+    def current_span(self) -> Optional[Span]:
+        """
+        Get the span open on the calling thread.
+
+        Spans do not follow work to other threads; pass the result as the
+        parent of spans started for that work.
+
+        Returns:
+            The innermost open span, or None
+        """
+        return _current_span.get()
+
+    def finish(self, span: Span) -> None:
+        """Hand a finished span to the sink."""
+        sink = self._sink
+        if sink is None:
+            return
+        try:
+            sink.export(span)
+        except Exception as e:
+            logger.warning("Failed to export span %s: %s", span.name, e)
+
+
+def create_sink(kind: Optional[str], path: str = "traces/spans.jsonl", ring_size: int = 4096,
+                otlp_endpoint: str = "http://127.0.0.1:4318/v1/traces",
+                service_name: str = "mizu-ground-station"):
+    """
+    Create a span sink by name.
+
+    Args:
+        kind: "ring", "json", "otlp", or None for no sink
+        path: File for the json sink
+        ring_size: Capacity of the ring sink
+        otlp_endpoint: Collector traces URL for the otlp sink
+        service_name: Service name reported by the otlp sink
+
+    Returns:
+        The sink, or None when kind is None
+
+    Raises:
+        ValueError: When the sink name is unknown
+    """
+    if kind is None:
+        return None
+    if kind == SINK_RING:
+        return RingBufferSink(ring_size)
+    if kind == SINK_JSON:
+        return JsonFileSink(path)
+    if kind == SINK_OTLP:
+        return OtlpHttpSink(otlp_endpoint, service_name)
+    raise ValueError(f"Unknown trace sink: {kind}")
+
+
+# Tracer shared by the ground station modules
+TRACER = Tracer()
@@ -0,0 +1,127 @@
+#!/usr/bin/env python3
+"""
+Compression dictionary trainer for MIZU Ground Station.
+
+This script trains a DEFLATE dictionary from the most recent readings in
+mizu_sensor_hub and stores it under the next free dictionary ID, then
+reports how well it compresses a held-out sample. The stored dictionary
+file must be installed on the receiving side before the ground station
+is configured to use it.
+
+Usage:
+    python train_dictionary.py
+    python train_dictionary.py --samples 50000 --directory dictionaries
+    python train_dictionary.py --url sqlite:///mizu_sensor_hub.db
+"""
+
+import argparse
+import sys
+
+from config import (
+    COMPRESSION_BATCH_SIZE, COMPRESSION_DICTIONARY_DIRECTORY, COMPRESSION_LEVEL, DATABASE_URL,
+    DELTA_ENCODING_ENABLED, DELTA_FIELD_PRECISION, DELTA_KEYFRAME_INTERVAL
+)
+from database_manager import DatabaseManager
+from database_models import SensorData, get_db_session
+from delta_encoding import DeltaEncoder
+from frame_compression import FrameCompressor, MAX_DICTIONARY_SIZE, save_dictionary, train_dictionary
+from sensor_record import format_frame
+
+DEFAULT_SAMPLES = 20000
+
+# Share of the sample kept back to evaluate the dictionary
+HOLDOUT_FRACTION = 0.1
+
+
+def load_frames(sample_count: int) -> list:
+    """
+    Format the most recent sample_count readings, oldest first.
+
+    The database must already be initialized. With delta encoding
+    enabled the frames are delta-encoded, as they are when sent.
+    """
+    db = get_db_session()
+    try:
+        rows = db.query(SensorData).order_by(SensorData.id.desc()).limit(sample_count).all()
+        frames = [format_frame(row) for row in reversed(rows)]
+    finally:
+        db.close()
+
+    if DELTA_ENCODING_ENABLED:
+        encoder = DeltaEncoder(DELTA_FIELD_PRECISION, DELTA_KEYFRAME_INTERVAL)
+        frames = [encoder.encode(frame) for frame in frames]
+    return frames
+
+
+def evaluate(frames: list, compressor: FrameCompressor, batch_size: int) -> tuple:
+    """
+    Compress frames in batches, with and without the dictionary.
+
+    Returns:
+        Tuple of (plain characters, characters with dictionary, characters without)
+    """
+    without_dictionary = FrameCompressor(b"", 0, compressor.level)
+    plain = compressed = undictionaried = 0
+    for start in range(0, len(frames), batch_size):
+        batch = frames[start:start + batch_size]
+        plain += sum(len(frame) for frame in batch)
+        compressed += len(compressor.compress(batch))
+        undictionaried += len(without_dictionary.compress(batch))
+    return plain, compressed, undictionaried
+
+
+def main() -> bool:
+    """Main training function."""
+    parser = argparse.ArgumentParser(description="Train an uplink compression dictionary")
+    parser.add_argument("--samples", type=int, default=DEFAULT_SAMPLES, help="recent readings to train on")
+    parser.add_argument("--size", type=int, default=MAX_DICTIONARY_SIZE, help="maximum dictionary size in bytes")
+    parser.add_argument("--directory", default=COMPRESSION_DICTIONARY_DIRECTORY, help="dictionary directory")
+    parser.add_argument("--batch-size", type=int, default=COMPRESSION_BATCH_SIZE,
+                        help="frames per compressed batch when evaluating")
+    parser.add_argument("--url", default=DATABASE_URL, help="database to read readings from")
+    arguments = parser.parse_args()
+
+    print("MIZU Ground Station Dictionary Trainer")
+    print("=" * 40)
+
+    if not DatabaseManager(arguments.url).initialize():
+        print("❌ Could not connect to the database")
+        return False
+
+    try:
+        frames = load_frames(arguments.samples)
+    except Exception as e:
+        print(f"❌ Could not read readings: {e}")
+        return False
+
+    if len(frames) < 10:
+        print(f"❌ Need at least 10 readings to train, found {len(frames)}")
+        return False
+
+    split = len(frames) - max(1, int(len(frames) * HOLDOUT_FRACTION))
+    training, holdout = frames[:split], frames[split:]
+
+    dictionary = train_dictionary(training, arguments.size)
+    try:
+        dictionary_id = save_dictionary(arguments.directory, dictionary)
+    except (OSError, ValueError) as e:
+        print(f"❌ Could not store dictionary: {e}")
+        return False
+
+    print(f"✅ Trained on {len(training)} readings")
+    print(f"✅ Stored dictionary {dictionary_id:04X} ({len(dictionary)} bytes) in {arguments.directory}")
+
+    plain, compressed, undictionaried = evaluate(
+        holdout, FrameCompressor(dictionary, dictionary_id, COMPRESSION_LEVEL), arguments.batch_size
+    )
+    print(f"\nHeld-out readings: {len(holdout)}, batch size: {arguments.batch_size}")
+    print(f"  Uncompressed:          {plain:8d} chars")
+    print(f"  zlib, no dictionary:   {undictionaried:8d} chars  ({plain / undictionaried:.2f}x)")
+    print(f"  zlib, with dictionary: {compressed:8d} chars  ({plain / compressed:.2f}x)")
+    print(f"\nSet COMPRESSION_DICTIONARY_ID = 0x{dictionary_id:04X} in config.py to pin this dictionary.")
+    return True
+
+
+if __name__ == "__main__":
+    success = main()
+    sys.exit(0 if success else 1)
@@ -0,0 +1,101 @@
+"""
+Transmit scheduling for MIZU Ground Station.
+
+This module decides the order in which queued sensor data is sent over
+the link, according to a configurable policy. Urgent manual commands
+bypass the scheduler and pre-empt the backlog in the serial writer queue.
+"""
+
+from typing import Dict, Iterable, List, Optional, Set, Tuple
+
+# Scheduling policies and the database ordering each one uses
+POLICY_FIFO = "fifo"
+POLICY_NEWEST_FIRST = "newest_first"
+POLICY_FAIR = "fair"
+POLICY_PRIORITY = "priority"
+
+POLICY_QUERY_ORDERS = {
+    POLICY_FIFO: "oldest",
+    POLICY_NEWEST_FIRST: "newest",
+    POLICY_FAIR: "fair",
+    POLICY_PRIORITY: "priority",
+}
+
+
+class TransmitScheduler:
+    """
+    Orders the transmit backlog.
+
+    Each planning round ranks the best untransmitted entries as returned
+    by the database for the active policy. Frames waiting in the outbox
+    are sent in that rank order; frames the database did not rank (e.g.
+    while it is unreachable) follow in ID order, newest first for the
+    newest-first policy.
+    """
+
+    def __init__(self, policy: str = POLICY_FIFO) -> None:
+        """
+        Initialize the scheduler.
+
+        Args:
+            policy: Scheduling policy (fifo, newest_first, fair or priority)
+
+        Raises:
+            ValueError: When the policy is unknown
+        """
+        if policy not in POLICY_QUERY_ORDERS:
+            raise ValueError(f"Unknown scheduling policy: {policy}")
+
+        self.policy = policy
+        self._ranks: Dict[int, int] = {}
+
+    @property
+    def query_order(self) -> str:
+        """Ordering to request from DatabaseManager.get_untransmitted_data()."""
+        return POLICY_QUERY_ORDERS[self.policy]
+
+    def plan(self, ranked_ids: Iterable[int]) -> None:
+        """
+        Record the ranking of the latest planning round.
+
+        Args:
+            ranked_ids: Record IDs in the order they should be sent
+        """
+        self._ranks = {record_id: rank for rank, record_id in enumerate(ranked_ids)}
+
+    def order(self, pending: List[Tuple[int, bytes]]) -> List[Tuple[int, bytes]]:
+        """
+        Sort queued frames into sending order.
+
+        Args:
+            pending: List of (record_id, frame) tuples from the outbox
+
+        Returns:
+            The same tuples, best first
+        """
+        return sorted(pending, key=lambda item: self._sort_key(item[0]))
+
+    def eviction_candidate(self, queued_ids: Set[int], protected_ids: Set[int]) -> Optional[int]:
+        """
+        Pick the queued frame that should make room for a better one.
+
+        Args:
+            queued_ids: Record IDs currently waiting in the outbox
+            protected_ids: Record IDs that must not be evicted, e.g. frames in flight
+
+        Returns:
+            The worst-ranked record ID outside the current plan, or None
+        """
+        candidates = [record_id for record_id in queued_ids
+                      if record_id not in self._ranks and record_id not in protected_ids]
+        if not candidates:
+            return None
+        return max(candidates, key=self._sort_key)
+
+    def _sort_key(self, record_id: int) -> Tuple[int, int, int]:
+        """Sort key: ranked entries first, then unranked entries in fallback order."""
+        rank = self._ranks.get(record_id)
+        if rank is not None:
+            return (0, rank, 0)
+        fallback = -record_id if self.policy == POLICY_NEWEST_FIRST else record_id
+        return (1, 0, fallback)
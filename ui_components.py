@@ -5,7 +5,9 @@ This module contains all GUI widget creation and management logic,
 separated from the main application logic for better maintainability.
 """
 
+import time
 import tkinter as tk
+from collections import deque
 from tkinter import END, VERTICAL
 import customtkinter
 
@@ -14,7 +16,7 @@ from config import (
     DEFAULT_COLOR_THEME, DEFAULT_FONT, DEFAULT_FONT_SIZE,
     TITLE_FONT, TITLE_FONT_SIZE, ICON_FONT, ICON_FONT_SIZE,
     ICON_COLOR, TITLE_COLOR, THEME_OPTIONS, OS_WINDOWS, OS_LINUX,
-    DEFAULT_BAUD_RATE
+    DEFAULT_BAUD_RATE, DASHBOARD_HISTORY_LENGTH
 )
 
 
@@ -276,6 +278,7 @@ class MainContentPanel:
         self._create_command_input_section()
         self._create_transmission_status_section()
         self._create_data_display_section()
+        self.dashboard_panel = DashboardPanel(self.main_content_panel, row=3)
 
     def _create_command_input_section(self):
         """Create the command input section with text field and send button."""
@@ -386,3 +389,143 @@ class MainContentPanel:
         # Add a newline before the new data to separate it from previous entries
         self.data_display_text_area.insert(END, data + "\n")
         self.data_display_text_area.see(END)  # Auto-scroll to show latest data
+
+
+class DashboardPanel:
+    """
+    Manages the live performance dashboard.
+
+    The dashboard is a single canvas whose items are created once and
+    only reconfigured on refresh, so updating it never rebuilds widgets.
+    It is fed metric snapshots and never touches the database itself.
+    """
+
+    # Canvas geometry
+    CANVAS_HEIGHT = 90
+    STAT_ROW_Y = 18
+    SPARKLINE_TOP = 40
+    SPARKLINE_BOTTOM = 82
+    SPARKLINE_LEFT = 110
+    MARGIN = 10
+
+    STATS = (
+        ("backlog", "Backlog"),
+        ("uplink_rate", "Uplink rate"),
+        ("db_latency", "DB latency"),
+        ("errors", "Errors"),
+    )
+
+    def __init__(self, parent, row: int):
+        """
+        Initialize the dashboard panel.
+
+        Args:
+            parent: Parent widget
+            row: Grid row of the parent to place the dashboard in
+        """
+        self.parent = parent
+        self.frames_per_second = deque([0.0] * DASHBOARD_HISTORY_LENGTH, maxlen=DASHBOARD_HISTORY_LENGTH)
+        self._previous_snapshot = None
+        self._previous_time = None
+        self._db_latency = None
+        self._create_dashboard_panel(row)
+
+    def _create_dashboard_panel(self, row: int):
+        """Create the dashboard frame, canvas and all canvas items."""
+        # Create container for the dashboard
+        self.dashboard_frame = customtkinter.CTkFrame(master=self.parent, corner_radius=5)
+        self.dashboard_frame.grid(row=row, column=0, pady=(0, 10), padx=10, sticky="ew")
+        self.dashboard_frame.grid_columnconfigure(0, weight=1)
+
+        # Create the canvas all dashboard items are drawn on
+        self.dashboard_canvas = tk.Canvas(
+            self.dashboard_frame, height=self.CANVAS_HEIGHT, highlightthickness=0
+        )
+        self.dashboard_canvas.grid(row=0, column=0, sticky="ew", padx=10, pady=10)
+        self.dashboard_canvas.bind("<Configure>", lambda event: self._draw_sparkline())
+
+        # One text item per statistic; refreshes only change their text
+        self.stat_items = {}
+        for index, (key, title) in enumerate(self.STATS):
+            self.stat_items[key] = self.dashboard_canvas.create_text(
+                self.MARGIN + index * 180, self.STAT_ROW_Y, anchor="w",
+                text=f"{title}: -", font=(DEFAULT_FONT, 12)
+            )
+
+        # Frames/s sparkline with its current value
+        self.sparkline_label = self.dashboard_canvas.create_text(
+            self.MARGIN, (self.SPARKLINE_TOP + self.SPARKLINE_BOTTOM) / 2, anchor="w",
+            text="Frames/s: 0.0", font=(DEFAULT_FONT, 12)
+        )
+        self.sparkline_baseline = self.dashboard_canvas.create_line(
+            0, 0, 0, 0, fill="#b0b0b0"
+        )
+        self.sparkline = self.dashboard_canvas.create_line(
+            0, 0, 0, 0, fill=TITLE_COLOR, width=2
+        )
+
+    def update_metrics(self, snapshot: dict):
+        """
+        Refresh the dashboard from a metrics snapshot.
+
+        Must be called on the UI thread at a fixed, low rate; rates are
+        derived from the change since the previous snapshot.
+
+        Args:
+            snapshot: Metric values from MetricsRegistry.snapshot(), plus
+                "link_rate" (characters per second)
+        """
+        now = time.monotonic()
+        previous = self._previous_snapshot
+
+        if previous is not None and now > self._previous_time:
+            elapsed = now - self._previous_time
+            frames_sent = snapshot.get("mizu_frames_sent_total", 0) - previous.get("mizu_frames_sent_total", 0)
+            self.frames_per_second.append(max(0.0, frames_sent / elapsed))
+
+            # Latency of the polls since the last refresh; keep the last value while idle
+            polls = snapshot.get("mizu_db_poll_seconds_count", 0) - previous.get("mizu_db_poll_seconds_count", 0)
+            if polls > 0:
+                poll_time = snapshot.get("mizu_db_poll_seconds_sum", 0) - previous.get("mizu_db_poll_seconds_sum", 0)
+                self._db_latency = poll_time / polls
+
+        self._previous_snapshot = snapshot
+        self._previous_time = now
+
+        errors = int(snapshot.get("mizu_send_failures_total", 0))
+        retransmits = int(snapshot.get("mizu_retransmits_total", 0))
+        db_latency = "-" if self._db_latency is None else f"{self._db_latency * 1000:.1f} ms"
+
+        self._set_stat("backlog", f"Backlog: {int(snapshot.get('mizu_backlog_size', 0))}")
+        self._set_stat("uplink_rate", f"Uplink rate: {snapshot.get('link_rate', 0.0):.1f} chars/s")
+        self._set_stat("db_latency", f"DB latency: {db_latency}")
+        self._set_stat("errors", f"Errors: {errors} failed, {retransmits} retransmitted")
+        self.dashboard_canvas.itemconfigure(
+            self.sparkline_label, text=f"Frames/s: {self.frames_per_second[-1]:.1f}"
+        )
+        self._draw_sparkline()
+
+    def _set_stat(self, key: str, text: str):
+        """Change the text of a statistic if it differs from the displayed one."""
+        item = self.stat_items[key]
+        if self.dashboard_canvas.itemcget(item, "text") != text:
+            self.dashboard_canvas.itemconfigure(item, text=text)
+
+    def _draw_sparkline(self):
+        """Move the sparkline points to fit the current history and canvas width."""
+        width = self.dashboard_canvas.winfo_width()
+        right = max(self.SPARKLINE_LEFT + 1, width - self.MARGIN)
+        height = self.SPARKLINE_BOTTOM - self.SPARKLINE_TOP
+        peak = max(self.frames_per_second) or 1.0
+        step = (right - self.SPARKLINE_LEFT) / max(1, len(self.frames_per_second) - 1)
+
+        coordinates = []
+        for index, value in enumerate(self.frames_per_second):
+            coordinates.append(self.SPARKLINE_LEFT + index * step)
+            coordinates.append(self.SPARKLINE_BOTTOM - value / peak * height)
+
+        self.dashboard_canvas.coords(self.sparkline, *coordinates)
+        self.dashboard_canvas.coords(
+            self.sparkline_baseline,
+            self.SPARKLINE_LEFT, self.SPARKLINE_BOTTOM, right, self.SPARKLINE_BOTTOM
+        )